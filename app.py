@@ -8,10 +8,155 @@ import sys
 # 将项目根目录加入 sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
+import threading
+import time
+
 import streamlit as st
 from src import DeepSearchAgent, Config
+from src.service import COMPLETED, FAILED, CANCELLED, JobManager, QueueFullError, ResearchJob
 from src.utils.config import load_config
 
+# 研究运行期间页面刷新进度的间隔(秒)
+POLL_INTERVAL_SECONDS = 0.5
+
+# 节点中文映射
+NODE_NAMES = {
+    "structure": "📋 生成报告结构",
+    "structure_paragraph": "🧩 生成大纲段落",
+    "plan_queries": "🗺️ 规划搜索查询",
+    "search": "🔍 执行搜索",
+    "summary": "📝 生成总结",
+    "reflect": "🤔 反思搜索",
+    "reflect_summary": "✍️ 更新总结",
+    "next_paragraph": "➡️ 移动到下一段落",
+    "research_paragraph": "✅ 段落研究完成",
+    "format": "📄 格式化最终报告",
+}
+
+
+# 同时缓存的 Agent 配置数;侧边栏配置变化时较早的管理器被淘汰并释放
+MAX_CACHED_MANAGERS = 2
+
+
+def release_job_manager(manager: JobManager):
+    """缓存淘汰时调用:后台等待已提交的任务运行完,再关闭线程池与 Agent 的连接"""
+    threading.Thread(target=manager.close, kwargs={"cancel": False, "wait": True},
+                     name="release-job-manager", daemon=True).start()
+
+
+@st.cache_resource(show_spinner="正在初始化 Agent...", max_entries=MAX_CACHED_MANAGERS,
+                   on_release=release_job_manager)
+def get_job_manager(
+    openai_api_key: str,
+    openai_model: str,
+    tavily_api_key: str,
+    max_reflections: int,
+    max_search_results: int,
+    max_content_length: int,
+    parallel_paragraphs: bool,
+    max_paragraph_concurrency: int,
+    output_dir: str,
+    max_workers: int,
+) -> JobManager:
+    """
+    按配置缓存 Agent 与后台任务管理器
+
+    配置不变时页面重跑与各会话复用同一个 Agent(已编译的图、LLM/搜索客户端、缓存与限流器),
+    研究任务在管理器的工作线程中运行,不占用 Streamlit 脚本线程。
+    最多保留 MAX_CACHED_MANAGERS 份配置,被淘汰的管理器在任务结束后释放线程与连接
+    """
+    config = Config(
+        openai_api_key=openai_api_key,
+        tavily_api_key=tavily_api_key,
+        default_llm_provider="openai",
+        openai_model=openai_model,
+        max_reflections=max_reflections,
+        max_search_results=max_search_results,
+        max_content_length=max_content_length,
+        parallel_paragraphs=parallel_paragraphs,
+        max_paragraph_concurrency=max_paragraph_concurrency,
+        output_dir=output_dir,
+        save_intermediate_states=False,
+    )
+    return JobManager(DeepSearchAgent(config), max_workers=max_workers)
+
+
+def render_progress(job: ResearchJob):
+    """根据任务已产生的事件重建进度展示(每次页面重跑时调用)"""
+    st.markdown("---")
+    st.header("🔄 研究进度")
+
+    finished_paragraphs = set()
+    total_paragraphs = 0
+    progress = None
+    status_text = "⏳ 排队等待中..."
+    streamed_report = ""
+
+    for progress_data in list(job.events):
+        node = progress_data["node"]
+        if node == "completed":
+            continue
+        if node == "report_chunk":
+            # 实时渲染正在生成的报告
+            status_text = f"当前阶段：{NODE_NAMES['format']}"
+            streamed_report += progress_data["chunk"]
+            continue
+
+        # 大纲段落等自定义事件不带状态
+        state = progress_data.get("state")
+        node_display = NODE_NAMES.get(node, node)
+        paragraph_idx = progress_data.get("paragraph_index")
+        if paragraph_idx is not None:
+            node_display = f"{node_display}（段落 {paragraph_idx + 1}）"
+        status_text = f"当前阶段：{node_display}"
+
+        if node == "structure" and state:
+            total_paragraphs = len(state.get("paragraphs", []))
+
+        # 并行模式：按已完成的段落分支计算进度
+        if node == "research_paragraph" and total_paragraphs > 0:
+            finished_paragraphs.add(paragraph_idx)
+            progress = (len(finished_paragraphs), total_paragraphs)
+
+        # 段落进度条
+        # 节点只返回修改过的段落,总数以结构生成时的段落数为准
+        if state and "current_paragraph_index" in state and total_paragraphs > 0:
+            current_idx = min(state["current_paragraph_index"], total_paragraphs - 1)
+            progress = (current_idx + 1, total_paragraphs)
+
+    if progress is not None:
+        done, total = progress
+        st.progress(done / total, text=f"段落进度：{done}/{total}")
+
+    if job.status == COMPLETED:
+        st.success("✅ 研究完成！")
+    elif job.status == FAILED:
+        st.error(f"❌ 研究过程中发生错误：{job.error}")
+    elif job.status == CANCELLED:
+        st.warning("⏹️ 研究已取消")
+    else:
+        st.info(status_text)
+        if streamed_report:
+            st.markdown(streamed_report)
+
+
+def render_result(result: dict):
+    """展示保存在会话中的研究结果"""
+    st.markdown("---")
+    st.header("📊 研究结果")
+    tab1, tab2 = st.tabs(["📄 最终报告", "💾 下载"])
+    with tab1:
+        st.subheader("⏱️ 运行统计")
+        st.metric("运行时间", f"{result['run_time']:.2f} 秒")
+        st.markdown(result["report"])
+    with tab2:
+        st.download_button(
+            label="📥 下载 Markdown 报告",
+            data=result["report"],
+            file_name=f"deep_search_report_{result['query'][:20]}.md",
+            mime="text/markdown",
+        )
+
 
 def main():
     # -------------------- 页面配置 --------------------
@@ -81,6 +226,19 @@ def main():
             step=5000,
             help="搜索内容的最大字符数",
         )
+        parallel_paragraphs = st.checkbox(
+            "段落并行研究",
+            value=default_config.parallel_paragraphs if has_config_file else False,
+            help="每个段落作为独立分支并发执行搜索、总结与反思",
+        )
+        max_paragraph_concurrency = st.slider(
+            "并行段落上限",
+            min_value=1,
+            max_value=10,
+            value=default_config.max_paragraph_concurrency if has_config_file else 4,
+            disabled=not parallel_paragraphs,
+            help="并行模式下同时运行的段落分支数量",
+        )
         output_dir = st.text_input(
             "报告保存目录",
             value=default_config.output_dir if has_config_file else "reports",
@@ -127,84 +285,56 @@ def main():
             return
 
         try:
-            # 构造配置
-            config = Config(
-                openai_api_key=openai_api_key,
-                tavily_api_key=tavily_api_key,
-                default_llm_provider="openai",
-                openai_model=openai_model,
-                max_reflections=max_reflections,
-                max_search_results=max_search_results,
-                max_content_length=max_content_length,
-                output_dir=output_dir,
-                save_intermediate_states=False,
+            manager = get_job_manager(
+                openai_api_key,
+                openai_model,
+                tavily_api_key,
+                max_reflections,
+                max_search_results,
+                max_content_length,
+                parallel_paragraphs,
+                max_paragraph_concurrency,
+                output_dir,
+                default_config.service_max_workers if has_config_file else 2,
             )
+            job = manager.submit(query.strip(), save_report=save_report)
+        except QueueFullError as e:
+            st.error(f"❌ 当前研究任务过多，请稍后再试：{str(e)}")
+            return
+        except Exception as e:
+            st.error(f"❌ Agent 初始化失败：{str(e)}")
+            st.exception(e)
+            return
+
+        # 任务与结果保存在会话中,页面重跑(包括修改侧边栏参数)不会中断研究
+        st.session_state["research_manager"] = manager
+        st.session_state["research_job"] = job
+        st.session_state.pop("research_result", None)
 
-            # 初始化 Agent
-            with st.spinner("正在初始化 Agent..."):
-                agent = DeepSearchAgent(config)
-            st.success("✅ Agent 初始化成功")
-
-            # ---- 实时进度展示 ----
-            st.markdown("---")
-            st.header("🔄 研究进度")
-
-            progress_placeholder = st.empty()
-            status_placeholder = st.empty()
-
-            # 节点中文映射
-            node_names = {
-                "structure": "📋 生成报告结构",
-                "search": "🔍 执行搜索",
-                "summary": "📝 生成总结",
-                "reflect": "🤔 反思搜索",
-                "reflect_summary": "✍️ 更新总结",
-                "next_paragraph": "➡️ 移动到下一段落",
-                "format": "📄 格式化最终报告",
+    job = st.session_state.get("research_job")
+    if job is not None:
+        render_progress(job)
+
+        if job.status == COMPLETED and "research_result" not in st.session_state:
+            st.session_state["research_result"] = {
+                "query": job.query,
+                "report": job.report,
+                "run_time": job.run_time,
             }
 
-            final_report = None
-            for progress_data in agent.research(query, save_report=save_report):
-                if progress_data["node"] == "completed":
-                    final_report = progress_data["report"]
-                    status_placeholder.success("✅ 研究完成！")
-                    break
-                else:
-                    node = progress_data["node"]
-                    state = progress_data["state"]
-                    node_display = node_names.get(node, node)
-                    status_placeholder.info(f"当前阶段：{node_display}")
-
-                    # 段落进度条
-                    if "current_paragraph_index" in state and "paragraphs" in state:
-                        current_idx = state["current_paragraph_index"]
-                        total = len(state["paragraphs"])
-                        if total > 0:
-                            progress_placeholder.progress(
-                                (current_idx + 1) / total,
-                                text=f"段落进度：{current_idx + 1}/{total}",
-                            )
-
-            # -------------------- 结果展示 --------------------
-            if final_report:
-                st.markdown("---")
-                st.header("📊 研究结果")
-                tab1, tab2 = st.tabs(["📄 最终报告", "💾 下载"])
-                with tab1:
-                    st.subheader("⏱️ 运行统计")  
-                    st.metric("运行时间", f"{progress_data['run_time']:.2f} 秒")
-                    st.markdown(final_report)
-                with tab2:
-                    st.download_button(
-                        label="📥 下载 Markdown 报告",
-                        data=final_report,
-                        file_name=f"deep_search_report_{query[:20]}.md",
-                        mime="text/markdown",
-                    )
+        if not job.finished:
+            if st.button("⏹️ 取消研究"):
+                st.session_state["research_manager"].cancel(job.id)
 
-        except Exception as e:
-            st.error(f"❌ 研究过程中发生错误：{str(e)}")
-            st.exception(e)
+    # -------------------- 结果展示 --------------------
+    result = st.session_state.get("research_result")
+    if result:
+        render_result(result)
+
+    # 研究进行中时定时重跑页面刷新进度
+    if job is not None and not job.finished:
+        time.sleep(POLL_INTERVAL_SECONDS)
+        st.rerun()
 
 
 if __name__ == "__main__":
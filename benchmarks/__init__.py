@@ -0,0 +1,4 @@
+"""
+离线基准测试
+使用确定性的本地替身(FakeLLM / FakeTavilySearch)端到端运行研究工作流,不调用任何外部 API
+"""
@@ -0,0 +1,187 @@
+"""
+冷启动基准测试
+
+用法(在项目根目录):
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 10 --max-import-ms 300
+    python -m benchmarks.bench_import --compare benchmarks/results/上次结果.json
+
+每个场景在独立子进程中以 python -X importtime 运行,统计导入耗时(取中位数)、耗时最多的模块,
+并检查 import 阶段是否加载了应当按需导入的重依赖(openai / langgraph / httpx / requests)。
+超过 --max-import-ms 或重依赖被提前加载时以非零状态退出,可直接放进 CI 防止启动耗时回退。
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .bench_research import _git_commit
+from src.utils.metrics import percentile
+
+# 只应在真正发起请求或构建图时才加载的依赖
+HEAVY_MODULES = ("openai", "langgraph", "httpx", "requests")
+
+# 场景名 → 子进程中执行的代码
+SCENARIOS = {
+    "import_src": "import src",
+    "import_agent": "from src import DeepSearchAgent, Config",
+    "create_agent": (
+        "import contextlib, io\n"
+        "from src import DeepSearchAgent, Config\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    DeepSearchAgent(Config(openai_api_key='x', tavily_api_key='x', output_dir={output_dir!r}))\n"
+    ),
+    "compile_graph": (
+        "from src.graph import create_research_graph\n"
+        "create_research_graph()\n"
+    ),
+}
+
+# 子进程最后打印已加载的重依赖与场景代码的墙钟耗时
+_PROBE = (
+    "import sys, time, json\n"
+    "_start = time.perf_counter()\n"
+    "{code}\n"
+    "_elapsed = time.perf_counter() - _start\n"
+    "print(json.dumps({{'heavy': [m for m in {heavy!r} if m in sys.modules], 'elapsed_ms': _elapsed * 1000}}))\n"
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run_scenario(code: str) -> Dict[str, Any]:
+    """在子进程中运行一次场景,解析 -X importtime 输出"""
+    probe = _PROBE.format(code=code, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          capture_output=True, text=True, cwd=os.getcwd())
+    if proc.returncode != 0:
+        raise RuntimeError(f"场景运行失败:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    probe_result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "elapsed_ms": probe_result["elapsed_ms"],
+        "heavy": probe_result["heavy"],
+        "modules": modules,
+    }
+
+
+def run_benchmark(name: str, code: str, repeat: int, top: int) -> Dict[str, Any]:
+    runs = [_run_scenario(code) for _ in range(repeat)]
+    elapsed = [r["elapsed_ms"] for r in runs]
+
+    # 各模块累计耗时取中位数后排序
+    module_times: Dict[str, List[int]] = {}
+    for run in runs:
+        for module, us in run["modules"].items():
+            module_times.setdefault(module, []).append(us)
+    slowest = sorted(
+        ((module, percentile(times, 50) / 1000) for module, times in module_times.items()),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+
+    return {
+        "case": name,
+        "repeat": repeat,
+        "elapsed_ms_p50": percentile(elapsed, 50),
+        "elapsed_ms_min": min(elapsed),
+        "elapsed_ms_max": max(elapsed),
+        "heavy_modules": sorted({m for run in runs for m in run["heavy"]}),
+        "slowest_modules": [{"module": m, "cumulative_ms": ms} for m, ms in slowest],
+    }
+
+
+def compare(previous_path: str, results: List[Dict[str, Any]]) -> None:
+    """与之前的结果文件逐场景对比耗时中位数"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {r["case"]: r for r in json.load(f)["results"]}
+
+    print(f"\n与 {previous_path} 对比:")
+    print(f"{'case':<16}{'p50(ms) 旧 → 新':>26}{'变化':>10}")
+    for result in results:
+        old = previous.get(result["case"])
+        if old is None:
+            continue
+        delta = (result["elapsed_ms_p50"] - old["elapsed_ms_p50"]) / old["elapsed_ms_p50"] * 100 \
+            if old["elapsed_ms_p50"] else 0.0
+        print(f"{result['case']:<16}{old['elapsed_ms_p50']:>12.1f} → {result['elapsed_ms_p50']:<11.1f}"
+              f"{delta:>+9.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deep Search Agent 冷启动基准测试")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="每个场景列出耗时最多的模块数")
+    parser.add_argument("--max-import-ms", type=float, default=0.0,
+                        help="import_agent 场景的耗时上限(毫秒),超出时以非零状态退出;0 表示不检查")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径,默认 benchmarks/results/import_<时间>_<提交>.json")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 对比")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    commit = _git_commit()
+
+    results = []
+    failures = []
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if name not in SCENARIOS:
+            raise ValueError(f"未知场景: {name}")
+        result = run_benchmark(name, SCENARIOS[name].format(output_dir=args.output_dir), args.repeat, args.top)
+        results.append(result)
+        heavy = ", ".join(result["heavy_modules"]) or "无"
+        print(f"[bench] {name:<16} p50 {result['elapsed_ms_p50']:8.1f}ms  "
+              f"(min {result['elapsed_ms_min']:.1f} / max {result['elapsed_ms_max']:.1f})  已加载重依赖: {heavy}")
+        for item in result["slowest_modules"][:5]:
+            print(f"          {item['cumulative_ms']:8.1f}ms  {item['module']}")
+
+        # import 与创建 Agent 都不应加载重依赖;编译图必然需要 langgraph
+        if name != "compile_graph" and result["heavy_modules"]:
+            failures.append(f"{name} 提前加载了 {heavy}")
+        if name == "import_agent" and args.max_import_ms and result["elapsed_ms_p50"] > args.max_import_ms:
+            failures.append(f"{name} 耗时 {result['elapsed_ms_p50']:.1f}ms 超过上限 {args.max_import_ms:.1f}ms")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"import_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存到: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if failures:
+        print("\n冷启动检查未通过:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
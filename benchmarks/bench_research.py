@@ -0,0 +1,372 @@
+"""
+研究工作流离线基准测试
+
+用法(在项目根目录):
+    python -m benchmarks.bench_research --paragraphs 5,10,20,50 --reflections 0,1,3,5
+    python -m benchmarks.bench_research --quick
+    python -m benchmarks.bench_research --quick --compare benchmarks/results/上次结果.json
+
+对每组 (目标, 模式, 段落数, 反思次数) 重复运行,报告吞吐量、各节点 p50/p95 延迟、
+进程峰值 RSS 与 tracemalloc 统计,结果写入 JSON 便于跨提交对比。
+目标 agent 走 DeepSearchAgent.research(含限流、缓存、指标与事件转换),
+目标 graph 直接调用 create_research_graph 编译出的图,用于衡量图本身的开销。
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.agent import DeepSearchAgent
+from src.graph import create_research_graph
+from src.utils.config import Config
+from src.utils.metrics import RunMetrics, percentile
+
+from .fakes import FakeLLM, FakeTavilySearch, LatencyModel, install_fake_search
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_API_KEY = "benchmark-fake-tavily"
+
+# (节点名, 耗时) 列表与完成时的汇总
+NodeTimings = List[Tuple[str, float]]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存(MB),不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节,Linux 为 KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def _recursion_limit(paragraphs: int, reflections: int) -> int:
+    """顺序模式每个段落约 3 + 3 * reflections 个超步,留出余量"""
+    return max(100, paragraphs * (3 + 3 * reflections) + 20)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _str_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+class BenchCase:
+    """一组基准参数,Agent 与编译后的图在重复运行间复用,每次运行替换新的替身"""
+
+    def __init__(self, args: argparse.Namespace, target: str, mode: str, paragraphs: int, reflections: int):
+        self.args = args
+        self.target = target
+        self.mode = mode
+        self.paragraphs = paragraphs
+        self.reflections = reflections
+        self.parallel = mode == "parallel"
+
+        self.agent = None
+        self.graph = None
+        if target == "agent":
+            self.agent = DeepSearchAgent(Config(
+                openai_api_key="benchmark",
+                tavily_api_key=BENCH_API_KEY,
+                max_reflections=reflections,
+                max_search_results=args.search_results,
+                parallel_paragraphs=self.parallel,
+                max_paragraph_concurrency=args.paragraph_concurrency,
+                llm_max_concurrency=args.llm_concurrency,
+                search_max_concurrency=args.search_concurrency,
+                search_cache_backend="none",
+                llm_cache_backend="none",
+                incremental_summary=args.incremental_summary,
+                reflection_min_gain=args.reflection_min_gain,
+                search_prefetch_lookahead=args.prefetch,
+                stream_structure=args.stream_structure,
+                batch_query_planning=args.batch_planning,
+                search_queries_per_step=args.queries_per_step,
+                search_blob_store=args.blob_store,
+                output_dir=args.output_dir
+            ))
+            # 退避缩短到毫秒级,避免注入的失败拖慢整组测试
+            for limiter in (self.agent.llm_limiter, self.agent.search_limiter):
+                limiter.base_delay = 0.001
+                limiter.max_delay = 0.01
+        else:
+            self.graph = create_research_graph(parallel=self.parallel, batch_planning=args.batch_planning)
+
+    @property
+    def name(self) -> str:
+        return f"{self.target}/{self.mode}/p{self.paragraphs}/r{self.reflections}"
+
+    def _install_fakes(self, seed: int) -> FakeLLM:
+        args = self.args
+        install_fake_search(BENCH_API_KEY, FakeTavilySearch(
+            latency=LatencyModel(args.search_latency, args.search_jitter, args.latency_dist),
+            content_chars=args.result_chars,
+            failure_rate=args.search_failure_rate,
+            duplicate_rate=args.search_duplicate_rate,
+            seed=seed
+        ))
+        return FakeLLM(
+            paragraphs=self.paragraphs,
+            latency=LatencyModel(args.llm_latency, args.llm_jitter, args.latency_dist),
+            completion_chars=args.completion_chars,
+            failure_rate=args.llm_failure_rate,
+            seed=seed,
+            limiter=self.agent.llm_limiter if self.agent else None
+        )
+
+    def run_once(self, seed: int) -> Tuple[NodeTimings, Dict[str, Any]]:
+        """端到端运行一次,返回各节点耗时与运行汇总"""
+        llm = self._install_fakes(seed)
+        query = f"基准测试 {seed}"
+        recursion_limit = _recursion_limit(self.paragraphs, self.reflections)
+
+        if self.agent is not None:
+            self.agent.llm_client = llm
+            timings: NodeTimings = []
+            summary: Dict[str, Any] = {}
+            for event in self.agent.research(query, save_report=False,
+                                             stream_config={"recursion_limit": recursion_limit}):
+                if event["node"] == "completed":
+                    summary = event.get("metrics", {}).get("totals", {})
+                elif "metrics" in event:
+                    timings.append((event["node"], event["metrics"]["wall_time"]))
+            return timings, summary
+
+        metrics = RunMetrics()
+        config = {
+            "configurable": {
+                "llm_client": llm,
+                "tavily_api_key": BENCH_API_KEY,
+                "max_search_results": self.args.search_results,
+                "search_queries_per_step": self.args.queries_per_step,
+                "max_reflections": self.reflections,
+                "incremental_summary": self.args.incremental_summary,
+                "reflection_min_gain": self.args.reflection_min_gain,
+                "metrics": metrics,
+            },
+            "recursion_limit": recursion_limit,
+        }
+        if self.parallel:
+            config["max_concurrency"] = self.args.paragraph_concurrency
+        self.graph.invoke({
+            "query": query,
+            "report_title": "",
+            "paragraphs": [],
+            "current_paragraph_index": 0,
+            "reflection_count": 0,
+            "max_reflections": self.reflections,
+            "final_report": None,
+            "completed": False,
+        }, config)
+        return [(r.node, r.wall_time) for r in metrics.records], metrics.summary()["totals"]
+
+    def measure_memory(self, seed: int) -> Dict[str, Any]:
+        """在 tracemalloc 下单独运行一次,统计 Python 层的峰值内存与新增内存块"""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            self.run_once(seed)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        diff = after.compare_to(before, "filename")
+        return {
+            "traced_peak_mb": peak / (1024 * 1024),
+            "net_alloc_blocks": sum(stat.count_diff for stat in diff),
+            "net_alloc_mb": sum(stat.size_diff for stat in diff) / (1024 * 1024),
+        }
+
+
+def run_case(case: BenchCase, repeat: int, warmup: int, memory: bool, verbose: bool = False) -> Dict[str, Any]:
+    """重复运行一组参数并汇总;默认屏蔽 Agent 的进度输出"""
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        return _run_case(case, repeat, warmup, memory)
+
+
+def _run_case(case: BenchCase, repeat: int, warmup: int, memory: bool) -> Dict[str, Any]:
+    for i in range(warmup):
+        case.run_once(seed=10_000 + i)
+
+    run_times = []
+    node_times: Dict[str, List[float]] = defaultdict(list)
+    totals = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        timings, summary = case.run_once(seed=i)
+        run_times.append(time.perf_counter() - start)
+        totals.append(summary)
+        for node, wall_time in timings:
+            node_times[node].append(wall_time)
+
+    total_time = sum(run_times)
+    result = {
+        "case": case.name,
+        "target": case.target,
+        "mode": case.mode,
+        "paragraphs": case.paragraphs,
+        "reflections": case.reflections,
+        "repeat": repeat,
+        "run_time_mean": total_time / repeat,
+        "run_time_p50": percentile(run_times, 50),
+        "run_time_p95": percentile(run_times, 95),
+        "throughput_runs_per_min": repeat / total_time * 60 if total_time > 0 else 0.0,
+        "throughput_paragraphs_per_sec": repeat * case.paragraphs / total_time if total_time > 0 else 0.0,
+        "llm_calls_per_run": sum(t.get("llm_calls", 0) for t in totals) / repeat,
+        "search_calls_per_run": sum(t.get("search_calls", 0) for t in totals) / repeat,
+        "search_results_per_run": sum(t.get("search_results", 0) for t in totals) / repeat,
+        "tokens_per_run": sum(t.get("total_tokens", 0) for t in totals) / repeat,
+        "dedup_saved_tokens_per_run": sum(t.get("dedup_saved_tokens", 0) for t in totals) / repeat,
+        "reflection_skipped_rounds_per_run": sum(t.get("reflection_skipped_rounds", 0) for t in totals) / repeat,
+        "nodes": {
+            node: {
+                "count": len(times),
+                "p50": percentile(times, 50),
+                "p95": percentile(times, 95),
+                "mean": sum(times) / len(times),
+            }
+            for node, times in sorted(node_times.items())
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if memory:
+        result.update(case.measure_memory(seed=20_000))
+    return result
+
+
+def compare(previous_path: str, results: List[Dict[str, Any]]) -> None:
+    """与之前的结果文件逐组对比平均耗时与吞吐量"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {r["case"]: r for r in json.load(f)["results"]}
+
+    print(f"\n与 {previous_path} 对比:")
+    print(f"{'case':<32}{'mean(s) 旧 → 新':>26}{'变化':>10}")
+    for result in results:
+        old = previous.get(result["case"])
+        if old is None:
+            continue
+        delta = (result["run_time_mean"] - old["run_time_mean"]) / old["run_time_mean"] * 100 \
+            if old["run_time_mean"] else 0.0
+        print(f"{result['case']:<32}{old['run_time_mean']:>12.4f} → {result['run_time_mean']:<11.4f}"
+              f"{delta:>+9.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deep Search Agent 离线基准测试")
+    parser.add_argument("--targets", type=_str_list, default=["agent"], help="agent,graph")
+    parser.add_argument("--modes", type=_str_list, default=["sequential", "parallel"], help="sequential,parallel")
+    parser.add_argument("--paragraphs", type=_int_list, default=[5, 10, 20, 50])
+    parser.add_argument("--reflections", type=_int_list, default=[0, 1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--quick", action="store_true", help="只跑 5/10 段落 × 0/2 次反思,每组 2 次")
+
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="LLM 平均延迟(秒)")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--search-latency", type=float, default=0.0, help="搜索平均延迟(秒)")
+    parser.add_argument("--search-jitter", type=float, default=0.0)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="fixed")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-duplicate-rate", type=float, default=0.0, help="搜索返回重复/镜像结果的比例")
+    parser.add_argument("--completion-chars", type=int, default=400, help="每次 LLM 输出的字符数")
+    parser.add_argument("--result-chars", type=int, default=2000, help="每条搜索结果的正文字符数")
+    parser.add_argument("--search-results", type=int, default=3)
+    parser.add_argument("--blob-store", choices=["none", "memory", "disk"], default="memory",
+                        help="搜索结果正文存储(none 表示正文留在状态中)")
+    parser.add_argument("--queries-per-step", type=int, default=1, help="每个搜索步骤并发执行的查询数")
+    parser.add_argument("--incremental-summary", action="store_true", help="启用增量总结")
+    parser.add_argument("--batch-planning", action="store_true", help="一次 LLM 调用规划所有段落的首次搜索查询")
+    parser.add_argument("--prefetch", type=int, default=0, help="顺序模式的搜索预取窗口,0 表示关闭")
+    parser.add_argument("--stream-structure", action="store_true", help="流式生成报告结构,段落闭合即开始预取")
+    parser.add_argument("--reflection-min-gain", type=float, default=0.0, help="反思提前结束阈值,0 表示关闭")
+
+    parser.add_argument("--paragraph-concurrency", type=int, default=4)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--search-concurrency", type=int, default=8)
+
+    parser.add_argument("--no-memory", action="store_true", help="跳过 tracemalloc 统计")
+    parser.add_argument("--verbose", action="store_true", help="显示 Agent 的进度输出")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径,默认 benchmarks/results/<时间>_<提交>.json")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 对比")
+
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.paragraphs = [5, 10]
+        args.reflections = [0, 2]
+        args.repeat = 2
+        args.warmup = 0
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    commit = _git_commit()
+
+    results = []
+    for target in args.targets:
+        for mode in args.modes:
+            for paragraphs in args.paragraphs:
+                for reflections in args.reflections:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        case = BenchCase(args, target, mode, paragraphs, reflections)
+                    result = run_case(case, args.repeat, args.warmup, memory=not args.no_memory,
+                                      verbose=args.verbose)
+                    results.append(result)
+                    print(f"[bench] {case.name:<32} mean {result['run_time_mean']:.4f}s  "
+                          f"p95 {result['run_time_p95']:.4f}s  "
+                          f"{result['throughput_paragraphs_per_sec']:.1f} 段落/秒")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存到: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return report
+
+
+if __name__ == "__main__":
+    main()
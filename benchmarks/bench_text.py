@@ -0,0 +1,167 @@
+"""
+LLM 输出清理函数的微基准测试
+
+用法(在项目根目录):
+    python -m benchmarks.bench_text
+    python -m benchmarks.bench_text --sizes 100,500,1000 --repeat 5
+    python -m benchmarks.bench_text --compare benchmarks/results/上次结果.json
+
+对 100KB~1MB 的几类典型输出(无括号的长报告、带大量"分析:"标记的长文本、推理前缀 + 大 JSON、
+带代码块围栏的 Markdown)分别计时 clean_json_tags / clean_markdown_tags /
+remove_reasoning_from_output / extract_clean_response,报告每 KB 耗时;
+各尺寸下每 KB 耗时基本不变即说明耗时随输入线性增长。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .bench_research import _git_commit, _int_list
+from src.utils.metrics import percentile
+from src.utils.text_processing import (
+    clean_json_tags,
+    clean_markdown_tags,
+    remove_reasoning_from_output,
+    extract_clean_response,
+)
+
+FUNCTIONS: Dict[str, Callable[[str], Any]] = {
+    "clean_json_tags": clean_json_tags,
+    "clean_markdown_tags": clean_markdown_tags,
+    "remove_reasoning_from_output": remove_reasoning_from_output,
+    "extract_clean_response": extract_clean_response,
+}
+
+
+def _repeat_to(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def _prose(size: int) -> str:
+    """不含任何括号的长报告"""
+    return _repeat_to("## 市场概况\n智能手表市场在过去五年保持稳定增长，主要厂商持续推出健康监测功能。\n\n", size)
+
+
+def _labelled(size: int) -> str:
+    """大量"分析:"/"说明:"标记且不含括号的长文本"""
+    return _repeat_to("分析：用户需求集中在续航与健康监测。说明：数据来自公开报告。\n", size)
+
+
+def _json_with_reasoning(size: int) -> str:
+    """推理前缀 + 代码块中的大 JSON(字符串里包含括号与转义引号)"""
+    item = {"title": "段落 {1}", "content": "竞品 [A] 的 \"旗舰\" 型号", "sources": ["S1", "S2"]}
+    count = max(1, size // len(json.dumps(item, ensure_ascii=False)))
+    body = json.dumps({"paragraphs": [item] * count}, ensure_ascii=False)
+    return f"推理：先梳理报告结构。\n```json\n{body}\n```\n以上为输出。"
+
+
+def _markdown_report(size: int) -> str:
+    """带代码块围栏的 Markdown 报告"""
+    return "```markdown\n" + _repeat_to("### 小节\n正文内容，引用 [S1]。\n```python\nprint(1)\n```\n", size) + "\n```"
+
+
+SHAPES: Dict[str, Callable[[int], str]] = {
+    "prose": _prose,
+    "labelled": _labelled,
+    "json": _json_with_reasoning,
+    "markdown": _markdown_report,
+}
+
+
+def _time(fn: Callable[[str], Any], text: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(text)
+        times.append(time.perf_counter() - start)
+    return percentile(times, 50)
+
+
+def run_benchmark(sizes_kb: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for shape, build in SHAPES.items():
+        for size_kb in sizes_kb:
+            text = build(size_kb * 1024)
+            for name, fn in FUNCTIONS.items():
+                seconds = _time(fn, text, repeat)
+                results.append({
+                    "case": f"{name}/{shape}/{size_kb}KB",
+                    "function": name,
+                    "shape": shape,
+                    "size_kb": size_kb,
+                    "time_ms_p50": seconds * 1000,
+                    "us_per_kb": seconds * 1e6 / size_kb,
+                })
+    return results
+
+
+def compare(previous_path: str, results: List[Dict[str, Any]]) -> None:
+    """与之前的结果文件逐组对比耗时中位数"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = {r["case"]: r for r in json.load(f)["results"]}
+
+    print(f"\n与 {previous_path} 对比:")
+    print(f"{'case':<48}{'p50(ms) 旧 → 新':>26}{'变化':>10}")
+    for result in results:
+        old = previous.get(result["case"])
+        if old is None:
+            continue
+        delta = (result["time_ms_p50"] - old["time_ms_p50"]) / old["time_ms_p50"] * 100 \
+            if old["time_ms_p50"] else 0.0
+        print(f"{result['case']:<48}{old['time_ms_p50']:>12.2f} → {result['time_ms_p50']:<11.2f}"
+              f"{delta:>+9.1f}%")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="LLM 输出清理函数微基准测试")
+    parser.add_argument("--sizes", type=_int_list, default=[100, 250, 500, 1000], help="输入大小(KB)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="结果 JSON 路径,默认 benchmarks/results/text_<时间>_<提交>.json")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 对比")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    commit = _git_commit()
+
+    results = run_benchmark(args.sizes, args.repeat)
+    print(f"{'function':<30}{'shape':<10}" + "".join(f"{f'{s}KB':>12}" for s in args.sizes) + f"{'us/KB':>10}")
+    for name in FUNCTIONS:
+        for shape in SHAPES:
+            row = [r for r in results if r["function"] == name and r["shape"] == shape]
+            print(f"{name:<30}{shape:<10}" + "".join(f"{r['time_ms_p50']:>10.2f}ms" for r in row)
+                  + f"{row[-1]['us_per_kb']:>10.2f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"text_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存到: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return report
+
+
+if __name__ == "__main__":
+    main()
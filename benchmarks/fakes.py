@@ -0,0 +1,252 @@
+"""
+基准测试用的本地替身
+FakeLLM 替代 OpenAILLM,FakeTavilySearch 替代 TavilySearch;延迟分布、输出大小与失败率均可配置,
+相同的种子产生相同的输出
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional, Sequence, Tuple
+
+from src.llms.base import BaseLLM, items_at_path
+from src.tools.search import SearchResult, get_client_pool
+from src.utils.limiter import RateLimiter
+from src.utils.metrics import record_llm_call
+
+
+@dataclass
+class LatencyModel:
+    """
+    延迟分布
+
+    Args:
+        mean: 平均延迟(秒)
+        jitter: fixed 时忽略;uniform 时为 [mean-jitter, mean+jitter];lognormal 时为 sigma
+        distribution: fixed / uniform / lognormal
+    """
+    mean: float = 0.0
+    jitter: float = 0.0
+    distribution: str = "fixed"
+
+    def sample(self, rng: random.Random) -> float:
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.mean - self.jitter, self.mean + self.jitter))
+        if self.distribution == "lognormal":
+            # 以 mean 为中位数的对数正态分布,模拟长尾延迟
+            return rng.lognormvariate(0.0, self.jitter) * self.mean
+        return self.mean
+
+
+class FakeAPIError(Exception):
+    """模拟上游返回的 HTTP 错误,限流器通过 status_code 判断是否重试"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"fake upstream error {status_code}")
+        self.status_code = status_code
+
+
+class _FakeUpstream:
+    """线程安全的随机数、延迟与故障注入"""
+
+    def __init__(self, latency: LatencyModel, failure_rate: float, failure_status: int, seed: int):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def roll(self) -> float:
+        """返回本次调用的延迟;按失败率抛出 FakeAPIError"""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency.sample(self._rng)
+            failed = self._rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        if failed:
+            raise FakeAPIError(self.failure_status)
+        return delay
+
+    def randint(self, a: int, b: int) -> int:
+        with self._lock:
+            return self._rng.randint(a, b)
+
+
+class FakeLLM(BaseLLM):
+    """
+    确定性的 LLM 替身
+
+    按 json_schema 生成结构相同的输出;生成报告结构时返回 paragraphs 个段落。
+    传入 limiter 时与 OpenAILLM 一样经过限流与重试。
+    """
+
+    def __init__(self, paragraphs: int = 5, latency: Optional[LatencyModel] = None,
+                 completion_chars: int = 400, failure_rate: float = 0.0, failure_status: int = 429,
+                 seed: int = 0, limiter: Optional[RateLimiter] = None):
+        super().__init__("fake", "fake-llm")
+        self.paragraphs = paragraphs
+        self.completion_chars = completion_chars
+        self.limiter = limiter
+        self.upstream = _FakeUpstream(latency or LatencyModel(), failure_rate, failure_status, seed)
+
+    def _text(self, prefix: str) -> str:
+        filler = "基准测试生成的文本。"
+        return (prefix + filler * (self.completion_chars // len(filler) + 1))[:self.completion_chars]
+
+    def _value(self, schema: Dict[str, Any], name: str, serial: int) -> Any:
+        """按 JSON Schema 生成确定性的值"""
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            return {key: self._value(sub, key, serial) for key, sub in schema.get("properties", {}).items()}
+        if schema_type == "array":
+            # 报告结构与批量查询规划按段落数生成
+            count = self.paragraphs if name in ("paragraphs", "queries") else 3
+            return [self._value(schema.get("items", {}), f"{name}_{i}", serial) for i in range(count)]
+        if schema_type in ("number", "integer"):
+            return 1
+        if schema_type == "boolean":
+            return False
+        if "query" in name or "queries" in name:
+            # 查询需要互不相同,避免被搜索缓存或去重合并
+            return f"{name} {serial}"
+        return self._text(f"{name}-{serial}:")
+
+    def _complete(self, messages: List[Dict[str, str]], json_schema: Optional[Dict]) -> Any:
+        start = time.perf_counter()
+        time.sleep(self.upstream.roll())
+        serial = self.upstream.calls
+        result = self._value(json_schema, "root", serial) if json_schema else self._text(f"report-{serial}:")
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 2
+        record_llm_call(time.perf_counter() - start, prompt_tokens, self.completion_chars // 2)
+        return result
+
+    def chat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Any:
+        if self.limiter:
+            return self.limiter.call(self._complete, messages, json_schema)
+        return self._complete(messages, json_schema)
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        text = self.chat(messages, **kwargs)
+        for i in range(0, len(text), 32):
+            yield text[i:i + 32]
+
+    def stream_structured(self, messages: List[Dict[str, str]], json_schema: Dict, item_path: Sequence[str],
+                          **kwargs) -> Iterator[Tuple[str, Any]]:
+        """延迟均摊到各数组元素上,模拟流式输出中元素陆续闭合;失败与重试只发生在建立连接时"""
+        start = time.perf_counter()
+        delay = self.limiter.call(self.upstream.roll) if self.limiter else self.upstream.roll()
+        result = self._value(json_schema, "root", self.upstream.calls)
+        items = items_at_path(result, item_path)
+        step = delay / (len(items) + 1)
+        for item in items:
+            time.sleep(step)
+            yield "item", item
+        time.sleep(step)
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 2
+        record_llm_call(time.perf_counter() - start, prompt_tokens, self.completion_chars // 2)
+        yield "result", result
+
+    async def achat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Any:
+        return await asyncio.to_thread(self.chat, messages, json_schema, **kwargs)
+
+    async def astream_chat(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        for chunk in await asyncio.to_thread(lambda: list(self.stream_chat(messages, **kwargs))):
+            yield chunk
+
+    def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        return self.chat([{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}])
+
+    def get_default_model(self) -> str:
+        return "fake-llm"
+
+    def get_model_info(self) -> str:
+        return "FakeLLM"
+
+
+# 生成正文用的词表,不同结果的正文互不相似
+_WORDS = ["人工智能", "市场规模", "增长", "模型", "数据", "企业", "应用", "技术", "投资", "政策",
+          "用户", "平台", "研究", "报告", "趋势", "竞争", "成本", "效率", "行业", "创新"]
+
+
+class FakeTavilySearch:
+    """
+    确定性的 Tavily 替身,接口与 TavilySearch.search / asearch 相同
+
+    失败时与 TavilySearch 一样在限流器内抛出,重试耗尽后返回空列表。
+    duplicate_rate 控制返回此前出现过的结果(同 URL 或镜像正文)的比例,用于测试去重。
+    """
+
+    def __init__(self, latency: Optional[LatencyModel] = None, content_chars: int = 2000,
+                 failure_rate: float = 0.0, failure_status: int = 429, duplicate_rate: float = 0.0,
+                 seed: int = 0):
+        self.content_chars = content_chars
+        self.duplicate_rate = duplicate_rate
+        self.upstream = _FakeUpstream(latency or LatencyModel(), failure_rate, failure_status, seed)
+        self._seen: List[SearchResult] = []
+
+    def _content(self, rng: random.Random, query: str) -> str:
+        parts = [query, "。"]
+        length = len(query) + 1
+        while length < self.content_chars:
+            sentence = "".join(rng.choice(_WORDS) for _ in range(8)) + "。"
+            parts.append(sentence)
+            length += len(sentence)
+        return "".join(parts)[:self.content_chars]
+
+    def _results(self, query: str, max_results: int, include_raw_content: bool) -> List[SearchResult]:
+        rng = random.Random(f"{query}|{self.upstream.randint(0, 10 ** 9)}")
+        results = []
+        for i in range(max_results):
+            if self._seen and rng.random() < self.duplicate_rate:
+                original = rng.choice(self._seen)
+                # 一半返回同一 URL,一半返回正文几乎相同的镜像站
+                if rng.random() < 0.5:
+                    results.append(original)
+                else:
+                    results.append(SearchResult(
+                        title=original.title,
+                        url=f"https://mirror.example.org/{rng.randint(0, 10 ** 6)}",
+                        content=original.content[:-10] + "(转载)",
+                        score=original.score
+                    ))
+                continue
+            result = SearchResult(
+                title=f"{query} #{i}",
+                url=f"https://bench.example.com/{rng.randint(0, 10 ** 9)}/{i}",
+                content=self._content(rng, query),
+                score=1.0 / (i + 1)
+            )
+            results.append(result)
+        with self.upstream._lock:
+            self._seen.extend(r for r in results if r.url.startswith("https://bench."))
+        return results
+
+    def _post(self, query: str, max_results: int, include_raw_content: bool) -> List[SearchResult]:
+        time.sleep(self.upstream.roll())
+        return self._results(query, max_results, include_raw_content)
+
+    def search(self, query: str, max_results: int = 5, include_raw_content: bool = True,
+               timeout: int = 240, limiter: Optional[RateLimiter] = None) -> List[SearchResult]:
+        try:
+            if limiter:
+                return limiter.call(self._post, query, max_results, include_raw_content)
+            return self._post(query, max_results, include_raw_content)
+        except Exception as e:
+            print(f"搜索错误: {str(e)}")
+            return []
+
+    async def asearch(self, query: str, max_results: int = 5, include_raw_content: bool = True,
+                      timeout: int = 240, limiter: Optional[RateLimiter] = None) -> List[SearchResult]:
+        return await asyncio.to_thread(self.search, query, max_results, include_raw_content, timeout, limiter)
+
+
+def install_fake_search(api_key: str, search: FakeTavilySearch) -> None:
+    """把替身注册到 Tavily 客户端池,使用该 api_key 的 tavily_search 调用都会落到替身上"""
+    get_client_pool().put(api_key, search)
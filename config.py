@@ -19,7 +19,55 @@ DEEPSEEK_MODEL = "deepseek-ai/DeepSeek-V3"
 OPENAI_MODEL = "deepseek-ai/DeepSeek-V3"
 
 MAX_REFLECTIONS = 2
+REFLECTION_MIN_GAIN = 0  # 反思带来的新信息低于该值(0~1)时提前结束,0 表示总是跑满
 SEARCH_RESULTS_PER_QUERY = 3
 SEARCH_CONTENT_MAX_LENGTH = 20000
+SEARCH_CONTEXT_MAX_TOKENS = 8000  # 每次总结时所有搜索结果共享的 token 预算
+SEARCH_DEDUP = "paragraph"  # 搜索结果去重范围: none / paragraph / run
+SEARCH_QUERIES_PER_STEP = 1  # 每个搜索步骤并发执行的查询数(>1 时结果按倒数排名融合)
+INCREMENTAL_SUMMARY = False  # 反思总结只发送新增搜索结果,并维护带来源编号的证据清单
 OUTPUT_DIR = "reports"
 # SAVE_INTERMEDIATE_STATES = True
+
+# 搜索结果缓存: none / memory / sqlite / tiered
+SEARCH_CACHE_BACKEND = "memory"
+SEARCH_CACHE_TTL = 86400
+
+# LLM 响应缓存: none / memory / sqlite / tiered
+# 各节点均以默认 temperature(0.7)调用,只有 LLM_CACHE_FORCE = True 时才会命中;
+# LLM_CACHE_NODES 为逗号分隔的节点名(如 "generate_structure,plan_queries"),为空表示所有节点
+LLM_CACHE_BACKEND = "none"
+LLM_CACHE_FORCE = False
+LLM_CACHE_NODES = ""
+
+# 搜索结果正文存储: none / memory / disk(启用检查点时 memory 自动改用 disk)
+SEARCH_BLOB_STORE = "memory"
+# disk 存储的目录大小上限(MB)与保留时间(秒),超出时按最近访问时间清理;0 表示不限制
+SEARCH_BLOB_MAX_MB = 512
+SEARCH_BLOB_TTL = 604800
+
+# 段落并行研究(每个段落独立分支并发执行)
+PARALLEL_PARAGRAPHS = False
+MAX_PARAGRAPH_CONCURRENCY = 4
+# 结构生成后用一次 LLM 调用为所有段落规划首次搜索查询
+BATCH_QUERY_PLANNING = False
+# 顺序模式下,在当前段落总结/反思期间预取后续段落的初始搜索(0 表示关闭)
+SEARCH_PREFETCH_LOOKAHEAD = 0
+# 流式生成报告结构,每个段落生成完即推送进度;配合 SEARCH_PREFETCH_LOOKAHEAD 提前开始其初始搜索(批量规划查询时不预取)
+STREAM_STRUCTURE = False
+
+
+# 限流(0 表示不限制);遇到 429 时自动降低并发并按 Retry-After 退避重试
+LLM_REQUESTS_PER_MINUTE = 0
+LLM_TOKENS_PER_MINUTE = 0
+SEARCH_REQUESTS_PER_MINUTE = 0
+
+# HTTP 服务(python server.py): 同时运行的研究任务数与排队上限
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8000
+SERVICE_MAX_WORKERS = 2
+SERVICE_MAX_QUEUE = 16
+
+# 运行指标导出: none / jsonl / prometheus
+METRICS_EXPORT = "none"
+METRICS_PATH = "reports/metrics.jsonl"
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+研究服务入口
+启动本地 HTTP 服务:POST /jobs 提交研究,GET /jobs/{id}/events 以 SSE 接收实时进度
+"""
+import argparse
+import os
+import sys
+
+# 将项目根目录加入 sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
+
+from src import DeepSearchAgent
+from src.service import serve
+from src.utils.config import load_config, print_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="产品创新智能体 HTTP 研究服务")
+    parser.add_argument("--config", default=None, help="配置文件路径(默认自动查找 config.py / .env)")
+    parser.add_argument("--host", default=None, help="监听地址,默认使用配置 SERVICE_HOST")
+    parser.add_argument("--port", type=int, default=None, help="监听端口,默认使用配置 SERVICE_PORT")
+    parser.add_argument("--workers", type=int, default=None, help="同时运行的研究任务数")
+    parser.add_argument("--max-queue", type=int, default=None, help="排队任务上限")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.workers is not None:
+        config.service_max_workers = args.workers
+    if args.max_queue is not None:
+        config.service_max_queue = args.max_queue
+    print_config(config)
+
+    agent = DeepSearchAgent(config)
+    serve(agent, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,30 @@
-
-from .agent import DeepSearchAgent, create_agent
-from .utils.config import Config, load_config
+"""
+Deep Search Agent
+导出按需加载:import src 不会立即导入 openai / langgraph 等较重的依赖
+"""
+import importlib
 
 __version__ = "1.0.0"
 __author__ = "Deep Search Agent Team"
 
+# 导出名 → 所在子模块
+_LAZY_EXPORTS = {
+    "DeepSearchAgent": ".agent",
+    "create_agent": ".agent",
+    "Config": ".utils.config",
+    "load_config": ".utils.config",
+}
+
 __all__ = ["DeepSearchAgent", "create_agent", "Config", "load_config"]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
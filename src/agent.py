@@ -5,13 +5,24 @@ Deep Search Agent主类 - LangGraph版本
 
 import json
 import os
+import uuid
 from datetime import datetime
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Generator, AsyncGenerator, Iterable, Tuple, TYPE_CHECKING
 
-from .llms import OpenAILLM, BaseLLM
-from .graph import create_research_graph, AgentState
+from .llms.base import BaseLLM
+from .llms.response_cache import LLMResponseCache
+from .graph.state import AgentState
 from .utils import Config, load_config
+from .utils.cache import BaseCache, create_cache
+from .utils.limiter import AdaptiveConcurrencyLimiter, RateLimiter
+from .utils.metrics import RunMetrics, export_metrics
+from .utils.dedup import DedupIndex
+from .utils.blob_store import BaseBlobStore, create_blob_store
+
+if TYPE_CHECKING:
+    from .graph.nodes.prefetch import SearchPrefetcher
 
 
 class DeepSearchAgent:
@@ -27,11 +38,31 @@ class DeepSearchAgent:
         # 加载配置
         self.config = config or load_config()
 
+        # 初始化LLM响应缓存(同步与异步客户端共享)
+        self.llm_cache = self._initialize_llm_cache()
+
+        # 全局限流器(同一 Agent 上的所有研究任务共享)
+        self.llm_limiter, self.search_limiter = self._initialize_limiters()
+
         # 初始化LLM客户端
         self.llm_client = self._initialize_llm()
 
-        # 创建LangGraph图
-        self.graph = create_research_graph()
+        # 初始化搜索结果缓存
+        self.search_cache = self._initialize_search_cache()
+
+        # 初始化检查点存储(未启用时为 None)
+        self.checkpointer = self._initialize_checkpointer()
+
+        # 磁盘正文存储在 Agent 内共享,首次使用时创建
+        self._disk_blob_store: Optional[BaseBlobStore] = None
+        self.last_thread_id: Optional[str] = None
+
+        # LangGraph图在首次使用时创建(见 graph 属性)
+        self._graph = None
+
+        # 异步图与异步LLM客户端在首次调用 aresearch 时创建
+        self.async_graph = None
+        self.async_llm_client = None
 
         # 确保输出目录存在
         os.makedirs(self.config.output_dir, exist_ok=True)
@@ -39,6 +70,18 @@ class DeepSearchAgent:
         print(f"Deep Search Agent 已初始化 (LangGraph版本)")
         print(f"使用LLM: {self.llm_client.get_model_info()}")
 
+    @property
+    def graph(self):
+        """研究工作流图,首次访问时创建;无检查点时同一进程内相同选项的图只编译一次"""
+        if self._graph is None:
+            from .graph import create_research_graph
+            self._graph = create_research_graph(
+                parallel=self.config.parallel_paragraphs,
+                checkpointer=self.checkpointer,
+                batch_planning=self.config.batch_query_planning
+            )
+        return self._graph
+
     def _initialize_llm(self) -> BaseLLM:
         """初始化LLM客户端"""
         
@@ -48,19 +91,246 @@ class DeepSearchAgent:
         return OpenAILLM(  
             api_key=self.config.openai_api_key,  # 使用您的硅基流动 API Key  
             model_name=self.config.openai_model,  # 使用硅基流动支持的模型名称  
-            base_url="https://api.siliconflow.cn/v1"  # 硅基流动的 API 端点  
+            base_url="https://api.siliconflow.cn/v1",  # 硅基流动的 API 端点
+            response_cache=self.llm_cache,
+            limiter=self.llm_limiter
+        )
+
+    def _initialize_checkpointer(self):
+        """初始化 SQLite 检查点存储,无需外部服务"""
+        if not self.config.checkpoint_enabled:
+            return None
+
+        import sqlite3
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        directory = os.path.dirname(self.config.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.config.checkpoint_path, check_same_thread=False)
+        return SqliteSaver(conn)
+
+    def _initialize_llm_cache(self) -> Optional[LLMResponseCache]:
+        """初始化LLM响应缓存,未启用时返回 None"""
+        cache = create_cache(
+            self.config.llm_cache_backend,
+            path=self.config.llm_cache_path,
+            max_entries=self.config.llm_cache_max_entries,
+            default_ttl=self.config.llm_cache_ttl,
+            table="llm_cache"
+        )
+        if cache is None:
+            return None
+
+        if not self.config.llm_cache_force:
+            # 各节点都以默认 temperature(> 0)调用,不强制缓存时不会有任何调用命中
+            print("警告: 已启用 LLM 响应缓存,但节点均以 temperature > 0 调用;"
+                  "需同时设置 LLM_CACHE_FORCE = True 才会缓存")
+
+        nodes = [n.strip() for n in self.config.llm_cache_nodes.split(",") if n.strip()]
+        return LLMResponseCache(cache, enabled_nodes=nodes or None, force=self.config.llm_cache_force)
+
+    def _initialize_search_cache(self) -> Optional[BaseCache]:
+        """初始化搜索结果缓存"""
+        return create_cache(
+            self.config.search_cache_backend,
+            path=self.config.search_cache_path,
+            max_entries=self.config.search_cache_max_entries,
+            default_ttl=self.config.search_cache_ttl,
+            table="search_cache"
+        )
+
+    def _initialize_limiters(self) -> Tuple[RateLimiter, RateLimiter]:
+        """初始化 LLM 与搜索的限流器: RPM/TPM 令牌桶 + AIMD 自适应并发 + 429 退避重试"""
+        llm_limiter = RateLimiter(
+            concurrency=AdaptiveConcurrencyLimiter(
+                self.config.llm_max_concurrency,
+                target_latency=self.config.llm_target_latency,
+                name="llm"
+            ),
+            requests_per_minute=self.config.llm_requests_per_minute,
+            tokens_per_minute=self.config.llm_tokens_per_minute,
+            max_retries=self.config.rate_limit_max_retries,
+            name="llm"
+        )
+        search_limiter = RateLimiter(
+            concurrency=AdaptiveConcurrencyLimiter(self.config.search_max_concurrency, name="search"),
+            requests_per_minute=self.config.search_requests_per_minute,
+            max_retries=self.config.rate_limit_max_retries,
+            name="search"
+        )
+        return llm_limiter, search_limiter
+
+    def _initialize_async_llm(self) -> BaseLLM:
+        """初始化异步LLM客户端(共享连接池)"""
+
+        from .llms.async_openai_llm import AsyncOpenAILLM
+
+        return AsyncOpenAILLM(
+            api_key=self.config.openai_api_key,
+            model_name=self.config.openai_model,
+            base_url="https://api.siliconflow.cn/v1",
+            max_connections=self.config.llm_max_connections,
+            max_keepalive_connections=self.config.llm_max_keepalive_connections,
+            keepalive_expiry=self.config.llm_keepalive_expiry,
+            response_cache=self.llm_cache,
+            limiter=self.llm_limiter
         )
 
+    def _build_initial_state(self, query: str) -> AgentState:
+        """构建图的初始状态"""
+        return {
+            "query": query,
+            "report_title": "",
+            "paragraphs": [],
+            "current_paragraph_index": 0,
+            "reflection_count": 0,
+            "max_reflections": self.config.max_reflections,
+            "final_report": None,
+            "completed": False,
+        }
+
+    def _build_run_config(
+        self,
+        llm_client: BaseLLM,
+        stream_config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """构建默认运行配置,并合并外部透传的配置"""
+        config = {
+            "configurable": {
+                "llm_client": llm_client,
+                "tavily_api_key": self.config.tavily_api_key,
+                "max_search_results": self.config.max_search_results,
+                "search_queries_per_step": self.config.search_queries_per_step,
+                "search_cache": self.search_cache,
+                "search_limiter": self.search_limiter,
+                "search_timeout": self.config.search_timeout,
+                "max_content_length": self.config.max_content_length,
+                "max_context_tokens": self.config.max_context_tokens,
+                # 每次运行独立的搜索结果去重索引
+                "dedup_index": self._create_dedup_index(),
+                "dedup_scope": self.config.search_dedup,
+                "incremental_summary": self.config.incremental_summary,
+                "reflection_min_gain": self.config.reflection_min_gain,
+                "blob_store": self._create_blob_store(),
+                # 每次运行独立的搜索预取器(仅顺序模式)
+                "search_prefetcher": self._create_prefetcher(),
+                "stream_structure": self.config.stream_structure,
+                "batch_query_planning": self.config.batch_query_planning,
+                "max_reflections": self.config.max_reflections,
+                # 每次运行独立的指标收集器
+                "metrics": RunMetrics(
+                    prompt_price_per_1k=self.config.llm_prompt_price_per_1k,
+                    completion_price_per_1k=self.config.llm_completion_price_per_1k
+                ),
+            },
+            "recursion_limit": 100,          # 防死循环兜底
+            "debug": False,                  # 默认关闭调试日志
+        }
+        if self.config.parallel_paragraphs:
+            config["max_concurrency"] = self.config.max_paragraph_concurrency
+        if stream_config:
+            config.update(stream_config)
+        return config
+
+    def _create_blob_store(self) -> Optional[BaseBlobStore]:
+        """
+        创建搜索结果正文存储
 
-    from typing import Generator, Dict, Any, Optional   # 引入生成器类型提示
-    import time
+        memory 每次运行独立,运行结束即释放;disk 在 Agent 内共享。
+        启用检查点时 memory 改用 disk,保证从中断处恢复后仍能读到之前的正文
+        """
+        backend = self.config.search_blob_store
+        if backend == "memory" and self.checkpointer is not None:
+            backend = "disk"
+        if backend != "disk":
+            return create_blob_store(backend)
+        if self._disk_blob_store is None:
+            self._disk_blob_store = create_blob_store("disk", self.config.search_blob_path,
+                                                      max_mb=self.config.search_blob_max_mb,
+                                                      ttl=self.config.search_blob_ttl)
+        return self._disk_blob_store
+
+    def _create_prefetcher(self) -> Optional["SearchPrefetcher"]:
+        """创建单次运行的搜索预取器;并行模式下各段落本就并发执行,不需要预取"""
+        if self.config.parallel_paragraphs or self.config.search_prefetch_lookahead <= 0:
+            return None
+        from .graph.nodes.prefetch import SearchPrefetcher
+        return SearchPrefetcher(lookahead=self.config.search_prefetch_lookahead)
+
+    @staticmethod
+    def _close_prefetcher(config: Dict[str, Any]) -> None:
+        prefetcher = config["configurable"].get("search_prefetcher")
+        if prefetcher is not None:
+            prefetcher.close()
+
+    def _create_dedup_index(self) -> Optional[DedupIndex]:
+        """创建单次运行的去重索引,search_dedup 为 none 时不去重"""
+        if self.config.search_dedup == "none":
+            return None
+        return DedupIndex(threshold=self.config.search_dedup_threshold)
+
+    @staticmethod
+    def _to_event(mode: str, chunk: Dict[str, Any], metrics: Optional[RunMetrics] = None) -> Dict[str, Any]:
+        """把 graph.stream 的输出转换为对外的进度事件,并附加该节点的运行指标"""
+        # custom: 段落分支内的进度事件(已带指标)与报告片段,已是事件格式
+        if mode == "custom":
+            return chunk
+
+        node_name = next(iter(chunk))   # 更安全地取键
+        node_output = chunk[node_name]
+
+        event = {"node": node_name, "state": node_output}
+        if node_name == "research_paragraph" and node_output:
+            event["paragraph_index"] = next(iter(node_output["paragraphs"]))
+
+        record = metrics.pop(node_name, event.get("paragraph_index")) if metrics else None
+        if record is not None:
+            event["metrics"] = record.to_dict()
+        return event
+
+    def _finish(self, final_state: Optional[Dict[str, Any]], query: str, save_report: bool,
+                start_time: float, metrics: Optional[RunMetrics] = None) -> Dict[str, Any]:
+        """校验最终状态、保存报告并生成完成事件"""
+        if not final_state:
+            raise RuntimeError("工作流未产生任何状态")
+
+        final_report = final_state.get("final_report")
+        if not final_report:
+            raise RuntimeError("最终报告为空，可能图未正确填充 final_report 字段")
+
+        if save_report:
+            self._save_report(final_report, query)
+
+        end_time = time.time()
+        run_time = end_time - start_time
+        print("\n深度研究完成！")
+        print(f"总用时: {run_time:.2f} 秒")
+        completed = {"node": "completed", "report": final_report, "run_time": run_time}
+
+        if metrics is not None:
+            completed["metrics"] = summary = metrics.summary()
+            totals = summary["totals"]
+            print(f"LLM 调用 {totals['llm_calls']} 次, token {totals['total_tokens']}, "
+                  f"搜索 {totals['search_calls']} 次")
+            if totals["reflection_skipped_rounds"]:
+                print(f"提前结束反思 {totals['reflection_skipped_rounds']} 轮, "
+                      f"节省 LLM 调用约 {totals['reflection_saved_llm_calls']} 次、"
+                      f"搜索 {totals['reflection_saved_searches']} 次")
+            if self.config.metrics_export != "none":
+                try:
+                    export_metrics(summary, self.config.metrics_export, self.config.metrics_path, query)
+                except Exception as e:
+                    print(f"指标导出失败: {e}")
+        return completed
 
     def research(
         self,
         query: str,
         save_report: bool = True,
         *,
-        stream_config: Optional[Dict[str, Any]] = None
+        stream_config: Optional[Dict[str, Any]] = None,
+        thread_id: Optional[str] = None
     ) -> Generator[Dict[str, Any], None, None]:
         """
         执行深度研究，以生成器方式实时返回节点进度与最终报告。
@@ -69,75 +339,250 @@ class DeepSearchAgent:
             query: 研究问题
             save_report: 是否保存报告
             stream_config: 透传给 graph.stream 的额外配置（如 debug、recursion_limit）
+            thread_id: 检查点线程ID（启用检查点时有效，不提供则自动生成），可用于 resume
 
         Yields:
-            {"node": 节点名, "state": 当前状态快照}
-            最后一条为 {"node": "completed", "report": 最终报告}
+            {"node": 节点名, "state": 当前状态快照, "metrics": 该节点的耗时/token/搜索指标}
+            启用正文存储时(search_blob_store 默认 memory),状态快照中搜索历史的结果不含 content,
+            而是 content_ref(正文引用)与 content_chars(正文长度);需要事件中带正文时把
+            search_blob_store 设为 none(disk 存储的正文也可用 utils.blob_store.load_results 补回)
+            并行模式下段落分支内的事件额外带有 "paragraph_index"
+            生成最终报告时逐段返回 {"node": "report_chunk", "chunk": 文本片段}
+            最后一条为 {"node": "completed", "report": 最终报告, "metrics": 按节点汇总的运行指标}
         """
+        return self._research(query, save_report, stream_config, thread_id or uuid.uuid4().hex)
+
+    def _research(
+        self,
+        query: str,
+        save_report: bool,
+        stream_config: Optional[Dict[str, Any]],
+        thread_id: str,
+        remember_thread: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """research 的实现;remember_thread 为 False 时不改写 last_thread_id(批量并发运行时使用)"""
         start_time = time.time()
         print(f"\n{'='*60}\n开始深度研究: {query}\n{'='*60}")
 
         try:
             # 1. 初始状态
-            initial_state: AgentState = {
-                "query": query,
-                "report_title": "",
-                "paragraphs": [],
-                "current_paragraph_index": 0,
-                "reflection_count": 0,
-                "max_reflections": self.config.max_reflections,
-                "final_report": None,
-                "completed": False,
-            }
+            initial_state = self._build_initial_state(query)
 
             # 2. 默认配置 & 支持外部透传
-            config = {
-                "configurable": {
-                    "llm_client": self.llm_client,
-                    "tavily_api_key": self.config.tavily_api_key,
-                    "max_search_results": self.config.max_search_results,
-                    "search_timeout": self.config.search_timeout,
-                    "max_content_length": self.config.max_content_length,
-                    "max_reflections": self.config.max_reflections,
-                },
-                "recursion_limit": 100,          # 防死循环兜底
-                "debug": False,                  # 默认关闭调试日志
-            }
-            if stream_config:
-                config.update(stream_config)
-
-            # 3. 流式执行
-            print("\n执行研究工作流...")
-            final_state = None
-            for chunk in self.graph.stream(initial_state, config):
-                node_name = next(iter(chunk))   # 更安全地取键
-                node_output = chunk[node_name]
-                final_state = node_output
+            config = self._build_run_config(self.llm_client, stream_config)
+            self._bind_thread(config, thread_id, remember=remember_thread)
+
+            # 3. 流式执行 & 4. 后处理
+            yield from self._run_graph(initial_state, config, query, save_report, start_time)
+
+        except Exception as e:
+            print(f"[research] 研究过程中发生错误: {e}")
+            raise
+
+    def resume(
+        self,
+        thread_id: str,
+        save_report: bool = True,
+        *,
+        stream_config: Optional[Dict[str, Any]] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        从检查点恢复中断的研究，从最后一个已完成的节点继续执行。
+
+        Args:
+            thread_id: research 时使用的检查点线程ID
+            save_report: 是否保存报告
+            stream_config: 透传给 graph.stream 的额外配置
 
-                yield {"node": node_name, "state": node_output}
+        Yields:
+            与 research 相同的事件
+        """
+        if self.checkpointer is None:
+            raise RuntimeError("未启用检查点，无法恢复研究；请设置 checkpoint_enabled=True")
 
-            # 4. 后处理
-            if not final_state:
-                raise RuntimeError("工作流未产生任何状态")
+        start_time = time.time()
+        config = self._build_run_config(self.llm_client, stream_config)
+        self._bind_thread(config, thread_id)
 
-            final_report = final_state.get("final_report")
-            if not final_report:
-                raise RuntimeError("最终报告为空，可能图未正确填充 final_report 字段")
+        snapshot = self.graph.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"未找到线程 {thread_id} 的检查点")
 
-            if save_report:
-                self._save_report(final_report, query)
+        query = snapshot.values["query"]
+        print(f"\n{'='*60}\n恢复深度研究: {query} (thread_id={thread_id})\n{'='*60}")
 
-            end_time = time.time()
-            run_time = end_time - start_time
-            print("\n深度研究完成！")
-            print(f"总用时: {run_time:.2f} 秒")
-            yield {"node": "completed", "report": final_report, "run_time": run_time}
+        try:
+            # 输入为 None 时 LangGraph 从最新检查点继续执行
+            yield from self._run_graph(None, config, query, save_report, start_time)
 
         except Exception as e:
-            print(f"[research] 研究过程中发生错误: {e}")
+            print(f"[resume] 恢复研究过程中发生错误: {e}")
             raise
 
-        
+    def research_many(
+        self,
+        queries: Iterable[str],
+        max_concurrency: int = 4,
+        save_report: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        并发执行多个研究查询，按完成顺序返回结果。
+
+        所有查询共享同一个 Agent 的 LLM/搜索客户端、缓存以及全局并发限制器
+        （llm_max_concurrency / search_max_concurrency），因此同时运行的查询数
+        不会放大对上游 API 的并发压力。
+
+        Args:
+            queries: 研究问题列表
+            max_concurrency: 同时运行的查询数
+            save_report: 是否保存每份报告
+
+        Yields:
+            每个查询完成时: {"node": "query_completed", "index", "query", "report",
+                            "run_time", "error", "thread_id"}
+            启用检查点时 thread_id 可用于 resume(失败的查询也可恢复),否则为 None;
+            并发运行不会改写 last_thread_id
+            最后一条: {"node": "batch_completed", "total", "succeeded", "failed",
+                      "wall_time", "throughput_per_min", "avg_run_time"}
+        """
+        queries = list(queries)
+        batch_start = time.time()
+
+        def run_one(index: int, query: str) -> Dict[str, Any]:
+            start = time.time()
+            thread_id = uuid.uuid4().hex
+            try:
+                completed = None
+                for event in self._research(query, save_report, None, thread_id, remember_thread=False):
+                    if event["node"] == "completed":
+                        completed = event
+                return {
+                    "node": "query_completed",
+                    "index": index,
+                    "query": query,
+                    "report": completed["report"],
+                    "run_time": completed["run_time"],
+                    "error": None,
+                    "thread_id": thread_id if self.checkpointer is not None else None
+                }
+            except Exception as e:
+                return {
+                    "node": "query_completed",
+                    "index": index,
+                    "query": query,
+                    "report": None,
+                    "run_time": time.time() - start,
+                    "error": str(e),
+                    "thread_id": thread_id if self.checkpointer is not None else None
+                }
+
+        run_times = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="research") as executor:
+            futures = [executor.submit(run_one, i, q) for i, q in enumerate(queries)]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["error"]:
+                    failed += 1
+                else:
+                    run_times.append(result["run_time"])
+                yield result
+
+        wall_time = time.time() - batch_start
+        succeeded = len(queries) - failed
+        yield {
+            "node": "batch_completed",
+            "total": len(queries),
+            "succeeded": succeeded,
+            "failed": failed,
+            "wall_time": wall_time,
+            "throughput_per_min": succeeded / wall_time * 60 if wall_time > 0 else 0.0,
+            "avg_run_time": sum(run_times) / len(run_times) if run_times else 0.0
+        }
+
+    def _bind_thread(self, config: Dict[str, Any], thread_id: str, remember: bool = True) -> None:
+        """启用检查点时把 thread_id 写入运行配置;remember 时记为 last_thread_id"""
+        if self.checkpointer is None:
+            return
+        config["configurable"]["thread_id"] = thread_id
+        if remember:
+            self.last_thread_id = thread_id
+        print(f"检查点线程ID: {thread_id}")
+
+    def _run_graph(
+        self,
+        graph_input: Optional[AgentState],
+        config: Dict[str, Any],
+        query: str,
+        save_report: bool,
+        start_time: float
+    ) -> Generator[Dict[str, Any], None, None]:
+        """流式执行图并在结束后生成完成事件"""
+        # updates: 节点输出; custom: 段落分支内的进度事件与报告片段
+        print("\n执行研究工作流...")
+        final_state = None
+        metrics = config["configurable"].get("metrics")
+        try:
+            for mode, chunk in self.graph.stream(graph_input, config, stream_mode=["updates", "custom"]):
+                event = self._to_event(mode, chunk, metrics)
+                if mode == "updates":
+                    final_state = event["state"]
+                yield event
+        finally:
+            self._close_prefetcher(config)
+
+        # 有检查点时以持久化的完整状态为准(恢复时图可能已执行完毕)
+        if self.checkpointer is not None:
+            final_state = self.graph.get_state(config).values
+
+        completed = self._finish(final_state, query, save_report, start_time, metrics)
+        if self.checkpointer is not None:
+            completed["thread_id"] = config["configurable"]["thread_id"]
+        yield completed
+
+    async def aresearch(
+        self,
+        query: str,
+        save_report: bool = True,
+        *,
+        stream_config: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        research 的异步版本，使用异步节点与共享连接池的 AsyncOpenAILLM。
+
+        同一事件循环内可并发运行多个 aresearch，事件格式与 research 相同。
+        异步图不写入检查点。
+        """
+        start_time = time.time()
+        print(f"\n{'='*60}\n开始深度研究(异步): {query}\n{'='*60}")
+
+        if self.async_graph is None:
+            from .graph import create_research_graph
+            self.async_graph = create_research_graph(parallel=self.config.parallel_paragraphs, use_async=True,
+                                                     batch_planning=self.config.batch_query_planning)
+            self.async_llm_client = self._initialize_async_llm()
+
+        config = None
+        try:
+            initial_state = self._build_initial_state(query)
+            config = self._build_run_config(self.async_llm_client, stream_config)
+
+            metrics = config["configurable"].get("metrics")
+            final_state = None
+            async for mode, chunk in self.async_graph.astream(initial_state, config, stream_mode=["updates", "custom"]):
+                event = self._to_event(mode, chunk, metrics)
+                if mode == "updates":
+                    final_state = event["state"]
+                yield event
+
+            yield self._finish(final_state, query, save_report, start_time, metrics)
+
+        except Exception as e:
+            print(f"[aresearch] 研究过程中发生错误: {e}")
+            raise
+        finally:
+            if config is not None:
+                self._close_prefetcher(config)
 
     def _save_report(self, report_content: str, query: str):
         """保存报告到文件"""
@@ -155,10 +600,63 @@ class DeepSearchAgent:
 
         print(f"报告已保存到: {filepath}")
 
-    def get_progress_summary(self) -> Dict[str, Any]:
-        """获取进度摘要 - LangGraph版本暂不支持"""
+    def close(self) -> None:
+        """
+        释放 Agent 持有的连接:LLM 客户端连接池、SQLite 缓存与检查点连接
+
+        调用前应确保没有正在运行的研究;异步客户端的连接池由 AsyncOpenAILLM.aclose_shared_clients 统一关闭
+        """
+        self.llm_client.close()
+        for cache in (self.llm_cache.cache if self.llm_cache else None, self.search_cache):
+            if cache is not None:
+                cache.close()
+        if self.checkpointer is not None:
+            self.checkpointer.conn.close()
+
+    def get_progress_summary(self, thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从检查点读取研究进度
+
+        Args:
+            thread_id: 检查点线程ID，默认使用最近一次 research/resume 的线程
+
+        Returns:
+            包含每个段落搜索次数、反思次数与完成情况的进度摘要
+        """
+        if self.checkpointer is None:
+            return {"message": "未启用检查点，请设置 checkpoint_enabled=True 后查询进度"}
+
+        thread_id = thread_id or self.last_thread_id
+        if not thread_id:
+            return {"message": "尚未开始任何研究"}
+
+        snapshot = self.graph.get_state({"configurable": {"thread_id": thread_id}})
+        values = snapshot.values
+        if not values:
+            return {"thread_id": thread_id, "message": "未找到该线程的检查点"}
+
+        report_completed = bool(values.get("completed"))
+        paragraphs = []
+        for idx, paragraph in enumerate(values.get("paragraphs", [])):
+            paragraphs.append({
+                "index": idx,
+                "title": paragraph["title"],
+                "searches": len(paragraph["search_history"]),
+                "reflection_count": paragraph["reflection_count"],
+                "has_summary": bool(paragraph["latest_summary"]),
+                "completed": report_completed or paragraph.get("completed", False)
+            })
+
         return {
-            "message": "LangGraph版本使用内置检查点机制,请使用LangGraph的状态查询API"
+            "thread_id": thread_id,
+            "query": values.get("query"),
+            "report_title": values.get("report_title"),
+            "total_paragraphs": len(paragraphs),
+            "completed_paragraphs": sum(1 for p in paragraphs if p["completed"]),
+            "current_paragraph_index": values.get("current_paragraph_index"),
+            "paragraphs": paragraphs,
+            "next_nodes": list(snapshot.next),
+            "completed": report_completed
         }
 
 
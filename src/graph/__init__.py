@@ -1,8 +1,19 @@
-from .state import AgentState, ParagraphState
-from .graph_builder import create_research_graph
+import importlib
+
+from .state import AgentState, ParagraphState, replace_paragraph
 
 __all__ = [
     "AgentState",
     "ParagraphState",
+    "replace_paragraph",
     "create_research_graph"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    # 图构建依赖 langgraph,首次使用时再导入
+    if name == "create_research_graph":
+        value = importlib.import_module(".graph_builder", __name__).create_research_graph
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
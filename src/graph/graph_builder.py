@@ -2,26 +2,80 @@
 LangGraph 图构建器
 定义研究工作流的状态图结构
 """
-from typing import Any, Dict, Literal
+import functools
+from typing import Any, Dict, List, Literal, Union
 from langgraph.graph import StateGraph, END
-from .state import AgentState
+from langgraph.types import RunnableConfig, Send
+from .state import AgentState, ParagraphTask, replace_paragraph
 from .nodes import (
     generate_structure,
+    plan_queries,
     initial_search,
     initial_summary,
     reflection_search,
     reflection_summary,
-    format_report
+    format_report,
+    research_paragraph,
+    agenerate_structure,
+    aplan_queries,
+    ainitial_search,
+    ainitial_summary,
+    areflection_search,
+    areflection_summary,
+    aformat_report,
+    aresearch_paragraph
 )
 
+# 节点名 → (同步实现, 异步实现)
+_NODE_FUNCTIONS = {
+    "structure": (generate_structure, agenerate_structure),
+    "plan_queries": (plan_queries, aplan_queries),
+    "search": (initial_search, ainitial_search),
+    "summary": (initial_summary, ainitial_summary),
+    "reflect": (reflection_search, areflection_search),
+    "reflect_summary": (reflection_summary, areflection_summary),
+    "research_paragraph": (research_paragraph, aresearch_paragraph),
+    "format": (format_report, aformat_report),
+}
+
+
+def _instrument(name: str, fn, use_async: bool):
+    """
+    包装节点函数,运行配置中提供 metrics(RunMetrics)时记录节点耗时、token 与搜索指标
+    """
+    if use_async:
+        @functools.wraps(fn)
+        async def async_node(state, config: RunnableConfig):
+            metrics = config["configurable"].get("metrics")
+            if metrics is None:
+                return await fn(state, config)
+            with metrics.track(name, state.get("paragraph_index")):
+                return await fn(state, config)
+        return async_node
+
+    @functools.wraps(fn)
+    def node(state, config: RunnableConfig):
+        metrics = config["configurable"].get("metrics")
+        if metrics is None:
+            return fn(state, config)
+        with metrics.track(name, state.get("paragraph_index")):
+            return fn(state, config)
+    return node
+
+
+def _node(name: str, use_async: bool):
+    """按运行模式选择节点实现"""
+    sync_fn, async_fn = _NODE_FUNCTIONS[name]
+    return _instrument(name, async_fn if use_async else sync_fn, use_async)
+
 
 def should_reflect(state: AgentState) -> Literal["reflect", "next_paragraph", "format"]:
 
     current_idx = state["current_paragraph_index"]
     current_paragraph = state["paragraphs"][current_idx]
 
-    # 检查是否达到最大反思次数
-    if current_paragraph["reflection_count"] < state["max_reflections"]:
+    # 检查是否达到最大反思次数(上一轮反思收益过低时提前结束)
+    if check_reflection_complete(state) == "continue":
         return "reflect"
 
         # 标记当前段落完成
@@ -39,58 +93,142 @@ def check_reflection_complete(state: AgentState) -> Literal["continue", "done"]:
     """
     检查反思是否完成
 
+    达到最大反思次数,或 reflect_summary 判定上一轮反思的边际收益低于阈值(段落已收敛)时结束
+
     Returns:
         - "continue": 继续反思搜索
         - "done": 反思完成,返回总结节点
     """
-    # current_idx = state["current_paragraph_index"]
-    # current_paragraph = state["paragraphs"][current_idx]
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
 
-    # 简化逻辑:每次反思后都返回总结节点
-    # 实际可以根据搜索结果质量判断
+    if current_paragraph.get("converged"):
+        return "done"
+    if current_paragraph["reflection_count"] < state["max_reflections"]:
+        return "continue"
     return "done"
 
 
-def move_to_next_paragraph(state: AgentState) -> AgentState:
+def move_to_next_paragraph(state: AgentState) -> Dict[str, Any]:
     """移动到下一段落"""
-    state["current_paragraph_index"] += 1
-    state["reflection_count"] = 0
-    return state
+    current_idx = state["current_paragraph_index"]
+    return {
+        "paragraphs": replace_paragraph(state, current_idx, completed=True),
+        "current_paragraph_index": current_idx + 1,
+        "reflection_count": 0
+    }
 
 
+def dispatch_paragraphs(state: AgentState) -> Union[List[Send], Literal["format"]]:
+    """
+    并行模式:为每个段落分发一个独立的研究分支
 
+    Returns:
+        每个段落对应一个 Send;没有段落时直接进入格式化
+    """
+    if not state["paragraphs"]:
+        return "format"
 
+    return [
+        Send("research_paragraph", ParagraphTask(
+            query=state["query"],
+            report_title=state["report_title"],
+            paragraphs=state["paragraphs"],
+            paragraph_index=idx,
+            max_reflections=state["max_reflections"]
+        ))
+        for idx in range(len(state["paragraphs"]))
+    ]
 
 
+def _create_parallel_graph(use_async: bool = False, checkpointer=None, batch_planning: bool = False):
+    """
+    创建并行模式的 StateGraph
+
+    structure(及可选的 plan_queries)之后每个段落作为独立分支运行,所有分支结束后才进入 format。
+    并发上限由运行时配置中的 max_concurrency 控制。
+    """
+    workflow = StateGraph(AgentState)
+
+    workflow.add_node("structure", _node("structure", use_async))
+    workflow.add_node("research_paragraph", _node("research_paragraph", use_async), input_schema=ParagraphTask)
+    workflow.add_node("format", _node("format", use_async))
+
+    workflow.set_entry_point("structure")
+
+    dispatch_from = "structure"
+    if batch_planning:
+        workflow.add_node("plan_queries", _node("plan_queries", use_async))
+        workflow.add_edge("structure", "plan_queries")
+        dispatch_from = "plan_queries"
+
+    workflow.add_conditional_edges(
+        dispatch_from,
+        dispatch_paragraphs,
+        ["research_paragraph", "format"]
+    )
+
+    # 所有段落分支在同一超步内完成后再格式化
+    workflow.add_edge("research_paragraph", "format")
+    workflow.add_edge("format", END)
+
+    return workflow.compile(checkpointer=checkpointer)
 
 
-def create_research_graph(config=None):
+def create_research_graph(config=None, parallel: bool = False, use_async: bool = False, checkpointer=None,
+                          batch_planning: bool = False):
     """
     创建研究工作流的 StateGraph
 
+    编译后的图不保存运行状态(状态与客户端都经运行配置传入),无检查点时按选项在进程内只编译一次,
+    各 Agent 共享同一个图;带检查点的图持有存储连接,每次调用单独编译
+
     Args:
         config: 配置对象,包含 llm_client, search_tool, max_reflections 等
+        parallel: 是否使用并行模式(每个段落独立分支并发执行)
+        use_async: 是否使用异步节点(需配合 astream/ainvoke 与支持 achat 的 LLM 客户端)
+        checkpointer: LangGraph 检查点存储(可选),启用后可按 thread_id 恢复运行
+        batch_planning: 是否在结构生成后用一次 LLM 调用为所有段落规划首次搜索查询
 
     Returns:
         编译后的 LangGraph 图对象
     """
+    if checkpointer is not None:
+        return _compile_research_graph(bool(parallel), bool(use_async), checkpointer, bool(batch_planning))
+    return _cached_research_graph(bool(parallel), bool(use_async), bool(batch_planning))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_research_graph(parallel: bool, use_async: bool, batch_planning: bool):
+    return _compile_research_graph(parallel, use_async, None, batch_planning)
+
+
+def _compile_research_graph(parallel: bool, use_async: bool, checkpointer, batch_planning: bool):
+    if parallel:
+        return _create_parallel_graph(use_async, checkpointer, batch_planning)
+
     # 创建状态图
     workflow = StateGraph(AgentState)
 
     # 添加节点
-    workflow.add_node("structure", generate_structure)
-    workflow.add_node("search", initial_search)
-    workflow.add_node("summary", initial_summary)
-    workflow.add_node("reflect", reflection_search)
-    workflow.add_node("reflect_summary", reflection_summary)
+    workflow.add_node("structure", _node("structure", use_async))
+    workflow.add_node("search", _node("search", use_async))
+    workflow.add_node("summary", _node("summary", use_async))
+    workflow.add_node("reflect", _node("reflect", use_async))
+    workflow.add_node("reflect_summary", _node("reflect_summary", use_async))
     workflow.add_node("next_paragraph", move_to_next_paragraph)
-    workflow.add_node("format", format_report)
+    workflow.add_node("format", _node("format", use_async))
 
     # 设置入口点
     workflow.set_entry_point("structure")
 
     # 定义边
-    workflow.add_edge("structure", "search")
+    if batch_planning:
+        workflow.add_node("plan_queries", _node("plan_queries", use_async))
+        workflow.add_edge("structure", "plan_queries")
+        workflow.add_edge("plan_queries", "search")
+    else:
+        workflow.add_edge("structure", "search")
     workflow.add_edge("search", "summary")
 
     # 条件边:从 summary 决定下一步
@@ -123,4 +261,4 @@ def create_research_graph(config=None):
     workflow.add_edge("format", END)
 
     # 编译图
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
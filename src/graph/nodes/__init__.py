@@ -1,18 +1,53 @@
 """
 LangGraph 节点函数模块
 导出所有节点函数供图构建器使用
+节点模块在首次访问时导入(依赖 langgraph 与搜索客户端)
 """
-from .structure_node import generate_structure
-from .search_node import initial_search
-from .summary_node import initial_summary
-from .reflection_node import reflection_search, reflection_summary
-from .formatting_node import format_report
+import importlib
+
+# 导出名 → 所在子模块
+_LAZY_EXPORTS = {
+    "generate_structure": ".structure_node",
+    "agenerate_structure": ".structure_node",
+    "plan_queries": ".planning_node",
+    "aplan_queries": ".planning_node",
+    "initial_search": ".search_node",
+    "ainitial_search": ".search_node",
+    "initial_summary": ".summary_node",
+    "ainitial_summary": ".summary_node",
+    "reflection_search": ".reflection_node",
+    "reflection_summary": ".reflection_node",
+    "areflection_search": ".reflection_node",
+    "areflection_summary": ".reflection_node",
+    "format_report": ".formatting_node",
+    "aformat_report": ".formatting_node",
+    "research_paragraph": ".paragraph_node",
+    "aresearch_paragraph": ".paragraph_node",
+}
 
 __all__ = [
     "generate_structure",
+    "plan_queries",
     "initial_search",
     "initial_summary",
     "reflection_search",
     "reflection_summary",
-    "format_report"
-]
\ No newline at end of file
+    "format_report",
+    "research_paragraph",
+    "agenerate_structure",
+    "aplan_queries",
+    "ainitial_search",
+    "ainitial_summary",
+    "areflection_search",
+    "areflection_summary",
+    "aformat_report",
+    "aresearch_paragraph"
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
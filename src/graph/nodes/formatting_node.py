@@ -2,16 +2,16 @@
 报告格式化节点
 负责将所有段落整合为最终的 Markdown 报告
 """
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List
 from ..state import AgentState
+from langgraph.config import get_stream_writer
 from langgraph.types import RunnableConfig
 
-def format_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
-    
-    llm_client = config["configurable"]["llm_client"]
 
+def _build_formatting_messages(state: AgentState) -> List[Dict[str, str]]:
+    """构建报告格式化的提示词"""
     from ...prompts.prompts import SYSTEM_PROMPT_REPORT_FORMATTING
-    from ...utils.text_processing import remove_reasoning_from_output, clean_markdown_tags
 
     # 准备所有段落的数据
     paragraphs_data = []
@@ -21,18 +21,18 @@ def format_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
             "paragraph_latest_state": paragraph["latest_summary"]
         })
 
-        # 构建输入消息
-    import json
+    # 构建输入消息
     input_message = json.dumps(paragraphs_data, ensure_ascii=False)
 
-    # 调用 LLM 生成格式化报告
-    messages = [
+    return [
         {"role": "system", "content": SYSTEM_PROMPT_REPORT_FORMATTING},
         {"role": "user", "content": input_message}
     ]
 
-    # 不需要 JSON Schema,直接返回 Markdown 文本
-    response = llm_client.chat(messages)
+
+def _formatting_update(state: AgentState, response: Any) -> Dict[str, Any]:
+    """后处理 LLM 输出并生成最终报告"""
+    from ...utils.text_processing import remove_reasoning_from_output, clean_markdown_tags
 
     # 如果 response 是字典,提取内容
     if isinstance(response, dict):
@@ -40,7 +40,7 @@ def format_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     else:
         formatted_report = str(response)
 
-        # 后处理:移除推理过程和清理 Markdown 标签
+    # 后处理:移除推理过程和清理 Markdown 标签
     formatted_report = remove_reasoning_from_output(formatted_report)
     formatted_report = clean_markdown_tags(formatted_report)
 
@@ -50,4 +50,36 @@ def format_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     return {
         "final_report": final_report,
         "completed": True
-    }
\ No newline at end of file
+    }
+
+
+def format_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    llm_client = config["configurable"]["llm_client"]
+
+    messages = _build_formatting_messages(state)
+    writer = get_stream_writer()
+
+    # 不需要 JSON Schema,流式生成 Markdown 文本,并通过 custom 流实时推送片段
+    chunks = []
+    for chunk in llm_client.stream_chat(messages, cache_node="format_report"):
+        chunks.append(chunk)
+        writer({"node": "report_chunk", "chunk": chunk})
+
+    return _formatting_update(state, "".join(chunks))
+
+
+async def aformat_report(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """format_report 的异步版本"""
+
+    llm_client = config["configurable"]["llm_client"]
+
+    messages = _build_formatting_messages(state)
+    writer = get_stream_writer()
+
+    chunks = []
+    async for chunk in llm_client.astream_chat(messages, cache_node="format_report"):
+        chunks.append(chunk)
+        writer({"node": "report_chunk", "chunk": chunk})
+
+    return _formatting_update(state, "".join(chunks))
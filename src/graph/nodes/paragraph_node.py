@@ -0,0 +1,115 @@
+"""
+段落分支节点
+并行模式下,每个段落作为独立分支执行 搜索 → 总结 → 反思 循环
+"""
+from contextlib import nullcontext
+from typing import Dict, Any
+from ..state import AgentState, ParagraphTask, merge_paragraphs
+from langgraph.config import get_stream_writer
+from langgraph.types import RunnableConfig
+
+from .search_node import initial_search, ainitial_search
+from .summary_node import initial_summary, ainitial_summary
+from .reflection_node import (
+    reflection_search,
+    reflection_summary,
+    areflection_search,
+    areflection_summary
+)
+
+
+def _apply_update(branch_state: AgentState, update: Dict[str, Any]) -> None:
+    """按图的 reducer 语义把节点输出合并到分支本地状态"""
+    for key, value in (update or {}).items():
+        if key == "paragraphs":
+            branch_state["paragraphs"] = merge_paragraphs(branch_state["paragraphs"], value)
+        else:
+            branch_state[key] = value
+
+
+def _create_branch_state(state: ParagraphTask) -> AgentState:
+    """分支本地状态:复用顺序模式的节点函数,只处理 paragraph_index 对应的段落"""
+    return AgentState(
+        query=state["query"],
+        report_title=state["report_title"],
+        paragraphs=list(state["paragraphs"]),
+        current_paragraph_index=state["paragraph_index"],
+        reflection_count=0,
+        max_reflections=state["max_reflections"],
+        final_report=None,
+        completed=False
+    )
+
+
+def _track_step(config: RunnableConfig, node_name: str, paragraph_index: int):
+    """统计分支内子步骤的指标(未启用指标时不做任何事)"""
+    metrics = config["configurable"].get("metrics")
+    return metrics.track(node_name, paragraph_index) if metrics else nullcontext()
+
+
+def _step_event(node_name: str, paragraph_index: int, update: Dict[str, Any], record) -> Dict[str, Any]:
+    """分支内子步骤的自定义流事件,标明事件所属段落"""
+    event = {"node": node_name, "paragraph_index": paragraph_index, "state": update}
+    if record is not None:
+        event["metrics"] = record.to_dict()
+    return event
+
+
+def _needs_reflection(branch_state: AgentState) -> bool:
+    """与顺序模式一致: 未达到最大反思次数且段落未收敛则继续 reflect → reflect_summary → summary"""
+    current_idx = branch_state["current_paragraph_index"]
+    paragraph = branch_state["paragraphs"][current_idx]
+    if paragraph.get("converged"):
+        return False
+    return paragraph["reflection_count"] < branch_state["max_reflections"]
+
+
+def research_paragraph(state: ParagraphTask, config: RunnableConfig) -> Dict[str, Any]:
+
+    current_idx = state["paragraph_index"]
+    writer = get_stream_writer()
+    branch_state = _create_branch_state(state)
+
+    def run(node_name, node_fn):
+        with _track_step(config, node_name, current_idx) as record:
+            update = node_fn(branch_state, config)
+        _apply_update(branch_state, update)
+        writer(_step_event(node_name, current_idx, update, record))
+
+    run("search", initial_search)
+    run("summary", initial_summary)
+
+    while _needs_reflection(branch_state):
+        run("reflect", reflection_search)
+        run("reflect_summary", reflection_summary)
+        run("summary", initial_summary)
+
+    return {
+        "paragraphs": {current_idx: {**branch_state["paragraphs"][current_idx], "completed": True}}
+    }
+
+
+async def aresearch_paragraph(state: ParagraphTask, config: RunnableConfig) -> Dict[str, Any]:
+    """research_paragraph 的异步版本"""
+
+    current_idx = state["paragraph_index"]
+    writer = get_stream_writer()
+    branch_state = _create_branch_state(state)
+
+    async def run(node_name, node_fn):
+        with _track_step(config, node_name, current_idx) as record:
+            update = await node_fn(branch_state, config)
+        _apply_update(branch_state, update)
+        writer(_step_event(node_name, current_idx, update, record))
+
+    await run("search", ainitial_search)
+    await run("summary", ainitial_summary)
+
+    while _needs_reflection(branch_state):
+        await run("reflect", areflection_search)
+        await run("reflect_summary", areflection_summary)
+        await run("summary", ainitial_summary)
+
+    return {
+        "paragraphs": {current_idx: {**branch_state["paragraphs"][current_idx], "completed": True}}
+    }
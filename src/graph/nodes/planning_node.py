@@ -0,0 +1,114 @@
+"""
+搜索规划节点
+在报告结构生成后,用一次 LLM 调用为所有段落规划首次搜索查询
+"""
+import json
+from typing import Dict, Any, List
+from ..state import AgentState, replace_paragraph
+from langgraph.types import RunnableConfig
+
+# 批量搜索规划输出的 JSON Schema
+BATCH_SEARCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "queries": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "paragraph_index": {"type": "integer"},
+                    "search_query": {"type": "string"},
+                    "reasoning": {"type": "string"}
+                },
+                "required": ["paragraph_index", "search_query", "reasoning"]
+            }
+        }
+    },
+    "required": ["queries"]
+}
+
+
+def _build_planning_messages(state: AgentState) -> List[Dict[str, str]]:
+    """构建批量规划搜索查询的提示词"""
+    from ...prompts.prompts import SYSTEM_PROMPT_BATCH_SEARCH
+
+    paragraphs = [
+        {"paragraph_index": idx, "title": p["title"], "content": p["content"]}
+        for idx, p in enumerate(state["paragraphs"])
+    ]
+    user_content = (
+        f"\n\n查询主题: {state['query']}\n"
+        f"报告章节: {json.dumps(paragraphs, ensure_ascii=False)}"
+        + SYSTEM_PROMPT_BATCH_SEARCH)
+
+    return [
+        {"role": "system", "content": "你是一个搜索查询生成专家。"},
+        {"role": "user", "content": user_content}
+    ]
+
+
+def _planning_update(state: AgentState, response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    把规划好的查询写入各段落的 planned_query
+
+    按 paragraph_index 对应;索引存在缺失、越界或重复时整体按输出顺序对应。
+    没有分到查询的段落在 initial_search 中自行生成
+    """
+    count = len(state["paragraphs"])
+    items = response.get("queries") or []
+    indexes = [item.get("paragraph_index") for item in items]
+    if not all(isinstance(idx, int) and 0 <= idx < count for idx in indexes) or len(set(indexes)) != len(indexes):
+        indexes = list(range(len(items)))
+
+    planned: Dict[int, str] = {}
+    for idx, item in zip(indexes, items):
+        query = (item.get("search_query") or "").strip()
+        if query and idx < count:
+            planned[idx] = query
+
+    if not planned:
+        return {}
+
+    updates = {}
+    for idx, query in planned.items():
+        updates.update(replace_paragraph(state, idx, planned_query=query))
+
+    return {
+        "paragraphs": updates
+    }
+
+
+def plan_queries(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    if not state["paragraphs"]:
+        return {}
+
+    llm_client = config["configurable"]["llm_client"]
+    messages = _build_planning_messages(state)
+
+    # 规划失败不影响研究,各段落退回逐段生成查询
+    try:
+        response = llm_client.chat(messages, json_schema=BATCH_SEARCH_SCHEMA, cache_node="plan_queries")
+    except Exception as e:
+        print(f"批量规划搜索查询失败,改为逐段生成: {str(e)}")
+        return {}
+
+    return _planning_update(state, response)
+
+
+async def aplan_queries(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """plan_queries 的异步版本"""
+
+    if not state["paragraphs"]:
+        return {}
+
+    llm_client = config["configurable"]["llm_client"]
+    messages = _build_planning_messages(state)
+
+    try:
+        response = await llm_client.achat(messages, json_schema=BATCH_SEARCH_SCHEMA, cache_node="plan_queries")
+    except Exception as e:
+        print(f"批量规划搜索查询失败,改为逐段生成: {str(e)}")
+        return {}
+
+    return _planning_update(state, response)
@@ -0,0 +1,126 @@
+"""
+搜索预取
+顺序模式下,在当前段落总结/反思期间提前为后续段落生成搜索查询并执行搜索
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.types import RunnableConfig
+
+from ..state import AgentState
+
+# (搜索查询列表, 搜索结果)
+Prefetched = Tuple[List[str], List[Dict[str, Any]]]
+
+
+def _track(config: RunnableConfig, paragraph_index: int):
+    """预取在后台执行,作为独立的顶层记录统计(不计入触发它的节点)"""
+    metrics = config["configurable"].get("metrics")
+    return metrics.track("prefetch_search", paragraph_index, detached=True) if metrics else nullcontext()
+
+
+class SearchPrefetcher:
+    """
+    段落初始搜索的预取器(每次运行一个实例)
+
+    段落的初始搜索查询只依赖报告结构,不依赖前面段落的总结。initial_search 处理段落 N 时
+    调度 N+1 .. N+lookahead 的查询生成与搜索在后台执行,轮到这些段落时直接取用结果。
+    去重仍在取用时进行,与不预取时的结果一致。
+    """
+
+    def __init__(self, lookahead: int = 2):
+        """
+        Args:
+            lookahead: 预取窗口,即最多提前处理的段落数
+        """
+        self.lookahead = lookahead
+        self._futures: Dict[int, Future] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _upcoming(self, state: AgentState, current_idx: int) -> List[int]:
+        end = min(len(state["paragraphs"]), current_idx + 1 + self.lookahead)
+        return list(range(current_idx + 1, end))
+
+    def schedule(self, state: AgentState, config: RunnableConfig, current_idx: int) -> None:
+        """在后台线程中预取 current_idx 之后窗口内的段落"""
+        for idx in self._upcoming(state, current_idx):
+            self.schedule_paragraph(state["query"], state["paragraphs"][idx], idx, config)
+
+    def schedule_paragraph(self, query: str, paragraph: Dict[str, Any], idx: int, config: RunnableConfig) -> None:
+        """
+        在后台线程中预取单个段落(已调度过的段落忽略)
+
+        结构生成节点在流式解析出段落时直接调用,不必等待整个大纲生成完毕
+        """
+        from .search_node import fetch_initial_search
+
+        def run() -> Prefetched:
+            with _track(config, idx):
+                return fetch_initial_search(query, paragraph, config)
+
+        paragraph = dict(paragraph)
+        with self._lock:
+            if idx in self._futures:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(1, self.lookahead),
+                                                    thread_name_prefix="prefetch")
+            self._futures[idx] = self._executor.submit(run)
+
+    def take(self, idx: int) -> Optional[Prefetched]:
+        """取出段落 idx 的预取结果(必要时等待完成);未预取或预取失败时返回 None"""
+        with self._lock:
+            future = self._futures.pop(idx, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"预取搜索失败,改为直接搜索: {str(e)}")
+            return None
+
+    def aschedule(self, state: AgentState, config: RunnableConfig, current_idx: int) -> None:
+        """schedule 的异步版本,在当前事件循环中创建后台任务"""
+        for idx in self._upcoming(state, current_idx):
+            self.aschedule_paragraph(state["query"], state["paragraphs"][idx], idx, config)
+
+    def aschedule_paragraph(self, query: str, paragraph: Dict[str, Any], idx: int, config: RunnableConfig) -> None:
+        """schedule_paragraph 的异步版本"""
+        from .search_node import afetch_initial_search
+
+        async def run() -> Prefetched:
+            with _track(config, idx):
+                return await afetch_initial_search(query, paragraph, config)
+
+        if idx not in self._tasks:
+            paragraph = dict(paragraph)
+            self._tasks[idx] = asyncio.get_running_loop().create_task(run())
+
+    async def atake(self, idx: int) -> Optional[Prefetched]:
+        """take 的异步版本"""
+        task = self._tasks.pop(idx, None)
+        if task is None:
+            return None
+        try:
+            return await task
+        except Exception as e:
+            print(f"预取搜索失败,改为直接搜索: {str(e)}")
+            return None
+
+    def close(self) -> None:
+        """取消尚未取用的预取(运行结束或中断时调用)"""
+        with self._lock:
+            futures, self._futures = self._futures, {}
+            executor, self._executor = self._executor, None
+        for future in futures.values():
+            future.cancel()
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks = {}
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -2,75 +2,102 @@
 反思节点
 负责反思搜索和更新总结
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from ..state import AgentState, SearchRecord
+from ..state import AgentState, ParagraphState, SearchRecord, replace_paragraph
 from langgraph.types import RunnableConfig
 
-def reflection_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+from .search_node import (
+    _search_kwargs, _dedup_results, _record_results, _load_results, _query_request, _queries_from_response
+)
+from .summary_node import (
+    SUMMARY_SCHEMA, INCREMENTAL_SUMMARY_SCHEMA, _format_results,
+    _incremental_enabled, _build_incremental_messages, _incremental_update
+)
 
-    llm_client = config["configurable"]["llm_client"]
 
-    from ...tools.search import tavily_search
+def _build_reflection_messages(state: AgentState, current_paragraph: ParagraphState) -> List[Dict[str, str]]:
+    """构建反思查询的提示词"""
     from ...prompts.prompts import SYSTEM_PROMPT_REFLECTION
 
-    current_idx = state["current_paragraph_index"]
-    current_paragraph = state["paragraphs"][current_idx]
-
     user_content1 = (
         f"\n\n查询主题: {state['query']}\n"
         f"段落标题: {current_paragraph['title']}\n"
         f"段落内容: {current_paragraph['content']}\n"
         f"当前总结: {current_paragraph['latest_summary']}\n"
         + SYSTEM_PROMPT_REFLECTION)
-    # 生成反思查询
-    messages = [
+
+    return [
         {"role": "system", "content": "你是一个批判性思维专家,擅长发现知识盲点。"},
         {"role": "user", "content": user_content1}
     ]
 
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "search_query": {"type": "string"},
-            "reasoning": {"type": "string"}
-        },
-        "required": ["search_query", "reasoning"]
-    }
-
-    response = llm_client.chat(messages, json_schema=json_schema)
-    search_query = response["search_query"]
-
-    # 执行搜索
-    search_results = tavily_search(
-        search_query,
-        max_results=config["configurable"].get("max_search_results", 3),
-        timeout=config["configurable"].get("search_timeout", 30),
-        api_key=config["configurable"]["tavily_api_key"]
-    )
 
-    # 记录搜索
+def _reflection_search_update(state: AgentState, current_idx: int, search_queries: List[str],
+                              search_results: List[Dict[str, Any]], config: RunnableConfig) -> Dict[str, Any]:
+    """记录反思搜索并增加反思计数"""
     search_record = SearchRecord(
-        query=search_query,
-        results=search_results or [],
+        query=search_queries[0] if search_queries else "",
+        queries=search_queries,
+        results=_record_results(state["paragraphs"][current_idx], search_results, config),
         timestamp=datetime.now().isoformat()
     )
 
     # 更新状态
-    updated_paragraphs = state["paragraphs"].copy()
-    updated_paragraphs[current_idx]["search_history"].append(search_record)
-    updated_paragraphs[current_idx]["reflection_count"] += 1
+    paragraph = state["paragraphs"][current_idx]
 
     return {
-        "paragraphs": updated_paragraphs
+        "paragraphs": replace_paragraph(
+            state, current_idx,
+            search_history=paragraph["search_history"] + [search_record],
+            reflection_count=paragraph["reflection_count"] + 1
+        )
     }
-    # return state
 
-def reflection_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+def reflection_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    llm_client = config["configurable"]["llm_client"]
+
+    from ...tools.search import multi_tavily_search
+
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
+
+    # 生成反思查询(每步多查询时生成多个)
+    messages, schema = _query_request(_build_reflection_messages(state, current_paragraph), config)
+    response = llm_client.chat(messages, json_schema=schema, cache_node="reflection_search")
+    search_queries = _queries_from_response(response, config)
+
+    # 执行搜索(多个查询并发执行并融合),去除本段落已使用过的结果
+    search_results = multi_tavily_search(search_queries, **_search_kwargs(config))
+    search_results = _dedup_results(state, current_idx, search_results, config)
+
+    return _reflection_search_update(state, current_idx, search_queries, search_results, config)
+
+
+async def areflection_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """reflection_search 的异步版本"""
 
     llm_client = config["configurable"]["llm_client"]
 
-    from ...utils.text_processing import format_search_results_for_prompt
+    from ...tools.search import amulti_tavily_search
+
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
+
+    messages, schema = _query_request(_build_reflection_messages(state, current_paragraph), config)
+    response = await llm_client.achat(messages, json_schema=schema, cache_node="reflection_search")
+    search_queries = _queries_from_response(response, config)
+
+    search_results = await amulti_tavily_search(search_queries, **_search_kwargs(config))
+    search_results = _dedup_results(state, current_idx, search_results, config)
+
+    return _reflection_search_update(state, current_idx, search_queries, search_results, config)
+
+
+def _build_reflection_summary_messages(state: AgentState, config: RunnableConfig) -> Optional[List[Dict[str, str]]]:
+    """构建反思总结的提示词,没有(去重后的)搜索结果时返回 None"""
     from ...prompts.prompts import SYSTEM_PROMPT_REFLECTION_SUMMARY
 
     current_idx = state["current_paragraph_index"]
@@ -78,15 +105,14 @@ def reflection_summary(state: AgentState, config: RunnableConfig) -> Dict[str, A
 
     # 获取最新搜索结果
     if not current_paragraph["search_history"]:
-        return {}
+        return None
 
     latest_search = current_paragraph["search_history"][-1]
 
-    # 格式化搜索结果
-    formatted_results = format_search_results_for_prompt(
-        latest_search["results"],
-        max_length=config["configurable"].get("max_content_length", 20000)
-    )
+    # 格式化搜索结果;去重后本轮可能没有新结果,此时保留当前总结,不调用 LLM
+    formatted_results = _format_results(latest_search["results"], config) if latest_search["results"] else []
+    if not formatted_results:
+        return None
 
     # 生成更新后的总结
     user_content2 = (
@@ -98,29 +124,107 @@ def reflection_summary(state: AgentState, config: RunnableConfig) -> Dict[str, A
         f"当前总结: {current_paragraph['latest_summary']}"
         + SYSTEM_PROMPT_REFLECTION_SUMMARY)
 
-    messages = [
+    return [
         {"role": "system", "content": "你是一个专业的内容总结专家。"},
         {"role": "user", "content": user_content2}
     ]
 
 
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "summary": {"type": "string"}
-        },
-        "required": ["summary"]
+def _reflection_summary_update(state: AgentState, updated_summary: str) -> Dict[str, Any]:
+    """用反思后的总结更新当前段落"""
+    current_idx = state["current_paragraph_index"]
+
+    return {
+        "paragraphs": replace_paragraph(state, current_idx, content=updated_summary, latest_summary=updated_summary)
     }
 
-    response = llm_client.chat(messages, json_schema=json_schema)
-    updated_summary = response["summary"]
 
-    # 更新段落
-    updated_paragraphs = state["paragraphs"].copy()
-    updated_paragraphs[current_idx]["content"] = updated_summary
-    updated_paragraphs[current_idx]["latest_summary"] = updated_summary
+def _with_reflection_gain(state: AgentState, config: RunnableConfig, update: Dict[str, Any],
+                          previous_summary: str) -> Dict[str, Any]:
+    """
+    评估本轮反思的边际收益,低于 reflection_min_gain 时把段落标记为已收敛,后续不再反思
 
-    return {
-        "paragraphs": updated_paragraphs
-    }
-    # return state
\ No newline at end of file
+    收益由新 URL 比例、新结果正文的 n-gram 新颖度与总结变化幅度综合得出;
+    提前结束时记录跳过的轮数与节省的调用数
+    """
+    from ...utils.metrics import record_reflection_skip
+    from ...utils.novelty import score_reflection_gain
+
+    configurable = config["configurable"]
+    min_gain = configurable.get("reflection_min_gain", 0.0)
+    current_idx = state["current_paragraph_index"]
+    if min_gain <= 0 or not state["paragraphs"][current_idx]["search_history"]:
+        return update
+
+    # 本轮总结后的段落(总结被跳过时为当前段落)
+    paragraph = (update.get("paragraphs") or {}).get(current_idx) or state["paragraphs"][current_idx]
+    history = paragraph["search_history"]
+
+    gain = score_reflection_gain(
+        previous_results=_load_results([r for record in history[:-1] for r in record["results"]], config),
+        new_results=_load_results(history[-1]["results"], config),
+        previous_summary=previous_summary,
+        new_summary=paragraph["latest_summary"],
+        expected_results=configurable.get("max_search_results", 3),
+        max_chars=configurable.get("max_content_length", 20000)
+    )
+    changes = {"reflection_gains": (paragraph.get("reflection_gains") or []) + [round(gain.score, 4)]}
+
+    remaining = state["max_reflections"] - paragraph["reflection_count"]
+    if gain.score < min_gain and remaining > 0:
+        changes["converged"] = True
+        # 每轮反思: 反思查询 + 反思总结 + 总结(增量模式下总结无新结果,不调用 LLM)
+        calls_per_round = 2 if configurable.get("incremental_summary") else 3
+        record_reflection_skip(remaining, remaining * calls_per_round, remaining)
+
+    return {**update, "paragraphs": {current_idx: {**paragraph, **changes}}}
+
+
+def reflection_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    llm_client = config["configurable"]["llm_client"]
+    previous_summary = state["paragraphs"][state["current_paragraph_index"]]["latest_summary"]
+
+    if _incremental_enabled(config):
+        built = _build_incremental_messages(state, config)
+        if built is None:
+            return _with_reflection_gain(state, config, {}, previous_summary)
+        messages, source_ids = built
+        response = llm_client.chat(messages, json_schema=INCREMENTAL_SUMMARY_SCHEMA, cache_node="reflection_summary")
+        update = _incremental_update(state, response, source_ids)
+        return _with_reflection_gain(state, config, update, previous_summary)
+
+    messages = _build_reflection_summary_messages(state, config)
+    if messages is None:
+        return _with_reflection_gain(state, config, {}, previous_summary)
+
+    response = llm_client.chat(messages, json_schema=SUMMARY_SCHEMA, cache_node="reflection_summary")
+
+    update = _reflection_summary_update(state, response["summary"])
+    return _with_reflection_gain(state, config, update, previous_summary)
+
+
+async def areflection_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """reflection_summary 的异步版本"""
+
+    llm_client = config["configurable"]["llm_client"]
+    previous_summary = state["paragraphs"][state["current_paragraph_index"]]["latest_summary"]
+
+    if _incremental_enabled(config):
+        built = _build_incremental_messages(state, config)
+        if built is None:
+            return _with_reflection_gain(state, config, {}, previous_summary)
+        messages, source_ids = built
+        response = await llm_client.achat(messages, json_schema=INCREMENTAL_SUMMARY_SCHEMA,
+                                          cache_node="reflection_summary")
+        update = _incremental_update(state, response, source_ids)
+        return _with_reflection_gain(state, config, update, previous_summary)
+
+    messages = _build_reflection_summary_messages(state, config)
+    if messages is None:
+        return _with_reflection_gain(state, config, {}, previous_summary)
+
+    response = await llm_client.achat(messages, json_schema=SUMMARY_SCHEMA, cache_node="reflection_summary")
+
+    update = _reflection_summary_update(state, response["summary"])
+    return _with_reflection_gain(state, config, update, previous_summary)
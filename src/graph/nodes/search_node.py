@@ -2,70 +2,248 @@
 初始搜索节点
 负责生成搜索查询并执行搜索
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
-from ..state import AgentState, SearchRecord
+from ..state import AgentState, ParagraphState, SearchRecord, replace_paragraph
 from langgraph.types import RunnableConfig
 
-def initial_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+# 搜索查询生成的 JSON Schema(初始搜索与反思搜索共用)
+SEARCH_QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "search_query": {"type": "string"},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["search_query", "reasoning"]
+}
 
-    llm_client = config["configurable"]["llm_client"]
+# 每步生成多个查询时使用的 JSON Schema(search_query 为主查询,兼容单查询的处理逻辑)
+MULTI_SEARCH_QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "search_query": {"type": "string"},
+        "search_queries": {"type": "array", "items": {"type": "string"}},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["search_query", "search_queries", "reasoning"]
+}
 
-    # 获取 Tavily 搜索工具
-    from ...tools.search import tavily_search
 
-    current_idx = state["current_paragraph_index"]
-    current_paragraph = state["paragraphs"][current_idx]
+def _search_kwargs(config: RunnableConfig) -> Dict[str, Any]:
+    """从运行配置中提取 tavily_search 的参数"""
+    return {
+        "max_results": config["configurable"].get("max_search_results", 3),
+        "timeout": config["configurable"].get("search_timeout", 30),
+        "api_key": config["configurable"]["tavily_api_key"],
+        "cache": config["configurable"].get("search_cache"),
+        "limiter": config["configurable"].get("search_limiter")
+    }
+
+
+def _queries_per_step(config: RunnableConfig) -> int:
+    return max(1, int(config["configurable"].get("search_queries_per_step", 1) or 1))
+
+
+def _query_request(messages: List[Dict[str, str]],
+                   config: RunnableConfig) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """每步多查询时在提示词末尾追加要求,并换用多查询 Schema"""
+    count = _queries_per_step(config)
+    if count <= 1:
+        return messages, SEARCH_QUERY_SCHEMA
+
+    hint = (f"\n另外请在 search_queries 中给出 {count} 个角度各异、互不重复的搜索查询"
+            f"(第一个与 search_query 相同),这些查询将被同时执行。")
+    messages = messages[:-1] + [{**messages[-1], "content": messages[-1]["content"] + hint}]
+    return messages, MULTI_SEARCH_QUERY_SCHEMA
+
+
+def _queries_from_response(response: Dict[str, Any], config: RunnableConfig) -> List[str]:
+    """从 LLM 输出中取出去重后的查询列表(主查询在前,最多 search_queries_per_step 个)"""
+    queries: List[str] = []
+    for query in [response.get("search_query")] + list(response.get("search_queries") or []):
+        query = (query or "").strip() if isinstance(query, str) else ""
+        if query and query not in queries:
+            queries.append(query)
+    return queries[:_queries_per_step(config)]
+
+
+def _dedup_results(state: AgentState, current_idx: int, search_results: List[Dict[str, Any]],
+                   config: RunnableConfig) -> List[Dict[str, Any]]:
+    """
+    用运行级去重索引过滤本次研究中已出现过的结果(同 URL 或近似内容),并记录节省的 token 数
+
+    去重范围由 dedup_scope 决定: paragraph 为段落内,run 为整个研究
+    """
+    from ...utils.metrics import record_dedup
+
+    index = config["configurable"].get("dedup_index")
+    if index is None or not search_results:
+        return search_results
 
+    run_scope = config["configurable"].get("dedup_scope", "paragraph") == "run"
+    scope = None if run_scope else current_idx
+
+    # 首次遇到该范围(包括从检查点恢复时):先登记已有的搜索结果
+    if not index.has_scope(scope):
+        paragraphs = state["paragraphs"] if run_scope else [state["paragraphs"][current_idx]]
+        index.add(_load_results([r for p in paragraphs for record in p["search_history"] for r in record["results"]],
+                                config), scope)
+
+    kept, report = index.filter(search_results, scope)
+    if report.dropped_results:
+        record_dedup(report.dropped_results, report.saved_tokens)
+    return kept
+
+
+def _build_search_messages(state: AgentState, current_paragraph: ParagraphState) -> List[Dict[str, str]]:
+    """构建生成搜索查询的提示词"""
     # 导入提示词
     from ...prompts.prompts import SYSTEM_PROMPT_FIRST_SEARCH
 
-    
-    # 生成搜索查询
-
     user_content = (
         f"\n\n查询主题: {state['query']}\n"
         f"段落标题: {current_paragraph['title']}\n"
         f"段落内容: {current_paragraph['content']}"
         + SYSTEM_PROMPT_FIRST_SEARCH)
-    
-    messages = [
+
+    return [
         {"role": "system", "content": "你是一个搜索查询生成专家。"},
         {"role": "user", "content": user_content}
     ]
 
 
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "search_query": {"type": "string"},
-            "reasoning": {"type": "string"}
-        },
-        "required": ["search_query", "reasoning"]
-    }
+def _with_source_ids(paragraph: ParagraphState, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """为新搜索结果分配段落内唯一的来源编号(S1、S2...),供增量总结与证据清单引用"""
+    offset = sum(len(record["results"]) for record in paragraph["search_history"])
+    return [{**result, "source_id": f"S{offset + i}"} for i, result in enumerate(search_results or [], 1)]
 
-    response = llm_client.chat(messages, json_schema=json_schema)
-    search_query = response["search_query"]
 
-    # 执行搜索(使用原项目的 tavily_search 函数)
-    search_results = tavily_search(
-        search_query,
-        max_results=config["configurable"].get("max_search_results", 3),
-        timeout=config["configurable"].get("search_timeout", 30),
-        api_key=config["configurable"]["tavily_api_key"]
-    )
+def _record_results(paragraph: ParagraphState, search_results: List[Dict[str, Any]],
+                    config: RunnableConfig) -> List[Dict[str, Any]]:
+    """
+    生成写入搜索历史的结果:分配来源编号,配置了正文存储时把正文移出状态只保留引用
+    """
+    from ...utils.blob_store import compact_results
+
+    results = _with_source_ids(paragraph, search_results)
+    store = config["configurable"].get("blob_store")
+    return compact_results(results, store) if store is not None else results
+
+
+def _load_results(results: List[Dict[str, Any]], config: RunnableConfig) -> List[Dict[str, Any]]:
+    """为搜索历史中的结果补回正文(只有需要正文的节点调用)"""
+    from ...utils.blob_store import load_results
 
-    # 记录搜索历史
+    return load_results(results, config["configurable"].get("blob_store"))
+
+
+def _search_update(state: AgentState, current_idx: int, search_queries: List[str],
+                   search_results: List[Dict[str, Any]], config: RunnableConfig) -> Dict[str, Any]:
+    """记录搜索历史并构建状态更新"""
     search_record = SearchRecord(
-        query=search_query,
-        results=search_results or [],
+        query=search_queries[0] if search_queries else "",
+        queries=search_queries,
+        results=_record_results(state["paragraphs"][current_idx], search_results, config),
         timestamp=datetime.now().isoformat()
     )
 
     # 更新段落的搜索历史
-    updated_paragraphs = state["paragraphs"].copy()
-    updated_paragraphs[current_idx]["search_history"].append(search_record)
+    history = state["paragraphs"][current_idx]["search_history"]
 
     return {
-        "paragraphs": updated_paragraphs
-    }
\ No newline at end of file
+        "paragraphs": replace_paragraph(state, current_idx, search_history=history + [search_record])
+    }
+
+
+def fetch_initial_search(query: str, paragraph: ParagraphState,
+                         config: RunnableConfig) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    生成段落的初始搜索查询并执行搜索(不去重),供 initial_search 与预取共用
+
+    已有批量规划的查询时直接使用,不再调用 LLM;每步多查询时并发执行并用 RRF 融合结果
+
+    Returns:
+        (查询列表, 搜索结果)
+    """
+    from ...tools.search import multi_tavily_search
+
+    planned_query = paragraph.get("planned_query")
+    if planned_query:
+        search_queries = [planned_query]
+    else:
+        # 生成搜索查询
+        llm_client = config["configurable"]["llm_client"]
+        messages, schema = _query_request(_build_search_messages({"query": query}, paragraph), config)
+        response = llm_client.chat(messages, json_schema=schema, cache_node="initial_search")
+        search_queries = _queries_from_response(response, config)
+
+    # 执行搜索(使用原项目的 tavily_search 函数)
+    return search_queries, multi_tavily_search(search_queries, **_search_kwargs(config))
+
+
+async def afetch_initial_search(query: str, paragraph: ParagraphState,
+                                config: RunnableConfig) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """fetch_initial_search 的异步版本"""
+    from ...tools.search import amulti_tavily_search
+
+    planned_query = paragraph.get("planned_query")
+    if planned_query:
+        search_queries = [planned_query]
+    else:
+        llm_client = config["configurable"]["llm_client"]
+        messages, schema = _query_request(_build_search_messages({"query": query}, paragraph), config)
+        response = await llm_client.achat(messages, json_schema=schema, cache_node="initial_search")
+        search_queries = _queries_from_response(response, config)
+
+    return search_queries, await amulti_tavily_search(search_queries, **_search_kwargs(config))
+
+
+def initial_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    from ...utils.metrics import record_prefetch_hit
+
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
+
+    # 预取模式:先调度后续段落,再取用本段落已预取的结果
+    prefetcher = config["configurable"].get("search_prefetcher")
+    prefetched = None
+    if prefetcher is not None:
+        prefetcher.schedule(state, config, current_idx)
+        prefetched = prefetcher.take(current_idx)
+
+    if prefetched is not None:
+        record_prefetch_hit()
+        search_queries, search_results = prefetched
+    else:
+        search_queries, search_results = fetch_initial_search(state["query"], current_paragraph, config)
+
+    # 去除重复结果
+    search_results = _dedup_results(state, current_idx, search_results, config)
+
+    return _search_update(state, current_idx, search_queries, search_results, config)
+
+
+async def ainitial_search(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """initial_search 的异步版本"""
+
+    from ...utils.metrics import record_prefetch_hit
+
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
+
+    prefetcher = config["configurable"].get("search_prefetcher")
+    prefetched = None
+    if prefetcher is not None:
+        prefetcher.aschedule(state, config, current_idx)
+        prefetched = await prefetcher.atake(current_idx)
+
+    if prefetched is not None:
+        record_prefetch_hit()
+        search_queries, search_results = prefetched
+    else:
+        search_queries, search_results = await afetch_initial_search(state["query"], current_paragraph, config)
+
+    search_results = _dedup_results(state, current_idx, search_results, config)
+
+    return _search_update(state, current_idx, search_queries, search_results, config)
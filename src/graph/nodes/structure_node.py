@@ -2,13 +2,34 @@
 结构生成节点
 负责生成报告大纲和段落结构
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
 from ..state import AgentState, ParagraphState
+from langgraph.config import get_stream_writer
 from langgraph.types import RunnableConfig
 
-def generate_structure(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+# 定义 JSON Schema
+STRUCTURE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "report_title": {"type": "string"},
+        "paragraphs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "content": {"type": "string"}
+                },
+                "required": ["title", "content"]
+            }
+        }
+    },
+    "required": ["report_title", "paragraphs"]
+}
 
-    llm_client = config["configurable"]["llm_client"]
+
+def _build_structure_messages(state: AgentState) -> List[Dict[str, str]]:
+    """构建生成报告结构的提示词"""
     query = state["query"]
 
     # 导入提示词(需要从原项目复用)
@@ -16,48 +37,34 @@ def generate_structure(state: AgentState, config: RunnableConfig) -> Dict[str, A
     user_content = (
         f"\n\n查询主题: {query}"
         + SYSTEM_PROMPT_REPORT_STRUCTURE)
-    
-    # 构建提示词
-    messages = [
+
+    return [
         {"role": "system", "content": "你是一个专业的研究助手,擅长规划研究报告结构。"},
         {"role": "user", "content": user_content}
     ]
 
-    # 定义 JSON Schema
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "report_title": {"type": "string"},
-            "paragraphs": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "content": {"type": "string"}
-                    },
-                    "required": ["title", "content"]
-                }
-            }
-        },
-        "required": ["report_title", "paragraphs"]
-    }
 
-    # 调用 LLM
-    result = llm_client.chat(messages, json_schema=json_schema)
+def _new_paragraph(p: Dict[str, Any]) -> ParagraphState:
+    """由大纲中的一个段落构建初始段落状态"""
+    return ParagraphState(
+        title=p["title"],
+        content=p["content"],
+        search_history=[],
+        latest_summary="",
+        completed=False,
+        reflection_count=0,
+        evidence=[],
+        summarized_sources=[],
+        reflection_gains=[],
+        converged=False,
+        planned_query=""
+    )
+
 
+def _structure_update(result: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+    """根据 LLM 返回的大纲构建状态更新"""
     # 构建段落状态列表
-    paragraphs = [
-        ParagraphState(
-            title=p["title"],
-            content=p["content"],
-            search_history=[],
-            latest_summary="",
-            completed=False,
-            reflection_count=0
-        )
-        for p in result["paragraphs"]
-    ]
+    paragraphs = [_new_paragraph(p) for p in result["paragraphs"]]
 
     return {
         "report_title": result["report_title"],
@@ -65,4 +72,84 @@ def generate_structure(state: AgentState, config: RunnableConfig) -> Dict[str, A
         "current_paragraph_index": 0,
         "reflection_count": 0,
         "max_reflections": config["configurable"].get("max_reflections", 2)
-    }
\ No newline at end of file
+    }
+
+
+def _paragraph_event(idx: int, paragraph: Dict[str, Any]) -> Dict[str, Any]:
+    """流式生成大纲时每个段落闭合推送的自定义事件"""
+    return {
+        "node": "structure_paragraph",
+        "paragraph_index": idx,
+        "paragraph": {"title": paragraph["title"], "content": paragraph["content"]}
+    }
+
+
+def _paragraph_prefetcher(config: RunnableConfig, idx: int):
+    """
+    返回应提前开始段落 idx 初始搜索的预取器,不需要预取时返回 None
+
+    只预取窗口内的前几个段落;批量规划查询时首次搜索使用规划节点给出的查询,此时不在这里预取
+    """
+    configurable = config["configurable"]
+    prefetcher = configurable.get("search_prefetcher")
+    if prefetcher is None or configurable.get("batch_query_planning") or idx >= prefetcher.lookahead:
+        return None
+    return prefetcher
+
+
+def generate_structure(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+
+    llm_client = config["configurable"]["llm_client"]
+
+    # 构建提示词
+    messages = _build_structure_messages(state)
+
+    if not config["configurable"].get("stream_structure"):
+        # 调用 LLM
+        result = llm_client.chat(messages, json_schema=STRUCTURE_SCHEMA, cache_node="generate_structure")
+        return _structure_update(result, config)
+
+    # 流式生成:每个段落闭合即推送事件并开始预取,不等待整个大纲
+    writer = get_stream_writer()
+    result = None
+    idx = 0
+    for kind, value in llm_client.stream_structured(messages, STRUCTURE_SCHEMA, ("paragraphs",),
+                                                    cache_node="generate_structure"):
+        if kind == "result":
+            result = value
+            continue
+        writer(_paragraph_event(idx, value))
+        prefetcher = _paragraph_prefetcher(config, idx)
+        if prefetcher is not None:
+            prefetcher.schedule_paragraph(state["query"], _new_paragraph(value), idx, config)
+        idx += 1
+
+    return _structure_update(result, config)
+
+
+async def agenerate_structure(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """generate_structure 的异步版本"""
+
+    llm_client = config["configurable"]["llm_client"]
+
+    messages = _build_structure_messages(state)
+
+    if not config["configurable"].get("stream_structure"):
+        result = await llm_client.achat(messages, json_schema=STRUCTURE_SCHEMA, cache_node="generate_structure")
+        return _structure_update(result, config)
+
+    writer = get_stream_writer()
+    result = None
+    idx = 0
+    async for kind, value in llm_client.astream_structured(messages, STRUCTURE_SCHEMA, ("paragraphs",),
+                                                           cache_node="generate_structure"):
+        if kind == "result":
+            result = value
+            continue
+        writer(_paragraph_event(idx, value))
+        prefetcher = _paragraph_prefetcher(config, idx)
+        if prefetcher is not None:
+            prefetcher.aschedule_paragraph(state["query"], _new_paragraph(value), idx, config)
+        idx += 1
+
+    return _structure_update(result, config)
@@ -2,32 +2,184 @@
 总结节点
 负责基于搜索结果生成段落总结
 """
-from typing import Dict, Any
-from ..state import AgentState
+from typing import Dict, Any, List, Optional, Tuple
+from ..state import AgentState, replace_paragraph
 from langgraph.types import RunnableConfig
 
+# 总结输出的 JSON Schema(初始总结与反思总结共用)
+SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"}
+    },
+    "required": ["summary"]
+}
+
+# 增量总结输出的 JSON Schema:更新后的总结 + 新增证据要点
+INCREMENTAL_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "new_claims": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "claim": {"type": "string"},
+                    "sources": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["claim", "sources"]
+            }
+        }
+    },
+    "required": ["summary", "new_claims"]
+}
+
+# 提示词中最多列出的已有证据条数(只保留最近的部分,完整清单仍保存在状态中)
+MAX_LEDGER_CLAIMS = 40
+
+
+def _format_results(results: List[Dict[str, Any]], config: RunnableConfig) -> List[str]:
+    """
+    在上下文 token 预算内格式化搜索结果(初始总结与反思总结共用),并记录被裁掉的 token 数
+    """
+    return _format_results_kept(results, config)[0]
+
+
+def _format_results_kept(results: List[Dict[str, Any]],
+                         config: RunnableConfig) -> Tuple[List[str], List[int]]:
+    """
+    同 _format_results,并返回正文进入提示词的结果下标(因预算不足被整条丢弃的结果不在其中)
+    """
+    from ...utils.text_processing import format_search_results_with_budget
+    from ...utils.metrics import record_context_tokens
+    from ...utils.blob_store import load_results
+
+    configurable = config["configurable"]
+    # 搜索历史中的正文可能已移入正文存储,在这里按需加载
+    results = load_results(results, configurable.get("blob_store"))
+    formatted_results, report = format_search_results_with_budget(
+        results,
+        max_length=configurable.get("max_content_length", 20000),
+        token_budget=configurable.get("max_context_tokens")
+    )
+    if report is None:
+        return formatted_results, [i for i, result in enumerate(results) if result.get("content")]
+    record_context_tokens(report.used_tokens, report.dropped_tokens)
+    return formatted_results, report.kept_indices
 
-def initial_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
 
-    llm_client = config["configurable"]["llm_client"]
+def _incremental_enabled(config: RunnableConfig) -> bool:
+    return bool(config["configurable"].get("incremental_summary", False))
+
 
-    # 导入文本处理工具
-    from ...utils.text_processing import format_search_results_for_prompt
+def _pending_results(paragraph: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """段落中尚未纳入总结的搜索结果(按来源编号判断)"""
+    summarized = set(paragraph.get("summarized_sources") or [])
+    return [
+        result
+        for record in paragraph["search_history"]
+        for result in record["results"]
+        if result.get("source_id") and result["source_id"] not in summarized
+    ]
+
+
+def _format_ledger(evidence: List[Dict[str, Any]]) -> str:
+    """把证据清单压缩为每条一行的文本"""
+    if not evidence:
+        return "(尚无)"
+    lines = [
+        f"- {item['claim']} [{', '.join(item.get('sources') or [])}]"
+        for item in evidence[-MAX_LEDGER_CLAIMS:]
+    ]
+    return "\n".join(lines)
 
+
+def _build_incremental_messages(state: AgentState,
+                                config: RunnableConfig) -> Optional[Tuple[List[Dict[str, str]], List[str]]]:
+    """
+    构建增量总结的提示词:只发送尚未总结过的搜索结果、压缩后的证据清单和当前总结
+
+    Returns:
+        (消息列表, 本次正文进入提示词的来源编号);没有新的搜索结果或预算内放不下任何结果时返回 None
+    """
+    current_idx = state["current_paragraph_index"]
+    current_paragraph = state["paragraphs"][current_idx]
+
+    from ...utils.blob_store import load_results
+
+    pending = _pending_results(current_paragraph)
+    if not pending:
+        return None
+    pending = load_results(pending, config["configurable"].get("blob_store"))
+
+    # 正文前加上来源编号,便于模型在 new_claims 中引用
+    labelled = [{**result, "content": f"[{result['source_id']}] {result.get('content') or ''}"} for result in pending]
+    formatted_results, kept = _format_results_kept(labelled, config)
+    if not formatted_results:
+        return None
+
+    from ...prompts.prompts import SYSTEM_PROMPT_INCREMENTAL_SUMMARY
+
+    user_content = (
+        f"\n\n查询主题: {state['query']}\n"
+        f"段落标题: {current_paragraph['title']}\n"
+        f"段落内容: {current_paragraph['content']}\n"
+        f"当前总结: {current_paragraph['latest_summary'] or '(尚无)'}\n"
+        f"已有证据:\n{_format_ledger(current_paragraph.get('evidence') or [])}\n"
+        f"新增搜索结果: {formatted_results}"
+        + SYSTEM_PROMPT_INCREMENTAL_SUMMARY)
+
+    messages = [
+        {"role": "system", "content": "你是一个专业的内容总结专家。"},
+        {"role": "user", "content": user_content}
+    ]
+    # 只有正文进入了提示词的结果才算已总结;因预算不足被丢弃的结果留待下一轮
+    return messages, [pending[i]["source_id"] for i in kept]
+
+
+def _incremental_update(state: AgentState, response: Dict[str, Any], source_ids: List[str]) -> Dict[str, Any]:
+    """
+    用增量总结更新当前段落:追加新证据并把本次来源标记为已总结
+
+    段落内容保留结构规划时的描述,避免在后续提示词中与当前总结重复
+    """
+    current_idx = state["current_paragraph_index"]
+    known = set(source_ids)
+
+    new_claims = [
+        {"claim": item["claim"], "sources": [s for s in item.get("sources") or [] if s in known]}
+        for item in response.get("new_claims") or []
+        if item.get("claim")
+    ]
+
+    paragraph = state["paragraphs"][current_idx]
+
+    return {
+        "paragraphs": replace_paragraph(
+            state, current_idx,
+            latest_summary=response["summary"],
+            evidence=(paragraph.get("evidence") or []) + new_claims,
+            summarized_sources=(paragraph.get("summarized_sources") or []) + source_ids
+        )
+    }
+
+
+def _build_summary_messages(state: AgentState, config: RunnableConfig) -> Optional[List[Dict[str, str]]]:
+    """构建段落总结的提示词,没有(去重后的)搜索结果时返回 None"""
     current_idx = state["current_paragraph_index"]
     current_paragraph = state["paragraphs"][current_idx]
 
     # 获取最新搜索结果
     if not current_paragraph["search_history"]:
-        return {}  # 没有搜索结果,跳过
+        return None  # 没有搜索结果,跳过
 
     latest_search = current_paragraph["search_history"][-1]
 
-    # 格式化搜索结果
-    formatted_results = format_search_results_for_prompt(
-        latest_search["results"],
-        max_length=config["configurable"].get("max_content_length", 20000)
-    )
+    # 格式化搜索结果;去重后可能没有结果,此时跳过,不用空结果覆盖已有总结
+    formatted_results = _format_results(latest_search["results"], config) if latest_search["results"] else []
+    if not formatted_results:
+        return None
 
     # 导入提示词
     from ...prompts.prompts import SYSTEM_PROMPT_FIRST_SUMMARY
@@ -39,30 +191,62 @@ def initial_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]
         f"搜索查询: {latest_search['query']};\n"
         f"搜索结果: {formatted_results}"
     + SYSTEM_PROMPT_FIRST_SUMMARY)
-    # 生成总结
-    messages = [
+
+    return [
         {"role": "system", "content": "你是一个专业的内容总结专家。"},
         {"role": "user", "content": user_content}
     ]
 
 
+def _summary_update(state: AgentState, summary: str) -> Dict[str, Any]:
+    """用新总结更新当前段落"""
+    current_idx = state["current_paragraph_index"]
 
-    json_schema = {
-        "type": "object",
-        "properties": {
-            "summary": {"type": "string"}
-        },
-        "required": ["summary"]
+    return {
+        "paragraphs": replace_paragraph(state, current_idx, content=summary, latest_summary=summary)
     }
 
-    response = llm_client.chat(messages, json_schema=json_schema)
-    summary = response["summary"]
 
-    # 更新段落内容
-    updated_paragraphs = state["paragraphs"].copy()
-    updated_paragraphs[current_idx]["content"] = summary
-    updated_paragraphs[current_idx]["latest_summary"] = summary
+def initial_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
 
-    return {
-        "paragraphs": updated_paragraphs
-    }
\ No newline at end of file
+    llm_client = config["configurable"]["llm_client"]
+
+    if _incremental_enabled(config):
+        built = _build_incremental_messages(state, config)
+        if built is None:
+            return {}
+        messages, source_ids = built
+        response = llm_client.chat(messages, json_schema=INCREMENTAL_SUMMARY_SCHEMA, cache_node="initial_summary")
+        return _incremental_update(state, response, source_ids)
+
+    messages = _build_summary_messages(state, config)
+    if messages is None:
+        return {}
+
+    # 生成总结
+    response = llm_client.chat(messages, json_schema=SUMMARY_SCHEMA, cache_node="initial_summary")
+
+    return _summary_update(state, response["summary"])
+
+
+async def ainitial_summary(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """initial_summary 的异步版本"""
+
+    llm_client = config["configurable"]["llm_client"]
+
+    if _incremental_enabled(config):
+        built = _build_incremental_messages(state, config)
+        if built is None:
+            return {}
+        messages, source_ids = built
+        response = await llm_client.achat(messages, json_schema=INCREMENTAL_SUMMARY_SCHEMA,
+                                          cache_node="initial_summary")
+        return _incremental_update(state, response, source_ids)
+
+    messages = _build_summary_messages(state, config)
+    if messages is None:
+        return {}
+
+    response = await llm_client.achat(messages, json_schema=SUMMARY_SCHEMA, cache_node="initial_summary")
+
+    return _summary_update(state, response["summary"])
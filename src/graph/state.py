@@ -3,16 +3,49 @@ LangGraph 状态定义
 使用 TypedDict 定义研究过程的状态结构  
 """
 from typing import TypedDict, List, Optional, Annotated, Dict, Any
-from operator import add
+
+
+def merge_paragraphs(left: List["ParagraphState"], right: Any) -> List["ParagraphState"]:
+    """
+    paragraphs 字段的 reducer
+
+    - right 为 list: 整体替换(结构生成时创建段落列表)
+    - right 为 dict {段落索引: ParagraphState}: 仅按索引替换对应段落(节点与并行分支写回修改过的段落)
+
+    返回新列表,未修改的段落对象在新旧列表间共享,旧列表与其中的段落保持不变
+    """
+    if isinstance(right, dict):
+        merged = list(left or [])
+        for idx, paragraph in right.items():
+            merged[int(idx)] = paragraph
+        return merged
+    return right
+
+
+def replace_paragraph(state: "AgentState", idx: int, **changes: Any) -> Dict[int, "ParagraphState"]:
+    """
+    写时复制地修改一个段落
+
+    返回 {段落索引: 新段落},交给 merge_paragraphs 按索引写回。原段落及其中的列表都不被修改,
+    已产出的状态快照(流式事件、检查点、界面历史)因此保持不变;修改列表字段时须传入新列表
+    """
+    return {idx: {**state["paragraphs"][idx], **changes}}
 
 
 class SearchRecord(TypedDict):
     """单次搜索记录"""
     query: str
+    queries: List[str]  # 本步执行的全部查询(每步多查询时多于一个,query 为其中的主查询)
     results: List[Dict[str, Any]]
     timestamp: str
 
 
+class EvidenceClaim(TypedDict):
+    """证据清单中的一条要点"""
+    claim: str
+    sources: List[str]  # 搜索结果的 source_id,如 "S3"
+
+
 class ParagraphState(TypedDict):
     """段落状态"""
     title: str
@@ -21,6 +54,14 @@ class ParagraphState(TypedDict):
     latest_summary: str
     completed: bool
     reflection_count: int
+    # 增量总结: 已提炼的证据清单与已纳入总结的搜索结果编号
+    evidence: List[EvidenceClaim]
+    summarized_sources: List[str]
+    # 提前结束反思: 每轮反思的收益分数,收益低于阈值后标记为已收敛
+    reflection_gains: List[float]
+    converged: bool
+    # 批量规划的首次搜索查询(为空时 initial_search 自行生成)
+    planned_query: str
 
 
 class AgentState(TypedDict):
@@ -30,8 +71,7 @@ class AgentState(TypedDict):
 
     # 报告结构  
     report_title: str
-    # paragraphs: Annotated[List[ParagraphState], add]  # 使用 add reducer 合并段落列表
-    paragraphs: List[ParagraphState]  
+    paragraphs: Annotated[List[ParagraphState], merge_paragraphs]
 
     # 流程控制  
     current_paragraph_index: int
@@ -40,4 +80,13 @@ class AgentState(TypedDict):
 
     # 输出  
     final_report: Optional[str]
-    completed: bool  
\ No newline at end of file
+    completed: bool
+
+
+class ParagraphTask(TypedDict):
+    """并行模式下单个段落分支的输入(通过 Send 分发)"""
+    query: str
+    report_title: str
+    paragraphs: List[ParagraphState]
+    paragraph_index: int
+    max_reflections: int
@@ -1,12 +1,27 @@
 """
 LLM调用模块
 支持多种大语言模型的统一接口
+各客户端在首次访问时导入,避免 import 时加载 openai / httpx
 """
+import importlib
 
 from .base import BaseLLM
-# from .deepseek import DeepSeekLLM
-from .openai_llm import OpenAILLM
+
+# 导出名 → 所在子模块
+_LAZY_EXPORTS = {
+    # "DeepSeekLLM": ".deepseek",
+    "OpenAILLM": ".openai_llm",
+    "AsyncOpenAILLM": ".async_openai_llm",
+}
 
 # __all__ = ["BaseLLM", "DeepSeekLLM", "OpenAILLM"]
 
-__all__ = ["BaseLLM",  "OpenAILLM"]
\ No newline at end of file
+__all__ = ["BaseLLM",  "OpenAILLM", "AsyncOpenAILLM"]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
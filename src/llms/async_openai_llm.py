@@ -0,0 +1,249 @@
+"""
+异步 OpenAI LLM 客户端实现
+基于共享的 AsyncOpenAI 客户端与 HTTP 连接池,使单个事件循环可以同时驱动大量研究会话
+"""
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional, Dict, Any, List, AsyncIterator, Sequence, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from .base import items_at_path
+from .openai_llm import OpenAILLM
+from .response_cache import LLMResponseCache
+from ..utils.limiter import RateLimiter
+from ..utils.metrics import record_llm_call
+
+
+class AsyncOpenAILLM(OpenAILLM):
+    """
+    异步 OpenAI LLM 客户端
+
+    同时支持同步 chat(继承自 OpenAILLM)与异步 achat。
+    相同 api_key / base_url / 连接池参数的实例在同一事件循环内共享一个 AsyncOpenAI 客户端,
+    从而复用 keep-alive 连接。
+    """
+
+    # 事件循环 → {客户端键: AsyncOpenAI};httpx 异步连接绑定在创建它的事件循环上
+    _shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncOpenAI]]" = \
+        weakref.WeakKeyDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, api_key: str, model_name: str = "gpt-4o-mini", base_url: Optional[str] = None,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 600.0,
+                 response_cache: Optional[LLMResponseCache] = None,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        初始化异步 OpenAI 客户端
+
+        Args:
+            api_key: OpenAI API 密钥
+            model_name: 模型名称,默认 gpt-4o-mini
+            base_url: 自定义 API 端点(可选,用于兼容 OpenAI 格式的其他服务)
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 保持 keep-alive 的最大空闲连接数
+            keepalive_expiry: 空闲连接保活时间(秒)
+            timeout: 单次请求超时时间(秒)
+            response_cache: LLM 响应缓存(可选)
+            limiter: 全局限流器(可选)
+        """
+        super().__init__(api_key, model_name, base_url, response_cache, limiter)
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+
+    def _client_key(self) -> tuple:
+        return (
+            self.api_key,
+            self.base_url,
+            self.max_connections,
+            self.max_keepalive_connections,
+            self.keepalive_expiry,
+            self.timeout,
+        )
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        """获取当前事件循环上共享的 AsyncOpenAI 客户端,不存在则创建"""
+        loop = asyncio.get_running_loop()
+        key = self._client_key()
+
+        with self._shared_lock:
+            clients = self._shared_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections,
+                        keepalive_expiry=self.keepalive_expiry
+                    ),
+                    timeout=self.timeout
+                )
+                client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client,
+                                     **self._client_retry_options())
+                clients[key] = client
+            return client
+
+    async def _acreate(self, params: Dict[str, Any], estimated_tokens: int) -> Any:
+        """_create 的异步版本"""
+        create = self._get_async_client().chat.completions.create
+        if not self.limiter:
+            return await create(**params)
+        if params.get("stream"):
+            return self.limiter.astream(create, tokens=estimated_tokens, **params)
+        return await self.limiter.acall(create, tokens=estimated_tokens, **params)
+
+    async def achat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """
+        chat 的原生异步版本
+
+        Args:
+            messages: 消息列表
+            json_schema: JSON Schema 定义,用于结构化输出
+            **kwargs: 其他参数(temperature, max_tokens 等)
+
+        Returns:
+            解析后的 JSON 对象(如果提供了 json_schema)或字符串响应
+        """
+        try:
+            cache_key = self._response_cache_key(messages, json_schema, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    return cached
+
+            params = self._build_params(messages, json_schema, **kwargs)
+
+            estimated_tokens = self._estimate_tokens(messages)
+            start = time.perf_counter()
+            response = await self._acreate(params, estimated_tokens)
+            self._record_usage(response, estimated_tokens, time.perf_counter() - start)
+
+            result = self._parse_response(response, json_schema)
+            if cache_key:
+                self.response_cache.set(cache_key, result)
+            return result
+
+        except Exception as e:
+            print(f"OpenAI API 调用错误: {str(e)}")
+            raise e
+
+    async def astream_chat(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """
+        stream_chat 的原生异步版本
+
+        Args:
+            messages: 消息列表
+            **kwargs: 其他参数(temperature, max_tokens 等)
+
+        Yields:
+            文本片段;命中缓存时一次性返回完整文本
+        """
+        try:
+            cache_key = self._response_cache_key(messages, None, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    yield cached
+                    return
+
+            params = self._build_params(messages, **kwargs)
+            self._enable_stream(params)
+            estimated_tokens = self._estimate_tokens(messages)
+
+            chunks = []
+            usage = None
+            start = time.perf_counter()
+            async for event in await self._acreate(params, estimated_tokens):
+                usage = getattr(event, "usage", None) or usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+
+            self._record_stream_usage(chunks, usage, estimated_tokens, time.perf_counter() - start)
+
+            if cache_key:
+                self.response_cache.set(cache_key, "".join(chunks))
+
+        except Exception as e:
+            print(f"OpenAI API 流式调用错误: {str(e)}")
+            raise e
+
+    async def astream_structured(self, messages: List[Dict[str, str]], json_schema: Dict,
+                                 item_path: Sequence[str], **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        stream_structured 的原生异步版本
+
+        Args:
+            messages: 消息列表
+            json_schema: JSON Schema 定义
+            item_path: 从根对象到目标数组经过的键
+            **kwargs: 其他参数(temperature, max_tokens 等)
+
+        Yields:
+            ("item", 数组元素) 按生成顺序逐个返回,最后一条为 ("result", 完整的解析结果)
+        """
+        from ..utils.json_stream import JSONArrayStreamParser
+
+        try:
+            cache_key = self._response_cache_key(messages, json_schema, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    for item in items_at_path(cached, item_path):
+                        yield "item", item
+                    yield "result", cached
+                    return
+
+            params = self._build_params(messages, json_schema, **kwargs)
+            self._enable_stream(params)
+            estimated_tokens = self._estimate_tokens(messages)
+
+            parser = JSONArrayStreamParser(item_path)
+            chunks = []
+            usage = None
+            start = time.perf_counter()
+            async for event in await self._acreate(params, estimated_tokens):
+                usage = getattr(event, "usage", None) or usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    for item in parser.feed(delta):
+                        yield "item", item
+
+            self._record_stream_usage(chunks, usage, estimated_tokens, time.perf_counter() - start)
+
+            result = parser.result()
+            if cache_key:
+                self.response_cache.set(cache_key, result)
+            yield "result", result
+
+        except Exception as e:
+            print(f"OpenAI API 流式调用错误: {str(e)}")
+            raise e
+
+    @classmethod
+    async def aclose_shared_clients(cls) -> None:
+        """关闭当前事件循环上的所有共享客户端(通常在事件循环退出前调用)"""
+        loop = asyncio.get_running_loop()
+        with cls._shared_lock:
+            clients = cls._shared_clients.pop(loop, {})
+        for client in clients.values():
+            await client.close()
+
+    def get_model_info(self) -> str:
+        """返回模型信息"""
+        return f"AsyncOpenAI ({self.model_name})"
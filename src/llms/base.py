@@ -3,8 +3,9 @@ LLM基础抽象类
 定义所有LLM实现需要遵循的接口标准
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, AsyncIterator, Sequence, Tuple
 
 
 class BaseLLM(ABC):
@@ -35,7 +36,75 @@ class BaseLLM(ABC):
             解析后的JSON对象  
         """  
         pass  
+
+    async def achat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """
+        chat 的异步接口
+
+        默认在线程池中执行同步 chat;支持原生异步的子类(如 AsyncOpenAILLM)应覆盖此方法。
+
+        Args:
+            messages: 消息列表
+            json_schema: JSON Schema定义,用于结构化输出
+            **kwargs: 其他参数
+
+        Returns:
+            解析后的JSON对象
+        """
+        return await asyncio.to_thread(self.chat, messages, json_schema, **kwargs)
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """
+        流式调用LLM,逐段返回生成的文本
+
+        默认一次性返回完整的 chat 结果;支持流式输出的子类应覆盖此方法。
+
+        Args:
+            messages: 消息列表
+            **kwargs: 其他参数
+
+        Yields:
+            文本片段
+        """
+        yield self.chat(messages, **kwargs)
+
+    async def astream_chat(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """stream_chat 的异步接口,默认一次性返回完整的 achat 结果"""
+        yield await self.achat(messages, **kwargs)
+
+    def stream_structured(self, messages: List[Dict[str, str]], json_schema: Dict, item_path: Sequence[str],
+                          **kwargs) -> Iterator[Tuple[str, Any]]:
+        """
+        流式结构化输出,item_path 指向的数组元素一生成完就返回
+
+        默认调用 chat 后一次性返回;支持流式输出的子类应覆盖此方法。
+
+        Args:
+            messages: 消息列表
+            json_schema: JSON Schema定义
+            item_path: 从根对象到目标数组经过的键,如 ("paragraphs",)
+            **kwargs: 其他参数
+
+        Yields:
+            ("item", 数组元素) 按生成顺序逐个返回,最后一条为 ("result", 完整的解析结果)
+        """
+        result = self.chat(messages, json_schema=json_schema, **kwargs)
+        for item in items_at_path(result, item_path):
+            yield "item", item
+        yield "result", result
+
+    async def astream_structured(self, messages: List[Dict[str, str]], json_schema: Dict,
+                                 item_path: Sequence[str], **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+        """stream_structured 的异步接口,默认一次性返回完整的 achat 结果"""
+        result = await self.achat(messages, json_schema=json_schema, **kwargs)
+        for item in items_at_path(result, item_path):
+            yield "item", item
+        yield "result", result
         
+    def close(self) -> None:
+        """释放客户端持有的连接,默认无需释放"""
+        pass
+
     @abstractmethod
     def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
         """
@@ -74,3 +143,12 @@ class BaseLLM(ABC):
         if response is None:
             return ""
         return response.strip()
+
+
+def items_at_path(result: Any, item_path: Sequence[str]) -> List[Any]:
+    """取出结果中 item_path 指向的数组,路径不存在时返回空列表"""
+    for key in item_path:
+        if not isinstance(result, dict):
+            return []
+        result = result.get(key)
+    return result if isinstance(result, list) else []
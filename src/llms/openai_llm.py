@@ -1,87 +1,328 @@
-     
-
-
-"""  
-OpenAI LLM 客户端实现  
-支持标准的 chat 接口和 JSON Schema 结构化输出  
-"""  
-from typing import Optional, Dict, Any, List  
-from openai import OpenAI  
-import json  
-  
-  
-class OpenAILLM:  
-    """OpenAI LLM 客户端"""  
-      
-    def __init__(self, api_key: str, model_name: str = "gpt-4o-mini", base_url: Optional[str] = None):  
-        """  
-        初始化 OpenAI 客户端  
-          
-        Args:  
-            api_key: OpenAI API 密钥  
-            model_name: 模型名称,默认 gpt-4o-mini  
-            base_url: 自定义 API 端点(可选,用于兼容 OpenAI 格式的其他服务)  
-        """  
-        self.api_key = api_key  
-        self.model_name = model_name  
-          
-        # 初始化 OpenAI 客户端  
-        if base_url:  
-            self.client = OpenAI(api_key=api_key, base_url=base_url)  
-        else:  
-            self.client = OpenAI(api_key=api_key,base_url="https://api.siliconflow.cn/v1")  
-      
-    def chat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:  
-        """  
-        使用消息列表调用 LLM,支持 JSON Schema 结构化输出  
-          
-        Args:  
-            messages: 消息列表,格式为 [{"role": "system", "content": "..."}, {"role": "user", "content": "..."}]  
-            json_schema: JSON Schema 定义,用于结构化输出  
-            **kwargs: 其他参数(temperature, max_tokens 等)  
-              
-        Returns:  
-            解析后的 JSON 对象(如果提供了 json_schema)或字符串响应  
-        """  
-        try:  
-            # 构建请求参数  
-            params = {  
-                "model": self.model_name,  
-                "messages": messages,  
-                "temperature": kwargs.get("temperature", 0.7),  
-                "max_tokens": kwargs.get("max_tokens", 4000)  
-            }  
-              
-            # 如果提供了 JSON Schema,使用 response_format  
-            if json_schema:  
-                params["response_format"] = {  
-                    "type": "json_schema",  
-                    "json_schema": {  
-                        "name": "response",  
-                        "strict": True,  
-                        "schema": json_schema  
-                    }  
-                }  
-              
-            # 调用 OpenAI API  
-            response = self.client.chat.completions.create(**params)  
-              
-            # 提取响应内容  
-            if response.choices and response.choices[0].message:  
-                content = response.choices[0].message.content  
-                  
-                # 如果使用了 JSON Schema,解析 JSON  
-                if json_schema:  
-                    return json.loads(content)  
-                else:  
-                    return content  
-            else:  
-                raise Exception("OpenAI API 返回空响应")  
-                  
-        except Exception as e:  
-            print(f"OpenAI API 调用错误: {str(e)}")  
-            raise e  
-      
-    def get_model_info(self) -> str:  
-        """返回模型信息"""  
-        return f"OpenAI ({self.model_name})"
\ No newline at end of file
+"""
+OpenAI LLM 客户端实现
+支持标准的 chat 接口和 JSON Schema 结构化输出
+"""
+from typing import Optional, Dict, Any, List, Iterator, Sequence, Tuple, TYPE_CHECKING
+import json
+import threading
+import time
+
+from .base import BaseLLM, items_at_path
+from .response_cache import LLMResponseCache, make_llm_cache_key
+from ..utils.limiter import RateLimiter
+from ..utils.metrics import record_llm_call
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# 默认使用硅基流动的 OpenAI 兼容端点
+DEFAULT_BASE_URL = "https://api.siliconflow.cn/v1"
+
+
+class OpenAILLM(BaseLLM):
+    """OpenAI LLM 客户端"""
+
+    def __init__(self, api_key: str, model_name: str = "gpt-4o-mini", base_url: Optional[str] = None,
+                 response_cache: Optional[LLMResponseCache] = None,
+                 limiter: Optional[RateLimiter] = None):
+        """
+        初始化 OpenAI 客户端
+
+        Args:
+            api_key: OpenAI API 密钥
+            model_name: 模型名称,默认 gpt-4o-mini
+            base_url: 自定义 API 端点(可选,用于兼容 OpenAI 格式的其他服务)
+            response_cache: LLM 响应缓存(可选)
+            limiter: 全局限流器(可选),负责 RPM/TPM 限流、自适应并发与 429 重试
+        """
+        super().__init__(api_key, model_name or self.get_default_model())
+        self.base_url = base_url or DEFAULT_BASE_URL
+        self.response_cache = response_cache
+        self.limiter = limiter
+
+        # OpenAI 客户端在首次请求时创建(openai 包导入较慢,不拖慢 Agent 初始化)
+        self._client: Optional["OpenAI"] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> "OpenAI":
+        """同步 OpenAI 客户端;配置了限流器时由限流器统一负责重试"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                          **self._client_retry_options())
+        return self._client
+
+    def _build_params(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None,
+                      **kwargs) -> Dict[str, Any]:
+        """构建 chat.completions.create 的请求参数"""
+        params = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", 0.7),
+            "max_tokens": kwargs.get("max_tokens", 4000)
+        }
+
+        # 如果提供了 JSON Schema,使用 response_format
+        if json_schema:
+            params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "response",
+                    "strict": True,
+                    "schema": json_schema
+                }
+            }
+
+        return params
+
+    def _response_cache_key(self, messages: List[Dict[str, str]], json_schema: Optional[Dict],
+                            **kwargs) -> Optional[str]:
+        """
+        计算本次调用的缓存键,不走缓存时返回 None
+
+        kwargs 中的 cache_node 标识调用节点,force_cache 强制缓存 temperature > 0 的调用
+        """
+        if self.response_cache is None:
+            return None
+
+        temperature = kwargs.get("temperature", 0.7)
+        if not self.response_cache.should_cache(kwargs.get("cache_node"), temperature,
+                                                kwargs.get("force_cache", False)):
+            return None
+
+        sampling_params = {
+            "temperature": temperature,
+            "max_tokens": kwargs.get("max_tokens", 4000)
+        }
+        return make_llm_cache_key(self.model_name, messages, json_schema, sampling_params)
+
+    def _client_retry_options(self) -> Dict[str, Any]:
+        """配置了限流器时关闭 SDK 自带重试,让 429 由限流器感知并退避"""
+        return {"max_retries": 0} if self.limiter else {}
+
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+        """粗略估计提示词 token 数(中文约 1 字/token,英文约 4 字符/token,取折中)"""
+        return sum(len(m.get("content") or "") for m in messages) // 2
+
+    def _record_usage(self, response: Any, estimated_tokens: int, latency: float) -> None:
+        """记录本次调用的 token 用量与延迟,并按实际用量校正限流器的 token 记账"""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or estimated_tokens
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        record_llm_call(latency, prompt_tokens, completion_tokens)
+
+        if self.limiter and usage is not None and getattr(usage, "total_tokens", None):
+            self.limiter.record_tokens(usage.total_tokens - estimated_tokens)
+
+    def _record_stream_usage(self, chunks: List[str], usage: Any, estimated_tokens: int, latency: float) -> None:
+        """
+        记录流式调用的用量,并按实际用量校正限流器的 token 记账
+
+        服务端不支持 stream_options 而未返回 usage 时按字符数估算(不校正记账)
+        """
+        if usage is None:
+            record_llm_call(latency, estimated_tokens, sum(len(c) for c in chunks) // 2)
+            return
+        record_llm_call(latency, usage.prompt_tokens or 0, usage.completion_tokens or 0)
+        if self.limiter and getattr(usage, "total_tokens", None):
+            self.limiter.record_tokens(usage.total_tokens - estimated_tokens)
+
+    @staticmethod
+    def _enable_stream(params: Dict[str, Any]) -> None:
+        """把请求参数改为流式,并要求服务端在最后一个事件中返回 usage"""
+        params["stream"] = True
+        params["stream_options"] = {"include_usage": True}
+
+    def _create(self, params: Dict[str, Any], estimated_tokens: int) -> Any:
+        """
+        调用 chat.completions.create,配置了限流器时经过限流与重试
+
+        流式请求返回的迭代器在流被消费完或关闭前一直占用限流器的并发槽位
+        """
+        create = self.client.chat.completions.create
+        if not self.limiter:
+            return create(**params)
+        if params.get("stream"):
+            return self.limiter.stream(create, tokens=estimated_tokens, **params)
+        return self.limiter.call(create, tokens=estimated_tokens, **params)
+
+    def _parse_response(self, response: Any, json_schema: Optional[Dict] = None) -> Any:
+        """提取响应内容,提供了 json_schema 时解析为 JSON"""
+        if response.choices and response.choices[0].message:
+            content = response.choices[0].message.content
+
+            # 如果使用了 JSON Schema,解析 JSON
+            if json_schema:
+                return json.loads(content)
+            else:
+                return content
+        else:
+            raise Exception("OpenAI API 返回空响应")
+
+    def chat(self, messages: List[Dict[str, str]], json_schema: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """
+        使用消息列表调用 LLM,支持 JSON Schema 结构化输出
+
+        Args:
+            messages: 消息列表,格式为 [{"role": "system", "content": "..."}, {"role": "user", "content": "..."}]
+            json_schema: JSON Schema 定义,用于结构化输出
+            **kwargs: 其他参数(temperature, max_tokens 等;cache_node / force_cache 控制响应缓存)
+
+        Returns:
+            解析后的 JSON 对象(如果提供了 json_schema)或字符串响应
+        """
+        try:
+            cache_key = self._response_cache_key(messages, json_schema, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    return cached
+
+            params = self._build_params(messages, json_schema, **kwargs)
+
+            # 调用 OpenAI API
+            estimated_tokens = self._estimate_tokens(messages)
+            start = time.perf_counter()
+            response = self._create(params, estimated_tokens)
+            self._record_usage(response, estimated_tokens, time.perf_counter() - start)
+
+            result = self._parse_response(response, json_schema)
+            if cache_key:
+                self.response_cache.set(cache_key, result)
+            return result
+
+        except Exception as e:
+            print(f"OpenAI API 调用错误: {str(e)}")
+            raise e
+
+    def stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> Iterator[str]:
+        """
+        流式调用 LLM,逐段返回生成的文本(不支持 JSON Schema)
+
+        Args:
+            messages: 消息列表
+            **kwargs: 其他参数(temperature, max_tokens 等;cache_node / force_cache 控制响应缓存)
+
+        Yields:
+            文本片段;命中缓存时一次性返回完整文本
+        """
+        try:
+            cache_key = self._response_cache_key(messages, None, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    yield cached
+                    return
+
+            params = self._build_params(messages, **kwargs)
+            self._enable_stream(params)
+            estimated_tokens = self._estimate_tokens(messages)
+
+            # 限流与重试只作用于建立流的请求,已开始输出的流不会重试
+            chunks = []
+            usage = None
+            start = time.perf_counter()
+            for event in self._create(params, estimated_tokens):
+                usage = getattr(event, "usage", None) or usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+
+            self._record_stream_usage(chunks, usage, estimated_tokens, time.perf_counter() - start)
+
+            if cache_key:
+                self.response_cache.set(cache_key, "".join(chunks))
+
+        except Exception as e:
+            print(f"OpenAI API 流式调用错误: {str(e)}")
+            raise e
+
+    def stream_structured(self, messages: List[Dict[str, str]], json_schema: Dict, item_path: Sequence[str],
+                          **kwargs) -> Iterator[Tuple[str, Any]]:
+        """
+        流式结构化输出:边接收边增量解析 JSON,item_path 指向的数组元素一闭合就返回
+
+        与 chat 共用响应缓存(缓存的是解析后的完整结果)
+
+        Args:
+            messages: 消息列表
+            json_schema: JSON Schema 定义
+            item_path: 从根对象到目标数组经过的键,如 ("paragraphs",)
+            **kwargs: 其他参数(temperature, max_tokens 等;cache_node / force_cache 控制响应缓存)
+
+        Yields:
+            ("item", 数组元素) 按生成顺序逐个返回,最后一条为 ("result", 完整的解析结果)
+        """
+        from ..utils.json_stream import JSONArrayStreamParser
+
+        try:
+            cache_key = self._response_cache_key(messages, json_schema, **kwargs)
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    record_llm_call(0.0, cache_hit=True)
+                    for item in items_at_path(cached, item_path):
+                        yield "item", item
+                    yield "result", cached
+                    return
+
+            params = self._build_params(messages, json_schema, **kwargs)
+            self._enable_stream(params)
+            estimated_tokens = self._estimate_tokens(messages)
+
+            parser = JSONArrayStreamParser(item_path)
+            chunks = []
+            usage = None
+            start = time.perf_counter()
+            for event in self._create(params, estimated_tokens):
+                usage = getattr(event, "usage", None) or usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    for item in parser.feed(delta):
+                        yield "item", item
+
+            self._record_stream_usage(chunks, usage, estimated_tokens, time.perf_counter() - start)
+
+            result = parser.result()
+            if cache_key:
+                self.response_cache.set(cache_key, result)
+            yield "result", result
+
+        except Exception as e:
+            print(f"OpenAI API 流式调用错误: {str(e)}")
+            raise e
+
+    def close(self) -> None:
+        """关闭已创建的 OpenAI 客户端及其连接池"""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+        """使用系统提示词和用户输入调用 LLM,返回文本"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        return self.validate_response(self.chat(messages, **kwargs))
+
+    def get_default_model(self) -> str:
+        """返回默认模型名称"""
+        return "gpt-4o-mini"
+
+    def get_model_info(self) -> str:
+        """返回模型信息"""
+        return f"OpenAI ({self.model_name})"
@@ -0,0 +1,76 @@
+"""
+LLM 响应缓存
+以 模型名 + 消息 + JSON Schema + 采样参数 的哈希为键缓存 LLM 响应,使重试与回放几乎零成本
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.cache import BaseCache
+
+
+def make_llm_cache_key(model_name: str, messages: List[Dict[str, str]], json_schema: Optional[Dict],
+                       sampling_params: Dict[str, Any]) -> str:
+    """
+    计算内容寻址的缓存键
+
+    Args:
+        model_name: 模型名称
+        messages: 消息列表
+        json_schema: JSON Schema(可为 None)
+        sampling_params: 影响输出的采样参数(temperature、max_tokens 等)
+
+    Returns:
+        缓存键
+    """
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "messages": messages,
+            "json_schema": json_schema,
+            "params": sampling_params,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return "llm:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLM 响应缓存策略
+
+    - 只缓存 enabled_nodes 中的节点(为 None 时所有节点都可缓存)
+    - temperature > 0 的调用默认不缓存,除非 force 或单次调用传入 force_cache=True
+    """
+
+    def __init__(self, cache: BaseCache, enabled_nodes: Optional[Iterable[str]] = None, force: bool = False):
+        """
+        Args:
+            cache: 底层缓存(内存 / SQLite / 两级)
+            enabled_nodes: 允许缓存的节点名称集合
+            force: 是否对 temperature > 0 的调用也启用缓存
+        """
+        self.cache = cache
+        self.enabled_nodes = set(enabled_nodes) if enabled_nodes is not None else None
+        self.force = force
+
+    def should_cache(self, node: Optional[str], temperature: float, force_cache: bool = False) -> bool:
+        """判断本次调用是否走缓存"""
+        if self.enabled_nodes is not None and node not in self.enabled_nodes:
+            return False
+        if temperature > 0 and not (self.force or force_cache):
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(key, value)
+
+    @property
+    def stats(self):
+        return self.cache.stats
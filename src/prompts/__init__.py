@@ -9,12 +9,16 @@ from .prompts import (
     SYSTEM_PROMPT_FIRST_SUMMARY,
     SYSTEM_PROMPT_REFLECTION,
     SYSTEM_PROMPT_REFLECTION_SUMMARY,
+    SYSTEM_PROMPT_INCREMENTAL_SUMMARY,
+    SYSTEM_PROMPT_BATCH_SEARCH,
     SYSTEM_PROMPT_REPORT_FORMATTING,
     output_schema_report_structure,
     output_schema_first_search,
     output_schema_first_summary,
     output_schema_reflection,
     output_schema_reflection_summary,
+    output_schema_incremental_summary,
+    output_schema_batch_search,
     input_schema_report_formatting
 )
 
@@ -24,11 +28,15 @@ __all__ = [
     "SYSTEM_PROMPT_FIRST_SUMMARY",
     "SYSTEM_PROMPT_REFLECTION",
     "SYSTEM_PROMPT_REFLECTION_SUMMARY",
+    "SYSTEM_PROMPT_INCREMENTAL_SUMMARY",
+    "SYSTEM_PROMPT_BATCH_SEARCH",
     "SYSTEM_PROMPT_REPORT_FORMATTING",
     "output_schema_report_structure",
     "output_schema_first_search",
     "output_schema_first_summary", 
     "output_schema_reflection",
     "output_schema_reflection_summary",
+    "output_schema_incremental_summary",
+    "output_schema_batch_search",
     "input_schema_report_formatting"
 ]
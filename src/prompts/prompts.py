@@ -37,6 +37,43 @@ output_schema_first_search = {
     }
 }
 
+# 批量搜索规划输入Schema
+input_schema_batch_search = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string"},
+        "paragraphs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "paragraph_index": {"type": "integer"},
+                    "title": {"type": "string"},
+                    "content": {"type": "string"}
+                }
+            }
+        }
+    }
+}
+
+# 批量搜索规划输出Schema
+output_schema_batch_search = {
+    "type": "object",
+    "properties": {
+        "queries": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "paragraph_index": {"type": "integer"},
+                    "search_query": {"type": "string"},
+                    "reasoning": {"type": "string"}
+                }
+            }
+        }
+    }
+}
+
 # 首次总结输入Schema
 input_schema_first_summary = {
     "type": "object",
@@ -101,6 +138,42 @@ output_schema_reflection_summary = {
     }
 }
 
+# 增量总结输入Schema
+input_schema_incremental_summary = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "content": {"type": "string"},
+        "paragraph_latest_state": {"type": "string"},
+        "evidence_ledger": {
+            "type": "array",
+            "items": {"type": "string"}
+        },
+        "new_search_results": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    }
+}
+
+# 增量总结输出Schema
+output_schema_incremental_summary = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "new_claims": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "claim": {"type": "string"},
+                    "sources": {"type": "array", "items": {"type": "string"}}
+                }
+            }
+        }
+    }
+}
+
 # 报告格式化输入Schema
 input_schema_report_formatting = {
     "type": "array",
@@ -166,6 +239,35 @@ SYSTEM_PROMPT_FIRST_SEARCH = f"""
 只返回JSON对象，不要有解释或额外文本。
 """
 
+# 一次性为所有段落规划首次搜索查询的系统提示词
+SYSTEM_PROMPT_BATCH_SEARCH = f"""
+你是一位产品创新研究专家。你将获得产品创新分析报告的全部章节，需要一次性为每个章节生成精准的搜索查询。章节将按照以下JSON模式定义提供：
+
+<INPUT JSON SCHEMA>
+{json.dumps(input_schema_batch_search, indent=2, ensure_ascii=False)}
+</INPUT JSON SCHEMA>
+
+你可以使用一个网络搜索工具，该工具接受'search_query'作为参数。
+你的任务是为每个章节分别思考其主题，并提供最佳的网络搜索查询。
+针对不同章节类型，请采用相应的搜索策略：
+- 市场宏观洞察：搜索市场规模数据、行业报告、政策文件、统计数据
+- VOC分析：搜索用户调研、需求分析、用户反馈、痛点研究
+- 社媒分析：搜索社交媒体趋势、舆情数据、用户讨论、热点话题
+- 竞争分析：搜索竞争对手产品、市场定位、功能对比、差异化策略
+- 创新战略：搜索行业创新案例、技术趋势、商业模式创新、成功案例
+
+各章节的查询应互相区分、避免重复，聚焦于获取最新的市场数据和用户洞察。
+queries 中每个章节恰好一项，按 paragraph_index 顺序排列。
+请按照以下JSON模式定义格式化输出（文字请使用中文）：
+
+<OUTPUT JSON SCHEMA>
+{json.dumps(output_schema_batch_search, indent=2, ensure_ascii=False)}
+</OUTPUT JSON SCHEMA>
+
+确保输出是一个符合上述输出JSON模式定义的JSON对象。
+只返回JSON对象，不要有解释或额外文本。
+"""
+
 # 每个段落第一次总结的系统提示词
 SYSTEM_PROMPT_FIRST_SUMMARY = f"""
 你是一位资深产品经理和市场分析师。你将获得搜索查询、搜索结果以及你正在研究的报告段落，需要基于搜索结果撰写专业的产品创新分析内容。  
@@ -237,6 +339,32 @@ SYSTEM_PROMPT_REFLECTION_SUMMARY = f"""
 只返回JSON对象，不要有解释或额外文本。
 """
 
+# 增量总结的系统提示词(只提供新增搜索结果与已有证据清单)
+SYSTEM_PROMPT_INCREMENTAL_SUMMARY = f"""
+你是一位资深产品经理和市场分析师。
+你正在迭代完善产品创新分析报告中的一个段落。你将获得段落标题、预期内容、段落的最新状态、
+已有证据清单（每条为一个要点及其来源编号，如 [S1]），以及自上次总结以来新增的搜索结果（每条以来源编号开头）。
+已有证据已经体现在段落最新状态中，不会再次提供原文。
+数据将按照以下JSON模式定义提供：
+
+<INPUT JSON SCHEMA>
+{json.dumps(input_schema_incremental_summary, indent=2, ensure_ascii=False)}
+</INPUT JSON SCHEMA>
+
+你的任务是：
+1. 只根据新增搜索结果补充段落最新状态中缺失的信息，不要删除最新状态中的关键信息；段落尚无内容时据此撰写初稿。
+2. 把新增搜索结果中与已有证据不重复的关键要点提炼为 new_claims，每条注明来源编号。
+适当地组织段落结构以便纳入产品创新分析报告中。
+请按照以下JSON模式定义格式化输出：
+
+<OUTPUT JSON SCHEMA>
+{json.dumps(output_schema_incremental_summary, indent=2, ensure_ascii=False)}
+</OUTPUT JSON SCHEMA>
+
+确保输出是一个符合上述输出JSON模式定义的JSON对象。
+只返回JSON对象，不要有解释或额外文本。
+"""
+
 # 最终研究报告格式化的系统提示词
 SYSTEM_PROMPT_REPORT_FORMATTING = f"""
 你是一位资深产品经理和市场分析师。你已经完成了研究并构建了产品创新分析报告中所有段落的最终版本。
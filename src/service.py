@@ -0,0 +1,459 @@
+"""
+HTTP 研究服务
+基于标准库 ThreadingHTTPServer:提交研究任务、查询状态、取消任务,并通过 SSE 实时推送节点事件。
+所有任务在有界工作线程池中运行,共享同一个 Agent 的 LLM/搜索客户端、缓存与全局限流器。
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Generator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .agent import DeepSearchAgent
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+# SSE 无新事件时发送心跳的间隔(秒),避免代理断开空闲连接
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+class QueueFullError(Exception):
+    """排队任务已达上限"""
+    pass
+
+
+class ResearchJob:
+    """
+    单个研究任务
+
+    事件按产生顺序追加到 events,序号即列表下标;SSE 客户端断线重连时按序号续传
+    """
+
+    def __init__(self, query: str, save_report: bool = True):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.save_report = save_report
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.report: Optional[str] = None
+        self.run_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self._cancel_requested = threading.Event()
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def request_cancel(self) -> None:
+        self._cancel_requested.set()
+
+    def append_event(self, event: Dict[str, Any]) -> None:
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        with self._condition:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            if status in FINISHED_STATUSES:
+                self.finished_at = time.time()
+            if error is not None:
+                self.error = error
+            self._condition.notify_all()
+
+    def wait_events(self, offset: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        等待 offset 之后的新事件
+
+        Returns:
+            (新事件, 任务是否已结束);超时且无新事件时返回空列表
+        """
+        with self._condition:
+            if len(self.events) <= offset and not self.finished:
+                self._condition.wait(timeout)
+            return self.events[offset:], self.finished
+
+    def to_dict(self, include_report: bool = False) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events),
+            "run_time": self.run_time,
+            "error": self.error,
+        }
+        if include_report:
+            data["report"] = self.report
+        return data
+
+
+class JobManager:
+    """
+    研究任务队列与工作线程池
+
+    同时运行的任务数为 max_workers,另有最多 max_queue 个任务排队,超出时 submit 抛出
+    QueueFullError(背压)。排队中的任务取消后立即结束;运行中的任务在下一个节点事件产生时
+    关闭研究生成器(释放预取等运行期资源),即取消在节点边界生效。已结束的任务保留 job_ttl 秒供查询。
+    """
+
+    def __init__(self, agent: DeepSearchAgent, max_workers: int = 2, max_queue: int = 16,
+                 job_ttl: float = 3600):
+        self.agent = agent
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.job_ttl = job_ttl
+        self._jobs: Dict[str, ResearchJob] = {}
+        self._active = 0      # 排队中 + 运行中的任务数
+        self._closed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="research-job")
+
+    def submit(self, query: str, save_report: bool = True) -> ResearchJob:
+        """提交研究任务,队列已满时抛出 QueueFullError"""
+        job = ResearchJob(query, save_report)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("任务管理器已关闭")
+            self._purge_expired()
+            if self._active >= self.max_workers + self.max_queue:
+                raise QueueFullError(f"任务队列已满(运行 {self.max_workers} + 排队 {self.max_queue})")
+            self._active += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[ResearchJob]:
+        with self._lock:
+            self._purge_expired()
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str) -> Optional[ResearchJob]:
+        """请求取消任务;任务不存在时返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.request_cancel()
+            # 排队中的任务立即结束并释放队列名额,工作线程取到时直接跳过
+            if job.status == QUEUED:
+                job.set_status(CANCELLED)
+                self._active -= 1
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        running = sum(1 for job in jobs if job.status == RUNNING)
+        queued = sum(1 for job in jobs if job.status == QUEUED)
+        return {
+            "running": running,
+            "queued": queued,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+        }
+
+    def events(self, job: ResearchJob, offset: int = 0,
+               heartbeat: float = SSE_HEARTBEAT_SECONDS) -> Generator[Optional[Tuple[int, Dict[str, Any]]], None, None]:
+        """
+        从 offset 开始依次产出 (序号, 事件),任务结束且事件取完后停止
+
+        超过 heartbeat 秒没有新事件时产出 None,供调用方发送心跳
+        """
+        while True:
+            events, finished = job.wait_events(offset, heartbeat)
+            for event in events:
+                yield offset, event
+                offset += 1
+            if finished and not events:
+                return
+            if not events:
+                yield None
+
+    def close(self, cancel: bool = True, wait: bool = False) -> None:
+        """
+        关闭管理器,不再接受新任务
+
+        Args:
+            cancel: 取消所有未结束的任务;为 False 时已提交的任务照常运行完
+            wait: 等待工作线程退出后释放 Agent 持有的连接
+        """
+        with self._lock:
+            self._closed = True
+            jobs = list(self._jobs.values())
+        if cancel:
+            for job in jobs:
+                job.request_cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=cancel)
+        if wait:
+            self.agent.close()
+
+    def _purge_expired(self) -> None:
+        """清理超过保留时间的已结束任务(调用方持有锁)"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > self.job_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job: ResearchJob) -> None:
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.set_status(RUNNING)
+        try:
+            self._run_research(job)
+        except Exception as e:
+            print(f"[service] 任务 {job.id} 失败: {e}")
+            job.set_status(FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _run_research(self, job: ResearchJob) -> None:
+        events = self.agent.research(job.query, save_report=job.save_report)
+        try:
+            for event in events:
+                job.append_event(event)
+                if event["node"] == "completed":
+                    job.report = event["report"]
+                    job.run_time = event["run_time"]
+                elif job.cancel_requested:
+                    print(f"[service] 任务 {job.id} 已取消")
+                    job.set_status(CANCELLED)
+                    return
+        finally:
+            # 取消或出错时关闭生成器,触发研究流程中的清理逻辑
+            events.close()
+        job.set_status(COMPLETED)
+
+
+class ResearchHTTPServer(ThreadingHTTPServer):
+    """每个连接一个线程的 HTTP 服务,持有任务管理器"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], manager: JobManager):
+        super().__init__(address, ResearchRequestHandler)
+        self.manager = manager
+
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    路由:
+        GET    /health              服务状态与队列占用
+        POST   /jobs                提交任务 {"query": ..., "save_report": true}
+        GET    /jobs                任务列表
+        GET    /jobs/{id}           任务状态与最终报告
+        GET    /jobs/{id}/events    SSE 事件流(支持 Last-Event-ID 或 ?from= 续传,?state=false 省略状态快照)
+        DELETE /jobs/{id}           取消任务
+    """
+
+    server: ResearchHTTPServer
+    protocol_version = "HTTP/1.1"
+
+    # -------------------- 路由 --------------------
+
+    def do_GET(self):
+        parts, params = self._route()
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok", **self.server.manager.stats()})
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": [job.to_dict() for job in self.server.manager.list_jobs()]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._get_job(parts[1])
+            if job is not None:
+                self._send_json(200, job.to_dict(include_report=True))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self._get_job(parts[1])
+            if job is not None:
+                self._stream_events(job, params)
+        else:
+            self._send_error(404, "接口不存在")
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if parts != ["jobs"]:
+            self._send_error(404, "接口不存在")
+            return
+
+        body = self._read_json()
+        if body is None:
+            return
+        query = body.get("query")
+        if not isinstance(query, str) or not query.strip():
+            self._send_error(400, "缺少研究问题 query")
+            return
+
+        try:
+            job = self.server.manager.submit(query.strip(), save_report=bool(body.get("save_report", True)))
+        except QueueFullError as e:
+            self._send_error(429, str(e), headers={"Retry-After": "30"})
+            return
+        self._send_json(202, job.to_dict(), headers={"Location": f"/jobs/{job.id}"})
+
+    def do_DELETE(self):
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            self._send_error(404, "接口不存在")
+            return
+        job = self._get_job(parts[1])
+        if job is None:
+            return
+        if job.finished:
+            self._send_json(409, job.to_dict())
+            return
+        self.server.manager.cancel(job.id)
+        self._send_json(202, job.to_dict())
+
+    # -------------------- SSE --------------------
+
+    def _stream_events(self, job: ResearchJob, params: Dict[str, List[str]]) -> None:
+        try:
+            offset = int(self.headers.get("Last-Event-ID") or params.get("from", ["-1"])[0]) + 1
+        except ValueError:
+            self._send_error(400, "事件序号无效")
+            return
+        include_state = params.get("state", ["true"])[0].lower() != "false"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            for item in self.server.manager.events(job, max(0, offset)):
+                if item is None:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    index, event = item
+                    if not include_state and "state" in event:
+                        event = {k: v for k, v in event.items() if k != "state"}
+                    self._write_sse(event["node"], event, index)
+                self.wfile.flush()
+            self._write_sse("end", job.to_dict())
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开不影响任务本身,重连后可按 Last-Event-ID 续传
+            pass
+
+    def _write_sse(self, name: str, data: Dict[str, Any], index: Optional[int] = None) -> None:
+        lines = []
+        if index is not None:
+            lines.append(f"id: {index}")
+        lines.append(f"event: {name}")
+        lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+        self.wfile.write(("\n".join(lines) + "\n\n").encode("utf-8"))
+
+    # -------------------- 工具方法 --------------------
+
+    def _route(self) -> Tuple[List[str], Dict[str, List[str]]]:
+        url = urlsplit(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    def _get_job(self, job_id: str) -> Optional[ResearchJob]:
+        job = self.server.manager.get(job_id)
+        if job is None:
+            self._send_error(404, f"任务不存在: {job_id}")
+        return job
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_error(400, "请求体不是有效的 JSON")
+            return None
+        if not isinstance(body, dict):
+            self._send_error(400, "请求体必须是 JSON 对象")
+            return None
+        return body
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def log_request(self, code="-", size="-") -> None:
+        # SSE 长连接与轮询请求较多,只记录错误响应
+        if str(getattr(code, "value", code)).startswith(("4", "5")):
+            super().log_request(code, size)
+
+
+def create_server(agent: DeepSearchAgent, host: str = "127.0.0.1", port: int = 8000,
+                  max_workers: int = 2, max_queue: int = 16, job_ttl: float = 3600) -> ResearchHTTPServer:
+    """
+    创建研究服务(未启动),调用 serve_forever() 开始处理请求
+
+    Args:
+        agent: 所有任务共享的 Agent
+        host: 监听地址
+        port: 监听端口,0 表示随机端口
+        max_workers: 同时运行的研究任务数
+        max_queue: 排队任务上限
+        job_ttl: 已结束任务保留的秒数
+    """
+    manager = JobManager(agent, max_workers=max_workers, max_queue=max_queue, job_ttl=job_ttl)
+    return ResearchHTTPServer((host, port), manager)
+
+
+def serve(agent: DeepSearchAgent, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """按 Agent 配置启动研究服务并阻塞运行,Ctrl+C 退出"""
+    config = agent.config
+    server = create_server(
+        agent,
+        host=host or config.service_host,
+        port=config.service_port if port is None else port,
+        max_workers=config.service_max_workers,
+        max_queue=config.service_max_queue,
+        job_ttl=config.service_job_ttl
+    )
+    address, bound_port = server.server_address[:2]
+    print(f"研究服务已启动: http://{address}:{bound_port} "
+          f"(并发 {server.manager.max_workers}, 排队上限 {server.manager.max_queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止研究服务...")
+    finally:
+        server.manager.close()
+        server.server_close()
@@ -3,6 +3,24 @@
 提供外部工具接口，如网络搜索等
 """
 
-from .search import tavily_search, SearchResult
+from .search import (
+    tavily_search,
+    atavily_search,
+    multi_tavily_search,
+    amulti_tavily_search,
+    fuse_search_results,
+    SearchResult,
+    TavilySearch,
+    TavilyClientPool
+)
 
-__all__ = ["tavily_search", "SearchResult"]
+__all__ = [
+    "tavily_search",
+    "atavily_search",
+    "multi_tavily_search",
+    "amulti_tavily_search",
+    "fuse_search_results",
+    "SearchResult",
+    "TavilySearch",
+    "TavilyClientPool"
+]
@@ -3,10 +3,30 @@
 支持多种搜索引擎，主要使用Tavily搜索
 """
 
+import asyncio
+import contextvars
+import hashlib
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from dataclasses import dataclass
-from tavily import TavilyClient
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.dedup import canonicalize_url
+from ..utils.metrics import record_search_call
+
+if TYPE_CHECKING:
+    from ..utils.cache import BaseCache
+    from ..utils.limiter import RateLimiter
 
 
 @dataclass
@@ -27,25 +47,126 @@ class SearchResult:
         }
 
 
+# Tavily 搜索 REST 端点
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+
+def _create_session(pool_maxsize: int) -> requests.Session:
+    """创建带连接池的 HTTP 会话,复用 TCP/TLS 连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> None:
+    """在 client 所属的事件循环上调度 aclose();循环已关闭时连接随循环一并失效,无需处理"""
+    if loop.is_closed():
+        return
+    try:
+        loop.call_soon_threadsafe(lambda: loop.create_task(client.aclose()))
+    except RuntimeError:
+        # 事件循环在检查之后被关闭
+        pass
+
+
 class TavilySearch:
     """Tavily搜索客户端封装"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, pool_maxsize: int = 10):
         """
         初始化Tavily搜索客户端
         
         Args:
             api_key: Tavily API密钥，如果不提供则从环境变量读取
+            pool_maxsize: HTTP 连接池大小(同一客户端可并发复用的连接数)
         """
         if api_key is None:
             api_key = os.getenv("TAVILY_API_KEY")
             if not api_key:
                 raise ValueError("Tavily API Key未找到！请设置TAVILY_API_KEY环境变量或在初始化时提供")
         
-        self.client = TavilyClient(api_key=api_key)
+        self.api_key = api_key
+        self.pool_maxsize = pool_maxsize
+        self.headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        # requests.Session 的连接池是线程安全的,可被多个线程共享
+        self.session = _create_session(pool_maxsize)
+        # 事件循环 → httpx.AsyncClient;异步连接绑定在创建它的事件循环上
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    @staticmethod
+    def _build_payload(query: str, max_results: int, include_raw_content: bool) -> Dict[str, Any]:
+        return {
+            "query": query,
+            "max_results": max_results,
+            "include_raw_content": include_raw_content
+        }
+
+    @staticmethod
+    def _parse_results(response: Dict[str, Any]) -> List[SearchResult]:
+        """解析 Tavily 响应为 SearchResult 列表"""
+        results = []
+        if 'results' in response:
+            for item in response['results']:
+                result = SearchResult(
+                    title=item.get('title', ''),
+                    url=item.get('url', ''),
+                    content=item.get('content', ''),
+                    score=item.get('score')
+                )
+                results.append(result)
+        return results
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """获取当前事件循环上的 httpx.AsyncClient,不存在则创建"""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    headers=self.headers,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_maxsize,
+                        max_keepalive_connections=self.pool_maxsize
+                    )
+                )
+                self._async_clients[loop] = client
+            return client
+
+    def close(self) -> None:
+        """
+        关闭 HTTP 会话及各事件循环上的 httpx.AsyncClient
+
+        异步客户端只能在所属事件循环内关闭,因此只调度 aclose() 而不等待;
+        正在进行的请求可能因此失败。
+        """
+        self.session.close()
+        with self._async_lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, client in clients:
+            _close_async_client(loop, client)
     
+    def _post(self, payload: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+        """发送一次搜索请求,HTTP 错误(包括 429)以异常抛出,供限流器判断是否重试"""
+        response = self.session.post(TAVILY_SEARCH_URL, json=payload, headers=self.headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def _apost(self, payload: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+        """_post 的异步版本"""
+        response = await self._get_async_client().post(TAVILY_SEARCH_URL, json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
     def search(self, query: str, max_results: int = 5, include_raw_content: bool = True, 
-               timeout: int = 240) -> List[SearchResult]:
+               timeout: int = 240, limiter: Optional["RateLimiter"] = None) -> List[SearchResult]:
         """
         执行搜索
         
@@ -54,40 +175,130 @@ class TavilySearch:
             max_results: 最大结果数量
             include_raw_content: 是否包含原始内容
             timeout: 超时时间（秒）
+            limiter: 全局限流器(可选)，负责限流与 429 退避重试
             
         Returns:
             搜索结果列表
         """
         try:
             # 调用Tavily API
-            response = self.client.search(
-                query=query,
-                max_results=max_results,
-                include_raw_content=include_raw_content,
-                timeout=timeout
-            )
+            payload = self._build_payload(query, max_results, include_raw_content)
+            if limiter:
+                data = limiter.call(self._post, payload, timeout)
+            else:
+                data = self._post(payload, timeout)
             
             # 解析结果
-            results = []
-            if 'results' in response:
-                for item in response['results']:
-                    result = SearchResult(
-                        title=item.get('title', ''),
-                        url=item.get('url', ''),
-                        content=item.get('content', ''),
-                        score=item.get('score')
-                    )
-                    results.append(result)
-            
-            return results
+            return self._parse_results(data)
             
         except Exception as e:
             print(f"搜索错误: {str(e)}")
             return []
 
+    async def asearch(self, query: str, max_results: int = 5, include_raw_content: bool = True,
+                      timeout: int = 240, limiter: Optional["RateLimiter"] = None) -> List[SearchResult]:
+        """
+        search 的异步版本,同一事件循环内的并发搜索共享连接
+
+        Args:
+            query: 搜索查询
+            max_results: 最大结果数量
+            include_raw_content: 是否包含原始内容
+            timeout: 超时时间（秒）
+            limiter: 全局限流器(可选)
+
+        Returns:
+            搜索结果列表
+        """
+        try:
+            payload = self._build_payload(query, max_results, include_raw_content)
+            if limiter:
+                data = await limiter.acall(self._apost, payload, timeout)
+            else:
+                data = await self._apost(payload, timeout)
+
+            return self._parse_results(data)
+
+        except Exception as e:
+            print(f"搜索错误: {str(e)}")
+            return []
+
+
+class TavilyClientPool:
+    """
+    按 API Key 复用的 Tavily 客户端池
+
+    每个 API Key 对应一个长期存活的 TavilySearch(及其 HTTP 连接池);
+    超过 max_size 时按最近最少使用淘汰并关闭其连接。线程安全。
+    """
+
+    def __init__(self, max_size: int = 16, pool_maxsize: int = 10):
+        """
+        Args:
+            max_size: 池中最多保留的客户端(API Key)数量
+            pool_maxsize: 每个客户端的 HTTP 连接池大小
+        """
+        self.max_size = max_size
+        self.pool_maxsize = pool_maxsize
+        self._clients: "OrderedDict[str, TavilySearch]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str) -> TavilySearch:
+        """获取 api_key 对应的客户端,不存在则创建"""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = TavilySearch(api_key, pool_maxsize=self.pool_maxsize)
+                self._clients[api_key] = client
+                evicted = self._evict()
+            else:
+                self._clients.move_to_end(api_key)
+                evicted = []
+        # 在锁外关闭被淘汰的客户端
+        _close_clients(evicted)
+        return client
+
+    def put(self, api_key: str, client: TavilySearch) -> None:
+        """注册指定客户端(如自定义实现)"""
+        with self._lock:
+            previous = self._clients.get(api_key)
+            self._clients[api_key] = client
+            self._clients.move_to_end(api_key)
+            evicted = self._evict()
+        if previous is not None and previous is not client:
+            evicted.append(previous)
+        _close_clients(evicted)
+
+    def _evict(self) -> List[TavilySearch]:
+        """按最近最少使用弹出超出 max_size 的客户端(调用方需持有锁)"""
+        evicted = []
+        while len(self._clients) > self.max_size:
+            evicted.append(self._clients.popitem(last=False)[1])
+        return evicted
+
+    def clear(self) -> None:
+        """清空客户端池并关闭所有客户端"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        _close_clients(clients)
+
+    def close(self) -> None:
+        """关闭客户端池,释放所有 HTTP 连接"""
+        self.clear()
+
+
+def _close_clients(clients: List[TavilySearch]) -> None:
+    """关闭一组客户端;自定义实现(如测试替身)可能没有 close 方法"""
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close is not None:
+            close()
+
 
 # 全局搜索客户端实例
 _tavily_client = None
+_client_pool = TavilyClientPool()
 
 
 def get_tavily_client() -> TavilySearch:
@@ -98,8 +309,34 @@ def get_tavily_client() -> TavilySearch:
     return _tavily_client
 
 
+def get_client_pool() -> TavilyClientPool:
+    """获取全局Tavily客户端池"""
+    return _client_pool
+
+
+def _resolve_client(api_key: Optional[str]) -> TavilySearch:
+    """提供了 API 密钥时使用池中的客户端,否则使用全局客户端"""
+    if api_key:
+        return _client_pool.get(api_key)
+    return get_tavily_client()
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询:全半角统一、大小写折叠、合并空白"""
+    query = unicodedata.normalize("NFKC", query)
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+def make_search_cache_key(query: str, max_results: int, include_raw_content: bool) -> str:
+    """搜索缓存键:规范化查询 + max_results + include_raw_content"""
+    raw = f"{normalize_query(query)}\x1f{max_results}\x1f{int(bool(include_raw_content))}"
+    return "search:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def tavily_search(query: str, max_results: int = 5, include_raw_content: bool = True, 
-                  timeout: int = 240, api_key: Optional[str] = None) -> List[Dict[str, Any]]:
+                  timeout: int = 240, api_key: Optional[str] = None,
+                  cache: Optional["BaseCache"] = None,
+                  limiter: Optional["RateLimiter"] = None) -> List[Dict[str, Any]]:
     """
     便捷的Tavily搜索函数
     
@@ -108,29 +345,148 @@ def tavily_search(query: str, max_results: int = 5, include_raw_content: bool =
         max_results: 最大结果数量
         include_raw_content: 是否包含原始内容
         timeout: 超时时间（秒）
-        api_key: Tavily API密钥，如果提供则使用此密钥，否则使用全局客户端
+        api_key: Tavily API密钥，如果提供则使用客户端池中对应的客户端，否则使用全局客户端
+        cache: 搜索结果缓存(可选)，命中时不再调用 Tavily
+        limiter: 全局限流器(可选)，限制 Tavily 请求速率与并发，遇到 429 时退避重试
         
     Returns:
         搜索结果字典列表，保持与原始经验贴兼容的格式
     """
     try:
-        if api_key:
-            # 使用提供的API密钥创建临时客户端
-            client = TavilySearch(api_key)
-        else:
-            # 使用全局客户端
-            client = get_tavily_client()
+        cache_key = make_search_cache_key(query, max_results, include_raw_content) if cache else None
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                record_search_call(0.0, cached, cache_hit=True)
+                return [dict(item) for item in cached]
+
+        client = _resolve_client(api_key)
         
-        results = client.search(query, max_results, include_raw_content, timeout)
+        start = time.perf_counter()
+        results = client.search(query, max_results, include_raw_content, timeout, limiter=limiter)
+        latency = time.perf_counter() - start
         
         # 转换为字典格式以保持兼容性
-        return [result.to_dict() for result in results]
+        result_dicts = [result.to_dict() for result in results]
+        record_search_call(latency, result_dicts)
+
+        # 空结果可能是临时错误,不写入缓存
+        if cache_key and result_dicts:
+            cache.set(cache_key, result_dicts)
+        return result_dicts
         
     except Exception as e:
         print(f"搜索功能调用错误: {str(e)}")
         return []
 
 
+async def atavily_search(query: str, max_results: int = 5, include_raw_content: bool = True,
+                         timeout: int = 240, api_key: Optional[str] = None,
+                         cache: Optional["BaseCache"] = None,
+                         limiter: Optional["RateLimiter"] = None) -> List[Dict[str, Any]]:
+    """
+    tavily_search 的异步版本,参数与返回值相同
+    """
+    try:
+        cache_key = make_search_cache_key(query, max_results, include_raw_content) if cache else None
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                record_search_call(0.0, cached, cache_hit=True)
+                return [dict(item) for item in cached]
+
+        client = _resolve_client(api_key)
+
+        start = time.perf_counter()
+        results = await client.asearch(query, max_results, include_raw_content, timeout, limiter=limiter)
+        latency = time.perf_counter() - start
+
+        result_dicts = [result.to_dict() for result in results]
+        record_search_call(latency, result_dicts)
+        if cache_key and result_dicts:
+            cache.set(cache_key, result_dicts)
+        return result_dicts
+
+    except Exception as e:
+        print(f"搜索功能调用错误: {str(e)}")
+        return []
+
+
+# 倒数排名融合的平滑常数(Cormack et al. 2009 的常用取值)
+RRF_K = 60
+
+
+def fuse_search_results(result_lists: List[List[Dict[str, Any]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    用倒数排名融合(RRF)合并多个查询的结果列表
+
+    同一规范化 URL 只保留一条(保留正文最长的版本与最高的原始分数),
+    按融合分数 sum(1 / (k + rank)) 降序排列,融合分数写入 rrf_score 字段
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scores: Dict[str, float] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            key = canonicalize_url(result.get("url", "")) or f"{result.get('title', '')}#{rank}"
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            kept = fused.get(key)
+            if kept is None:
+                fused[key] = dict(result)
+                continue
+            if len(result.get("content") or "") > len(kept.get("content") or ""):
+                fused[key] = {**result, "score": kept.get("score")}
+            if (result.get("score") or 0.0) > (fused[key].get("score") or 0.0):
+                fused[key]["score"] = result["score"]
+
+    ordered = sorted(fused, key=lambda key: scores[key], reverse=True)
+    return [{**fused[key], "rrf_score": round(scores[key], 6)} for key in ordered]
+
+
+# 多查询搜索共享的线程池(首次使用时创建);实际并发仍由搜索限流器控制
+MULTI_SEARCH_MAX_WORKERS = 16
+_multi_search_executor: Optional[ThreadPoolExecutor] = None
+_multi_search_lock = threading.Lock()
+
+
+def _get_multi_search_executor() -> ThreadPoolExecutor:
+    global _multi_search_executor
+    if _multi_search_executor is None:
+        with _multi_search_lock:
+            if _multi_search_executor is None:
+                _multi_search_executor = ThreadPoolExecutor(max_workers=MULTI_SEARCH_MAX_WORKERS,
+                                                            thread_name_prefix="multi-search")
+    return _multi_search_executor
+
+
+def multi_tavily_search(queries: List[str], **kwargs) -> List[Dict[str, Any]]:
+    """
+    并发执行多个查询并用 RRF 融合结果,参数同 tavily_search
+
+    只有一个查询时等同于 tavily_search。第一个查询在当前线程执行,其余交给共享线程池;
+    并发上限仍由 limiter 控制
+    """
+    if len(queries) <= 1:
+        return tavily_search(queries[0], **kwargs) if queries else []
+
+    # 每个任务复制当前上下文,使搜索指标记到发起搜索的节点上
+    executor = _get_multi_search_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, tavily_search, query, **kwargs)
+        for query in queries[1:]
+    ]
+    result_lists = [tavily_search(queries[0], **kwargs)] + [future.result() for future in futures]
+    return fuse_search_results(result_lists)
+
+
+async def amulti_tavily_search(queries: List[str], **kwargs) -> List[Dict[str, Any]]:
+    """multi_tavily_search 的异步版本"""
+    if len(queries) <= 1:
+        return await atavily_search(queries[0], **kwargs) if queries else []
+
+    result_lists = await asyncio.gather(*(atavily_search(query, **kwargs) for query in queries))
+    return fuse_search_results(list(result_lists))
+
+
 def test_search(query: str = "人工智能发展趋势 2025", max_results: int = 3):
     """
     测试搜索功能
@@ -9,7 +9,8 @@ from .text_processing import (
     remove_reasoning_from_output,
     extract_clean_response,
     update_state_with_search_results,
-    format_search_results_for_prompt
+    format_search_results_for_prompt,
+    format_search_results_with_budget
 )
 
 from .config import Config, load_config
@@ -21,6 +22,7 @@ __all__ = [
     "extract_clean_response",
     "update_state_with_search_results",
     "format_search_results_for_prompt",
+    "format_search_results_with_budget",
     "Config",
     "load_config"
 ]
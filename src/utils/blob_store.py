@@ -0,0 +1,239 @@
+"""
+搜索结果正文存储
+正文按内容哈希存入内存或磁盘,状态中的搜索历史只保留元数据与引用,
+由需要正文的节点(总结、去重、反思收益评估)按需加载
+"""
+
+import hashlib
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+# 正文引用字段名;compact 后的结果用它代替 content
+CONTENT_REF = "content_ref"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BaseBlobStore(ABC):
+    """内容寻址的文本存储,相同正文只存一份"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bytes_stored = 0
+        self.reads = 0
+
+    @abstractmethod
+    def _write(self, key: str, text: str) -> bool:
+        """写入正文,已存在时返回 False"""
+        pass
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[str]:
+        pass
+
+    def put(self, text: str) -> str:
+        """存入正文并返回引用"""
+        key = content_hash(text)
+        if self._write(key, text):
+            with self._lock:
+                self.bytes_stored += len(text.encode("utf-8"))
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self.reads += 1
+        return self._read(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """批量读取,缺失的引用不出现在结果中"""
+        found = {}
+        for key in set(keys):
+            text = self.get(key)
+            if text is not None:
+                found[key] = text
+        return found
+
+
+class MemoryBlobStore(BaseBlobStore):
+    """进程内存储(单次运行内使用)"""
+
+    def __init__(self):
+        super().__init__()
+        self._blobs: Dict[str, str] = {}
+
+    def _write(self, key: str, text: str) -> bool:
+        with self._lock:
+            if key in self._blobs:
+                return False
+            self._blobs[key] = text
+            return True
+
+    def _read(self, key: str) -> Optional[str]:
+        return self._blobs.get(key)
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+class DiskBlobStore(BaseBlobStore):
+    """
+    磁盘存储,正文经 zlib 压缩后按哈希前两位分目录保存
+
+    跨进程可用,启用检查点时从中断处恢复也能读到之前的正文。
+    目录大小与文件保留时间有上限:创建时以及每写入约 1/10 上限的数据后清理一次,
+    先删除超过 ttl 未访问的文件,再按最近访问时间从旧到新删除直到低于 max_bytes。
+    被清理的正文在加载时按空内容处理(见 load_results)。
+    """
+
+    def __init__(self, directory: str = ".cache/search_blobs", compress_level: int = 6,
+                 max_bytes: int = 512 * 1024 * 1024, ttl: float = 7 * 86400):
+        """
+        Args:
+            directory: 存储目录
+            compress_level: zlib 压缩级别
+            max_bytes: 目录中压缩后文件的总大小上限,0 表示不限制
+            ttl: 文件自最近一次读写起的保留时间(秒),0 表示不过期
+        """
+        super().__init__()
+        self.directory = directory
+        self.compress_level = compress_level
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._written_since_prune = 0
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _write(self, key: str, text: str) -> bool:
+        path = self._path(key)
+        if os.path.exists(path):
+            # 重复写入视为一次访问,延后其过期与淘汰
+            os.utime(path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = zlib.compress(text.encode("utf-8"), self.compress_level)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._written_since_prune += len(data)
+            due = self.max_bytes and self._written_since_prune > self.max_bytes // 10
+            if due:
+                self._written_since_prune = 0
+        if due:
+            self.prune()
+        return True
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except (FileNotFoundError, zlib.error):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def prune(self) -> int:
+        """
+        删除过期文件并把目录大小降到 max_bytes 以下
+
+        Returns:
+            删除的文件数
+        """
+        if not self.max_bytes and not self.ttl:
+            return 0
+
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        now = time.time()
+        removed = 0
+        total = sum(size for _, size, _ in files)
+        # 从最久未访问的文件开始删除
+        for mtime, size, path in sorted(files):
+            expired = self.ttl and now - mtime > self.ttl
+            if not expired and (not self.max_bytes or total <= self.max_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def create_blob_store(backend: str, path: Optional[str] = None, max_mb: int = 512,
+                      ttl: float = 7 * 86400) -> Optional[BaseBlobStore]:
+    """
+    按配置创建正文存储
+
+    Args:
+        backend: none / memory / disk
+        path: disk 后端的目录
+        max_mb: disk 后端的目录大小上限(MB),0 表示不限制
+        ttl: disk 后端文件的保留时间(秒),0 表示不过期
+    """
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryBlobStore()
+    if backend == "disk":
+        return DiskBlobStore(path or ".cache/search_blobs", max_bytes=max_mb * 1024 * 1024, ttl=ttl)
+    raise ValueError(f"不支持的正文存储后端: {backend}")
+
+
+def compact_results(results: List[Dict[str, Any]], store: BaseBlobStore) -> List[Dict[str, Any]]:
+    """把结果正文移入存储,只保留元数据、正文长度与引用"""
+    compacted = []
+    for result in results:
+        content = result.get("content")
+        if content is None:
+            compacted.append(result)
+            continue
+        meta = {k: v for k, v in result.items() if k != "content"}
+        meta[CONTENT_REF] = store.put(content)
+        meta["content_chars"] = len(content)
+        compacted.append(meta)
+    return compacted
+
+
+def load_results(results: List[Dict[str, Any]], store: Optional[BaseBlobStore]) -> List[Dict[str, Any]]:
+    """
+    为 compact 过的结果补回正文(未 compact 的结果原样返回)
+
+    引用缺失(例如内存存储在进程重启后丢失)时正文为空字符串
+    """
+    refs = [r[CONTENT_REF] for r in results if "content" not in r and CONTENT_REF in r]
+    if not refs:
+        return results
+    contents = store.get_many(refs) if store is not None else {}
+    missing = len(set(refs) - set(contents))
+    if missing:
+        print(f"警告: {missing} 条搜索结果正文缺失,按空内容处理")
+    return [
+        result if "content" in result or CONTENT_REF not in result
+        else {**result, "content": contents.get(result[CONTENT_REF], "")}
+        for result in results
+    ]
@@ -0,0 +1,268 @@
+"""
+通用缓存模块
+提供内存 LRU、SQLite 磁盘以及两级组合缓存,支持按条目 TTL、容量上限与命中统计
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class BaseCache(ABC):
+    """缓存抽象类,值需可 JSON 序列化"""
+
+    def __init__(self, default_ttl: Optional[float] = None):
+        """
+        Args:
+            default_ttl: 默认过期时间(秒),None 表示永不过期
+        """
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存,未命中或已过期时返回 None"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存,ttl 为 None 时使用默认过期时间"""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空缓存"""
+        pass
+
+    def close(self) -> None:
+        """释放底层资源(内存缓存无需释放)"""
+        pass
+
+
+class MemoryCache(BaseCache):
+    """内存 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 1000, default_ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: 最大条目数,超出时淘汰最久未使用的条目
+            default_ttl: 默认过期时间(秒)
+        """
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._expires_at(ttl))
+            self._entries.move_to_end(key)
+            self.stats.sets += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """SQLite 磁盘缓存,进程重启后仍然有效"""
+
+    def __init__(self, path: str, max_entries: int = 10000, default_ttl: Optional[float] = None,
+                 table: str = "cache"):
+        """
+        Args:
+            path: 数据库文件路径
+            max_entries: 最大条目数,超出时按最近访问时间淘汰
+            default_ttl: 默认过期时间(秒)
+            table: 表名,不同用途的缓存可共用同一数据库文件
+        """
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table} (accessed_at)"
+            )
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """读取缓存及其过期时间戳,未命中或已过期时返回 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value, expires_at = row
+                if expires_at is None or expires_at > now:
+                    with self._conn:
+                        self._conn.execute(
+                            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                    self.stats.hits += 1
+                    return json.loads(value), expires_at
+                with self._conn:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.stats.misses += 1
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, self._expires_at(ttl), time.time())
+            )
+            self.stats.sets += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """删除过期条目,并把条目数压回 max_entries 以内(调用方持有锁)"""
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        )
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.stats.evictions += overflow
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache(BaseCache):
+    """两级缓存:先查内存,未命中再查磁盘并回填内存"""
+
+    def __init__(self, memory: MemoryCache, disk: SQLiteCache):
+        super().__init__(disk.default_ttl)
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                # 回填内存层,沿用磁盘条目的剩余有效期
+                value, expires_at = entry
+                self.memory.set(key, value, ttl=(expires_at - time.time()) if expires_at else 0)
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+        with self._lock:
+            self.stats.sets += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+
+def create_cache(backend: str, path: Optional[str] = None, max_entries: int = 1000,
+                 default_ttl: Optional[float] = None, table: str = "cache") -> Optional[BaseCache]:
+    """
+    按名称创建缓存
+
+    Args:
+        backend: "none" / "memory" / "sqlite" / "tiered"
+        path: SQLite 数据库路径(sqlite / tiered 需要)
+        max_entries: 每一层的最大条目数
+        default_ttl: 默认过期时间(秒)
+        table: SQLite 表名
+
+    Returns:
+        缓存对象,backend 为 "none" 时返回 None
+    """
+    backend = (backend or "none").lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, default_ttl=default_ttl)
+    if backend in ("sqlite", "tiered"):
+        if not path:
+            raise ValueError(f"缓存后端 {backend} 需要提供数据库路径")
+        disk = SQLiteCache(path, max_entries=max_entries, default_ttl=default_ttl, table=table)
+        if backend == "sqlite":
+            return disk
+        return TieredCache(MemoryCache(max_entries=max_entries, default_ttl=default_ttl), disk)
+    raise ValueError(f"不支持的缓存后端: {backend}")
@@ -20,20 +20,84 @@ class Config:
     default_llm_provider: str = "deepseek"  # deepseek 或 openai
     deepseek_model: str = "deepseek-chat"
     openai_model: str = "gpt-4o-mini"
+
+    # 异步LLM连接池配置
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+
+    # LLM 响应缓存(默认关闭): none / memory / sqlite / tiered
+    llm_cache_backend: str = "none"
+    llm_cache_path: str = ".cache/llm_cache.db"
+    llm_cache_ttl: int = 0  # 秒,0 表示永不过期
+    llm_cache_max_entries: int = 2000
+    llm_cache_nodes: str = ""  # 逗号分隔的节点名,为空表示所有节点
+    llm_cache_force: bool = False  # temperature > 0 时也缓存
     
     # 搜索配置
     
     max_search_results: int = 3
     search_timeout: int = 60
     max_content_length: int = 20000
+    max_context_tokens: int = 8000  # 每次总结提示词中搜索结果的总 token 预算,0 表示只按字符截断
+    search_dedup: str = "paragraph"  # 搜索结果去重范围: none / paragraph / run
+    search_dedup_threshold: int = 5  # 近似重复的 SimHash 海明距离阈值
+    search_queries_per_step: int = 1  # 每个搜索步骤生成并并发执行的查询数,结果按 RRF 融合
+    incremental_summary: bool = False  # 增量总结: 只发送未总结过的搜索结果,并维护证据清单
+    batch_query_planning: bool = False  # 结构生成后一次性为所有段落规划首次搜索查询
+    search_prefetch_lookahead: int = 0  # 顺序模式下提前预取后续段落初始搜索的段落数,0 表示不预取
+    stream_structure: bool = False  # 流式生成报告结构,段落闭合即推送事件并在预取窗口内开始搜索
+    reflection_min_gain: float = 0.0  # 反思边际收益(0~1)低于该值时提前结束,0 表示总是跑满 max_reflections
+
+    # 搜索结果缓存: none / memory / sqlite / tiered(内存 + SQLite)
+    search_cache_backend: str = "memory"
+    search_cache_path: str = ".cache/search_cache.db"
+    search_cache_ttl: int = 86400  # 秒
+    search_cache_max_entries: int = 1000
+
+    # 搜索结果正文存储: none(正文留在状态中) / memory / disk;状态中只保留元数据与正文引用
+    search_blob_store: str = "memory"
+    search_blob_path: str = ".cache/search_blobs"
+    search_blob_max_mb: int = 512  # disk 存储的目录大小上限,超出时按最近访问时间淘汰,0 表示不限制
+    search_blob_ttl: int = 604800  # disk 存储中正文的保留时间(秒),0 表示不过期
     
     # Agent配置
     max_reflections: int = 2
     max_paragraphs: int = 5
+    parallel_paragraphs: bool = False  # 段落并行研究
+    max_paragraph_concurrency: int = 4  # 并行模式下同时运行的段落分支上限
+
+    # 全局并发上限(同一 Agent 上的所有研究任务共享)
+    llm_max_concurrency: int = 8
+    search_max_concurrency: int = 8
+
+    # 限流与重试配置(0 表示不限制)
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    search_requests_per_minute: int = 0
+    llm_target_latency: float = 60.0
+    rate_limit_max_retries: int = 5
+
+    # 运行指标配置
+    metrics_export: str = "none"  # none / jsonl / prometheus
+    metrics_path: str = "reports/metrics.jsonl"
+    llm_prompt_price_per_1k: float = 0.0
+    llm_completion_price_per_1k: float = 0.0
     
     # 输出配置
     output_dir: str = "reports"
     save_intermediate_states: bool = False
+
+    # 检查点配置(SQLite,本地持久化,支持按 thread_id 恢复)
+    checkpoint_enabled: bool = False
+    checkpoint_path: str = ".cache/checkpoints.db"
+
+    # HTTP 服务配置(server.py)
+    service_host: str = "127.0.0.1"
+    service_port: int = 8000
+    service_max_workers: int = 2   # 同时运行的研究任务数
+    service_max_queue: int = 16    # 排队任务上限,超出时拒绝提交
+    service_job_ttl: int = 3600    # 已结束任务保留的秒数
     
     def validate(self) -> bool:
         """验证配置"""
@@ -71,13 +135,59 @@ class Config:
                 default_llm_provider=getattr(config_module, "DEFAULT_LLM_PROVIDER", "deepseek"),
                 deepseek_model=getattr(config_module, "DEEPSEEK_MODEL", "deepseek-chat"),
                 openai_model=getattr(config_module, "OPENAI_MODEL", "gpt-4o-mini"),
+                llm_max_connections=getattr(config_module, "LLM_MAX_CONNECTIONS", 100),
+                llm_max_keepalive_connections=getattr(config_module, "LLM_MAX_KEEPALIVE_CONNECTIONS", 20),
+                llm_keepalive_expiry=getattr(config_module, "LLM_KEEPALIVE_EXPIRY", 30.0),
+                llm_cache_backend=getattr(config_module, "LLM_CACHE_BACKEND", "none"),
+                llm_cache_path=getattr(config_module, "LLM_CACHE_PATH", ".cache/llm_cache.db"),
+                llm_cache_ttl=getattr(config_module, "LLM_CACHE_TTL", 0),
+                llm_cache_max_entries=getattr(config_module, "LLM_CACHE_MAX_ENTRIES", 2000),
+                llm_cache_nodes=getattr(config_module, "LLM_CACHE_NODES", ""),
+                llm_cache_force=getattr(config_module, "LLM_CACHE_FORCE", False),
                 max_search_results=getattr(config_module, "SEARCH_RESULTS_PER_QUERY", 3),
                 search_timeout=getattr(config_module, "SEARCH_TIMEOUT", 240),
                 max_content_length=getattr(config_module, "SEARCH_CONTENT_MAX_LENGTH", 20000),
+                max_context_tokens=getattr(config_module, "SEARCH_CONTEXT_MAX_TOKENS", 8000),
+                search_dedup=getattr(config_module, "SEARCH_DEDUP", "paragraph"),
+                search_dedup_threshold=getattr(config_module, "SEARCH_DEDUP_THRESHOLD", 5),
+                search_queries_per_step=getattr(config_module, "SEARCH_QUERIES_PER_STEP", 1),
+                incremental_summary=getattr(config_module, "INCREMENTAL_SUMMARY", False),
+                reflection_min_gain=getattr(config_module, "REFLECTION_MIN_GAIN", 0.0),
+                search_prefetch_lookahead=getattr(config_module, "SEARCH_PREFETCH_LOOKAHEAD", 0),
+                stream_structure=getattr(config_module, "STREAM_STRUCTURE", False),
+                batch_query_planning=getattr(config_module, "BATCH_QUERY_PLANNING", False),
+                search_cache_backend=getattr(config_module, "SEARCH_CACHE_BACKEND", "memory"),
+                search_cache_path=getattr(config_module, "SEARCH_CACHE_PATH", ".cache/search_cache.db"),
+                search_cache_ttl=getattr(config_module, "SEARCH_CACHE_TTL", 86400),
+                search_cache_max_entries=getattr(config_module, "SEARCH_CACHE_MAX_ENTRIES", 1000),
+                search_blob_store=getattr(config_module, "SEARCH_BLOB_STORE", "memory"),
+                search_blob_path=getattr(config_module, "SEARCH_BLOB_PATH", ".cache/search_blobs"),
+                search_blob_max_mb=getattr(config_module, "SEARCH_BLOB_MAX_MB", 512),
+                search_blob_ttl=getattr(config_module, "SEARCH_BLOB_TTL", 604800),
                 max_reflections=getattr(config_module, "MAX_REFLECTIONS", 2),
                 max_paragraphs=getattr(config_module, "MAX_PARAGRAPHS", 5),
+                parallel_paragraphs=getattr(config_module, "PARALLEL_PARAGRAPHS", False),
+                max_paragraph_concurrency=getattr(config_module, "MAX_PARAGRAPH_CONCURRENCY", 4),
+                llm_max_concurrency=getattr(config_module, "LLM_MAX_CONCURRENCY", 8),
+                search_max_concurrency=getattr(config_module, "SEARCH_MAX_CONCURRENCY", 8),
+                llm_requests_per_minute=getattr(config_module, "LLM_REQUESTS_PER_MINUTE", 0),
+                llm_tokens_per_minute=getattr(config_module, "LLM_TOKENS_PER_MINUTE", 0),
+                search_requests_per_minute=getattr(config_module, "SEARCH_REQUESTS_PER_MINUTE", 0),
+                llm_target_latency=getattr(config_module, "LLM_TARGET_LATENCY", 60.0),
+                rate_limit_max_retries=getattr(config_module, "RATE_LIMIT_MAX_RETRIES", 5),
+                metrics_export=getattr(config_module, "METRICS_EXPORT", "none"),
+                metrics_path=getattr(config_module, "METRICS_PATH", "reports/metrics.jsonl"),
+                llm_prompt_price_per_1k=getattr(config_module, "LLM_PROMPT_PRICE_PER_1K", 0.0),
+                llm_completion_price_per_1k=getattr(config_module, "LLM_COMPLETION_PRICE_PER_1K", 0.0),
                 output_dir=getattr(config_module, "OUTPUT_DIR", "reports"),
-                save_intermediate_states=getattr(config_module, "SAVE_INTERMEDIATE_STATES", False)
+                save_intermediate_states=getattr(config_module, "SAVE_INTERMEDIATE_STATES", False),
+                checkpoint_enabled=getattr(config_module, "CHECKPOINT_ENABLED", False),
+                checkpoint_path=getattr(config_module, "CHECKPOINT_PATH", ".cache/checkpoints.db"),
+                service_host=getattr(config_module, "SERVICE_HOST", "127.0.0.1"),
+                service_port=getattr(config_module, "SERVICE_PORT", 8000),
+                service_max_workers=getattr(config_module, "SERVICE_MAX_WORKERS", 2),
+                service_max_queue=getattr(config_module, "SERVICE_MAX_QUEUE", 16),
+                service_job_ttl=getattr(config_module, "SERVICE_JOB_TTL", 3600)
             )
         else:
             # .env格式配置文件
@@ -98,13 +208,59 @@ class Config:
                 default_llm_provider=config_dict.get("DEFAULT_LLM_PROVIDER", "deepseek"),
                 deepseek_model=config_dict.get("DEEPSEEK_MODEL", "deepseek-chat"),
                 openai_model=config_dict.get("OPENAI_MODEL", "gpt-4o-mini"),
+                llm_max_connections=int(config_dict.get("LLM_MAX_CONNECTIONS", "100")),
+                llm_max_keepalive_connections=int(config_dict.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                llm_keepalive_expiry=float(config_dict.get("LLM_KEEPALIVE_EXPIRY", "30")),
+                llm_cache_backend=config_dict.get("LLM_CACHE_BACKEND", "none"),
+                llm_cache_path=config_dict.get("LLM_CACHE_PATH", ".cache/llm_cache.db"),
+                llm_cache_ttl=int(config_dict.get("LLM_CACHE_TTL", "0")),
+                llm_cache_max_entries=int(config_dict.get("LLM_CACHE_MAX_ENTRIES", "2000")),
+                llm_cache_nodes=config_dict.get("LLM_CACHE_NODES", ""),
+                llm_cache_force=config_dict.get("LLM_CACHE_FORCE", "false").lower() == "true",
                 max_search_results=int(config_dict.get("SEARCH_RESULTS_PER_QUERY", "3")),
                 search_timeout=int(config_dict.get("SEARCH_TIMEOUT", "240")),
                 max_content_length=int(config_dict.get("SEARCH_CONTENT_MAX_LENGTH", "20000")),
+                max_context_tokens=int(config_dict.get("SEARCH_CONTEXT_MAX_TOKENS", "8000")),
+                search_dedup=config_dict.get("SEARCH_DEDUP", "paragraph"),
+                search_dedup_threshold=int(config_dict.get("SEARCH_DEDUP_THRESHOLD", "5")),
+                search_queries_per_step=int(config_dict.get("SEARCH_QUERIES_PER_STEP", "1")),
+                incremental_summary=config_dict.get("INCREMENTAL_SUMMARY", "false").lower() == "true",
+                reflection_min_gain=float(config_dict.get("REFLECTION_MIN_GAIN", "0")),
+                search_prefetch_lookahead=int(config_dict.get("SEARCH_PREFETCH_LOOKAHEAD", "0")),
+                stream_structure=config_dict.get("STREAM_STRUCTURE", "false").lower() == "true",
+                batch_query_planning=config_dict.get("BATCH_QUERY_PLANNING", "false").lower() == "true",
+                search_cache_backend=config_dict.get("SEARCH_CACHE_BACKEND", "memory"),
+                search_cache_path=config_dict.get("SEARCH_CACHE_PATH", ".cache/search_cache.db"),
+                search_cache_ttl=int(config_dict.get("SEARCH_CACHE_TTL", "86400")),
+                search_cache_max_entries=int(config_dict.get("SEARCH_CACHE_MAX_ENTRIES", "1000")),
+                search_blob_store=config_dict.get("SEARCH_BLOB_STORE", "memory"),
+                search_blob_path=config_dict.get("SEARCH_BLOB_PATH", ".cache/search_blobs"),
+                search_blob_max_mb=int(config_dict.get("SEARCH_BLOB_MAX_MB", "512")),
+                search_blob_ttl=int(config_dict.get("SEARCH_BLOB_TTL", "604800")),
                 max_reflections=int(config_dict.get("MAX_REFLECTIONS", "2")),
                 max_paragraphs=int(config_dict.get("MAX_PARAGRAPHS", "5")),
+                parallel_paragraphs=config_dict.get("PARALLEL_PARAGRAPHS", "false").lower() == "true",
+                max_paragraph_concurrency=int(config_dict.get("MAX_PARAGRAPH_CONCURRENCY", "4")),
+                llm_max_concurrency=int(config_dict.get("LLM_MAX_CONCURRENCY", "8")),
+                search_max_concurrency=int(config_dict.get("SEARCH_MAX_CONCURRENCY", "8")),
+                llm_requests_per_minute=int(config_dict.get("LLM_REQUESTS_PER_MINUTE", "0")),
+                llm_tokens_per_minute=int(config_dict.get("LLM_TOKENS_PER_MINUTE", "0")),
+                search_requests_per_minute=int(config_dict.get("SEARCH_REQUESTS_PER_MINUTE", "0")),
+                llm_target_latency=float(config_dict.get("LLM_TARGET_LATENCY", "60.0")),
+                rate_limit_max_retries=int(config_dict.get("RATE_LIMIT_MAX_RETRIES", "5")),
+                metrics_export=config_dict.get("METRICS_EXPORT", "none"),
+                metrics_path=config_dict.get("METRICS_PATH", "reports/metrics.jsonl"),
+                llm_prompt_price_per_1k=float(config_dict.get("LLM_PROMPT_PRICE_PER_1K", "0.0")),
+                llm_completion_price_per_1k=float(config_dict.get("LLM_COMPLETION_PRICE_PER_1K", "0.0")),
                 output_dir=config_dict.get("OUTPUT_DIR", "reports"),
-                save_intermediate_states=config_dict.get("SAVE_INTERMEDIATE_STATES", "true").lower() == "true"
+                save_intermediate_states=config_dict.get("SAVE_INTERMEDIATE_STATES", "true").lower() == "true",
+                checkpoint_enabled=config_dict.get("CHECKPOINT_ENABLED", "false").lower() == "true",
+                checkpoint_path=config_dict.get("CHECKPOINT_PATH", ".cache/checkpoints.db"),
+                service_host=config_dict.get("SERVICE_HOST", "127.0.0.1"),
+                service_port=int(config_dict.get("SERVICE_PORT", "8000")),
+                service_max_workers=int(config_dict.get("SERVICE_MAX_WORKERS", "2")),
+                service_max_queue=int(config_dict.get("SERVICE_MAX_QUEUE", "16")),
+                service_job_ttl=int(config_dict.get("SERVICE_JOB_TTL", "3600"))
             )
 
 
@@ -152,10 +308,30 @@ def print_config(config: Config):
     print(f"最大搜索结果数: {config.max_search_results}")
     print(f"搜索超时: {config.search_timeout}秒")
     print(f"最大内容长度: {config.max_content_length}")
-    print(f"最大反思次数: {config.max_reflections}")
+    print(f"搜索结果 token 预算: {config.max_context_tokens or '不限'}")
+    print(f"搜索结果去重: {config.search_dedup}")
+    print(f"每步查询数: {config.search_queries_per_step}")
+    print(f"增量总结: {config.incremental_summary}")
+    print(f"批量规划搜索查询: {config.batch_query_planning}")
+    print(f"搜索预取窗口: {config.search_prefetch_lookahead or '关闭'}")
+    print(f"流式生成报告结构: {config.stream_structure}")
+    print(f"搜索缓存: {config.search_cache_backend} (TTL {config.search_cache_ttl}秒)")
+    print(f"搜索正文存储: {config.search_blob_store} (disk 上限 {config.search_blob_max_mb or '不限'}MB, "
+          f"保留 {config.search_blob_ttl or '不限'}秒)")
+    print(f"LLM响应缓存: {config.llm_cache_backend} (temperature > 0 时也缓存: {config.llm_cache_force})")
+    print(f"最大反思次数: {config.max_reflections} (提前结束阈值 {config.reflection_min_gain or '关闭'})")
     print(f"最大段落数: {config.max_paragraphs}")
+    print(f"段落并行: {config.parallel_paragraphs} (并发上限 {config.max_paragraph_concurrency})")
+    print(f"全局并发上限: LLM {config.llm_max_concurrency} / 搜索 {config.search_max_concurrency}")
+    print(f"限流: LLM {config.llm_requests_per_minute or '不限'} RPM / "
+          f"{config.llm_tokens_per_minute or '不限'} TPM, 搜索 {config.search_requests_per_minute or '不限'} RPM, "
+          f"最大重试 {config.rate_limit_max_retries} 次")
+    print(f"指标导出: {config.metrics_export}" + (f" ({config.metrics_path})" if config.metrics_export != "none" else ""))
     print(f"输出目录: {config.output_dir}")
     print(f"保存中间状态: {config.save_intermediate_states}")
+    print(f"检查点: {'已启用 (' + config.checkpoint_path + ')' if config.checkpoint_enabled else '未启用'}")
+    print(f"HTTP 服务: {config.service_host}:{config.service_port} "
+          f"(并发 {config.service_max_workers}, 排队上限 {config.service_max_queue})")
     
     # 显示API密钥状态（不显示实际密钥）
     print(f"DeepSeek API Key: {'已设置' if config.deepseek_api_key else '未设置'}")
@@ -0,0 +1,219 @@
+"""
+搜索结果去重
+URL 规范化 + SimHash 内容指纹,识别同一次研究中重复出现的网页与镜像文章
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 不影响页面内容的跟踪参数(另有 utm_* 前缀);ref / source / from / share 等常带有
+# 日期范围、分支或文章版本等内容信息,不在此列,以免不同页面被规范化为同一 URL
+_TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "igshid", "mc_cid", "mc_eid",
+    "spm", "scm", "_ga", "_gl",
+}
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# 指纹前的文本归一化:去掉空白与标点,只保留文字
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+SIMHASH_BITS = 64
+_SHINGLE_SIZE = 4
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    URL 规范化
+
+    忽略协议(http/https)、大小写主机名、www 前缀、默认端口、锚点、跟踪参数、
+    查询参数顺序与末尾斜杠
+    """
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    host = (parts.hostname or "").lower()
+    if not host:
+        return url.strip()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port if parts.port is not None else None
+    if port is not None and str(port) != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith("utm_")
+    ]
+    query.sort()
+
+    return urlunsplit(("", host, path, urlencode(query), ""))[2:]
+
+
+def _shingles(text: str) -> List[str]:
+    normalized = _NON_WORD_PATTERN.sub("", unicodedata.normalize("NFKC", text).casefold())
+    if len(normalized) <= _SHINGLE_SIZE:
+        return [normalized] if normalized else []
+    return [normalized[i:i + _SHINGLE_SIZE] for i in range(len(normalized) - _SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> int:
+    """计算文本的 64 位 SimHash 指纹(字符 4-gram,对中英文都适用)"""
+    shingles = set(_shingles(text))
+    if not shingles:
+        return 0
+
+    # 每个 shingle 的哈希转为 64 位二进制串,按列统计 1 的个数,过半则该位为 1
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for s in shingles
+    ]
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit, column in enumerate(zip(*hashes)):
+        if column.count("1") > half:
+            fingerprint |= 1 << (SIMHASH_BITS - 1 - bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class DedupReport:
+    """一次去重的统计"""
+    input_results: int = 0
+    kept_results: int = 0
+    duplicate_urls: int = 0
+    near_duplicates: int = 0
+    saved_tokens: int = 0
+
+    @property
+    def dropped_results(self) -> int:
+        return self.duplicate_urls + self.near_duplicates
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "dropped_results": self.dropped_results}
+
+
+class _ScopeIndex:
+    """
+    单个去重范围内的 URL 集合与指纹分段索引
+
+    指纹切成 threshold + 1 段,海明距离不超过 threshold 的两个指纹至少有一段完全相同(鸽巢原理),
+    因此只需比较至少一段相同的候选
+    """
+
+    def __init__(self, threshold: int):
+        self.urls = set()
+        self.band_count = threshold + 1
+        self.band_bits = SIMHASH_BITS // self.band_count
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(self.band_count)]
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.band_count)]
+
+    def find_near(self, fingerprint: int, threshold: int) -> bool:
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for candidate in band.get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= threshold:
+                    return True
+        return False
+
+    def add(self, url: str, fingerprint: Optional[int]) -> None:
+        if url:
+            self.urls.add(url)
+        if fingerprint:
+            for band, key in zip(self.bands, self._band_keys(fingerprint)):
+                band.setdefault(key, []).append(fingerprint)
+
+
+class DedupIndex:
+    """
+    单次研究内的搜索结果去重索引
+
+    按 scope 隔离(通常为段落索引;scope 为 None 时整个研究共享一个范围)。
+    先按规范化 URL 判断重复,再按 SimHash 海明距离判断近似重复(镜像、转载)。
+    线程安全,并行模式下多个段落分支可共享同一个索引。
+    """
+
+    def __init__(self, threshold: int = 5, min_content_chars: int = 50):
+        """
+        Args:
+            threshold: 判为近似重复的最大海明距离(64 位指纹下随机文本的期望距离为 32)
+            min_content_chars: 正文短于该长度时不做内容指纹判断
+        """
+        self.threshold = threshold
+        self.min_content_chars = min_content_chars
+        self._scopes: Dict[Hashable, _ScopeIndex] = {}
+        self._lock = threading.Lock()
+
+    def has_scope(self, scope: Hashable) -> bool:
+        with self._lock:
+            return scope in self._scopes
+
+    def _fingerprint(self, result: Dict[str, Any]) -> Optional[int]:
+        content = result.get("content") or ""
+        return simhash(content) if len(content) >= self.min_content_chars else None
+
+    def add(self, results: List[Dict[str, Any]], scope: Hashable = None) -> None:
+        """登记已使用过的结果(例如从检查点恢复的历史搜索结果),不做过滤"""
+        entries = [(canonicalize_url(r.get("url", "")), self._fingerprint(r)) for r in results]
+        with self._lock:
+            index = self._scopes.setdefault(scope, _ScopeIndex(self.threshold))
+            for url, fingerprint in entries:
+                index.add(url, fingerprint)
+
+    def filter(self, results: List[Dict[str, Any]], scope: Hashable = None,
+               counter=None) -> Tuple[List[Dict[str, Any]], DedupReport]:
+        """
+        过滤掉在同一范围内已出现过的结果(同一批次内的重复也会被过滤)
+
+        Args:
+            results: 搜索结果列表
+            scope: 去重范围
+            counter: token 计数函数,用于统计节省的 token 数
+
+        Returns:
+            (保留的结果, 去重统计)
+        """
+        from .token_budget import get_token_counter
+        counter = counter or get_token_counter()
+
+        # 指纹计算较重,放在锁外
+        entries = [(r, canonicalize_url(r.get("url", "")), self._fingerprint(r)) for r in results]
+
+        report = DedupReport(input_results=len(results))
+        kept = []
+        dropped = []
+        with self._lock:
+            index = self._scopes.setdefault(scope, _ScopeIndex(self.threshold))
+            for result, url, fingerprint in entries:
+                if url and url in index.urls:
+                    report.duplicate_urls += 1
+                    dropped.append(result)
+                    continue
+                if fingerprint and index.find_near(fingerprint, self.threshold):
+                    report.near_duplicates += 1
+                    dropped.append(result)
+                    continue
+                index.add(url, fingerprint)
+                kept.append(result)
+
+        report.kept_results = len(kept)
+        report.saved_tokens = sum(counter(r.get("content") or "") for r in dropped)
+        return kept, report
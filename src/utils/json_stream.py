@@ -0,0 +1,179 @@
+"""
+流式 JSON 增量解析
+LLM 以流式返回结构化输出时,边接收边扫描,指定路径上的数组元素一闭合就解析并返回,
+不必等待整个 JSON 生成完毕
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Sequence
+
+# 扫描只关心的字符,普通字符由正则引擎在 C 层跳过
+_TOKEN_PATTERN = re.compile(r'["\\{}\[\],:]')
+_CLOSERS = {"}": "{", "]": "["}
+# _finish_item 没有元素可返回时的标记(元素本身可能是 null)
+_NO_ITEM = object()
+
+
+class _Container:
+    """扫描过程中一个未闭合的对象或数组"""
+    __slots__ = ("kind", "key", "expect_key")
+
+    def __init__(self, kind: str):
+        self.kind = kind            # "{" 或 "["
+        self.key: Optional[str] = None
+        self.expect_key = kind == "{"
+
+
+class JSONArrayStreamParser:
+    """
+    增量解析 JSON 文本,在 item_path 指向的数组中每个元素闭合时立即返回该元素
+
+    item_path 为从根对象到目标数组经过的键,例如报告结构 {"report_title": ..., "paragraphs": [...]}
+    中的段落数组为 ("paragraphs",)。每段文本只扫描一次;根之前的说明文字与代码块标记被忽略。
+
+    用法:
+        parser = JSONArrayStreamParser(("paragraphs",))
+        for chunk in stream:
+            for paragraph in parser.feed(chunk):
+                ...
+        result = parser.result()
+    """
+
+    def __init__(self, item_path: Sequence[str]):
+        self.item_path = list(item_path)
+        self.items_emitted = 0
+        self._chunks: List[str] = []
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._skip_next = False           # 上一段以转义符结尾,跳过本段第一个字符
+        self._done = False                # 根对象已闭合
+        # 正在收集的文本片段:键名(字符串)或目标数组的当前元素
+        self._key_parts: Optional[List[str]] = None
+        self._item_parts: Optional[List[str]] = None
+        self._item_closed = False         # 当前元素(对象/数组)已闭合并返回,等待下一个逗号
+
+    def _in_target_array(self) -> bool:
+        """栈顶是否为目标数组(所有祖先都是对象且键路径与 item_path 一致)"""
+        stack = self._stack
+        if len(stack) != len(self.item_path) + 1 or stack[-1].kind != "[":
+            return False
+        return all(c.kind == "{" and c.key == key for c, key in zip(stack, self.item_path))
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        输入一段新文本
+
+        Returns:
+            本段文本中新闭合的目标数组元素(按顺序)
+        """
+        self._chunks.append(chunk)
+        if self._done or not chunk:
+            return []
+
+        items = []
+        # 本段中正在收集的片段起点
+        key_start = 0 if self._key_parts is not None else None
+        item_start = 0 if self._item_parts is not None else None
+        skip_until = 1 if self._skip_next else 0
+        self._skip_next = False
+
+        for match in _TOKEN_PATTERN.finditer(chunk):
+            pos = match.start()
+            if pos < skip_until:
+                continue
+            char = match.group()
+            stack = self._stack
+
+            # 根对象开始前只等待第一个左括号
+            if not stack:
+                if char in "{[":
+                    stack.append(_Container(char))
+                continue
+
+            if self._in_string:
+                if char == "\\":
+                    skip_until = pos + 2
+                    if skip_until > len(chunk):
+                        self._skip_next = True
+                elif char == '"':
+                    self._in_string = False
+                    if key_start is not None:
+                        self._key_parts.append(chunk[key_start:pos + 1])
+                        stack[-1].key = json.loads("".join(self._key_parts))
+                        self._key_parts = None
+                        key_start = None
+                continue
+
+            top = stack[-1]
+            if char == '"':
+                self._in_string = True
+                if top.kind == "{" and top.expect_key:
+                    top.expect_key = False
+                    self._key_parts = []
+                    key_start = pos
+            elif char == ":":
+                pass
+            elif char == ",":
+                if self._in_target_array():
+                    item = self._finish_item(chunk, item_start, pos)
+                    if item is not _NO_ITEM:
+                        items.append(item)
+                    self._item_parts, item_start, self._item_closed = [], pos + 1, False
+                elif top.kind == "{":
+                    top.expect_key = True
+            elif char in "{[":
+                stack.append(_Container(char))
+                if self._in_target_array():
+                    # 进入目标数组,从左方括号之后开始收集第一个元素
+                    self._item_parts, item_start, self._item_closed = [], pos + 1, False
+            else:
+                if _CLOSERS[char] != top.kind:
+                    # 括号不匹配,说明输出不是合法 JSON,停止增量解析,交给 result() 报错
+                    self._done = True
+                    break
+                if char == "]" and self._in_target_array():
+                    item = self._finish_item(chunk, item_start, pos)
+                    if item is not _NO_ITEM:
+                        items.append(item)
+                    self._item_parts, item_start = None, None
+                stack.pop()
+                if not stack:
+                    self._done = True
+                    break
+                if self._in_target_array() and not self._item_closed:
+                    # 对象/数组元素闭合,立即返回
+                    self._item_parts.append(chunk[item_start:pos + 1])
+                    items.append(json.loads("".join(self._item_parts)))
+                    self.items_emitted += 1
+                    self._item_parts, item_start, self._item_closed = [], pos + 1, True
+
+        # 跨段的片段保存本段剩余部分
+        if key_start is not None:
+            self._key_parts.append(chunk[key_start:])
+        if item_start is not None and self._item_parts is not None:
+            self._item_parts.append(chunk[item_start:])
+        return items
+
+    def _finish_item(self, chunk: str, item_start: Optional[int], end: int) -> Any:
+        """逗号或右方括号处结束当前元素;对象/数组元素已在闭合时返回,这里只处理标量元素"""
+        if self._item_closed:
+            return _NO_ITEM
+        parts = self._item_parts if self._item_parts is not None else []
+        if item_start is not None:
+            parts = parts + [chunk[item_start:end]]
+        text = "".join(parts).strip()
+        if not text:
+            return _NO_ITEM
+        self.items_emitted += 1
+        return json.loads(text)
+
+    @property
+    def text(self) -> str:
+        """目前为止收到的完整文本"""
+        return "".join(self._chunks)
+
+    def result(self) -> Any:
+        """解析完整文本(在流结束后调用)"""
+        from .text_processing import clean_json_tags
+        return json.loads(clean_json_tags(self.text))
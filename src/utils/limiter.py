@@ -0,0 +1,544 @@
+"""
+并发与限流工具
+为 LLM 与搜索调用提供进程内共享的全局并发上限、令牌桶限流、AIMD 自适应并发
+以及带抖动的指数退避重试,同步与异步调用方都可使用
+"""
+
+import asyncio
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, Iterator, AsyncIterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Waiter:
+    """排队等待并发槽位的调用方;loop 为 None 表示同步(线程)等待者"""
+
+    __slots__ = ("loop", "future", "granted", "cancelled")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 future: Optional["asyncio.Future[None]"] = None):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+        self.cancelled = False
+
+
+def _resolve_waiter(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    可调整上限的并发限制器
+
+    与 threading.Semaphore 不同,limit 可在运行时修改;
+    基于线程锁实现,因此同一实例可同时被多个线程和多个事件循环共享。
+    同步与异步等待者共用一个先进先出队列,释放槽位时直接交给队首等待者。
+    """
+
+    def __init__(self, limit: int, name: str = "limiter"):
+        """
+        Args:
+            limit: 允许同时进行的调用数
+            name: 名称,用于日志与统计
+        """
+        if limit < 1:
+            raise ValueError("并发上限必须大于等于 1")
+        self.name = name
+        self._limit = limit
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._waiters: "deque[_Waiter]" = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        with self._cond:
+            self._limit = max(1, int(value))
+            self._wake_waiters()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _wake_waiters(self) -> None:
+        """按到达顺序把空闲槽位交给排队的等待者(调用方需持有 _cond)"""
+        notify_sync = False
+        while self._waiters and self._in_flight < self._limit:
+            waiter = self._waiters.popleft()
+            if waiter.cancelled:
+                continue
+            if waiter.loop is None:
+                waiter.granted = True
+                self._in_flight += 1
+                notify_sync = True
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve_waiter, waiter.future)
+            except RuntimeError:
+                # 等待者所在的事件循环已关闭,跳过
+                continue
+            waiter.granted = True
+            self._in_flight += 1
+        if notify_sync:
+            self._cond.notify_all()
+
+    def try_acquire(self) -> bool:
+        """尝试占用一个并发槽位,不阻塞;已有等待者排队时不插队"""
+        with self._cond:
+            if self._in_flight < self._limit and not self._waiters:
+                self._in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        """阻塞直到获得一个并发槽位"""
+        with self._cond:
+            if self._in_flight < self._limit and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            while not waiter.granted:
+                self._cond.wait()
+
+    async def aacquire(self) -> None:
+        """异步获取并发槽位,排队等待 release() 唤醒,等待期间不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._in_flight < self._limit and not self._waiters:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._cond:
+                if not waiter.granted:
+                    waiter.cancelled = True
+                    self._waiters.remove(waiter)
+                    self._wake_waiters()
+                    raise
+            # 取消与分配槽位同时发生:归还已分配的槽位
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """释放一个并发槽位"""
+        with self._cond:
+            self._in_flight -= 1
+            self._wake_waiters()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """with limiter.slot(): ... 在并发槽位内执行"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """async with limiter.aslot(): ... 在并发槽位内执行"""
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdaptiveConcurrencyLimiter(ConcurrencyLimiter):
+    """
+    AIMD 自适应并发限制器
+
+    - 请求成功且延迟不超过目标值:并发上限加性增长(每个完整窗口 +1)
+    - 遇到 429 限流:并发上限乘性下降
+    - 延迟明显超过目标值:小幅乘性下降
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int = 1, max_limit: Optional[int] = None,
+                 target_latency: Optional[float] = None, decrease_factor: float = 0.5,
+                 latency_decrease_factor: float = 0.9, cooldown: float = 1.0, name: str = "adaptive"):
+        """
+        Args:
+            initial_limit: 初始并发上限
+            min_limit: 并发上限下界
+            max_limit: 并发上限上界,默认等于初始值
+            target_latency: 目标延迟(秒),为 None 时不根据延迟调整
+            decrease_factor: 遇到限流时的下降系数
+            latency_decrease_factor: 延迟超标时的下降系数
+            cooldown: 两次下降之间的最短间隔(秒),避免同一波限流被重复惩罚
+            name: 名称
+        """
+        super().__init__(initial_limit, name=name)
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max_limit or initial_limit
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.latency_decrease_factor = latency_decrease_factor
+        self.cooldown = cooldown
+        self._successes = 0
+        self._last_decrease = 0.0
+        self.rate_limited_count = 0
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._successes = 0
+            self._limit = max(self.min_limit, int(self._limit * factor))
+
+    def on_success(self, latency: float) -> None:
+        """记录一次成功请求"""
+        if self.target_latency and latency > self.target_latency * 2:
+            self._decrease(self.latency_decrease_factor)
+            return
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self._limit and self._limit < self.max_limit:
+                self._successes = 0
+                self._limit += 1
+                self._wake_waiters()
+
+    def on_rate_limited(self) -> None:
+        """记录一次 429 限流"""
+        self.rate_limited_count += 1
+        self._decrease(self.decrease_factor)
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    以 rate_per_minute 的速率匀速补充,容量默认等于一分钟的配额。
+    consume 允许余额为负(记账),用于按实际用量校正预估值。
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: 每分钟补充的令牌数
+            capacity: 桶容量(突发上限)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, amount: float) -> float:
+        """尝试扣除令牌,成功返回 0,否则返回需要等待的秒数"""
+        # 单次请求超过桶容量时按容量计算,避免永远等待
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1) -> None:
+        """阻塞直到扣除 amount 个令牌"""
+        while True:
+            wait = self._reserve(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1) -> None:
+        """异步等待直到扣除 amount 个令牌"""
+        while True:
+            wait = self._reserve(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def consume(self, amount: float) -> None:
+        """直接记账(可为负数以退还令牌),不等待"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+# 可重试的网络错误类型名(openai / httpx / requests),避免在此处导入这些库
+_RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "InternalServerError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "ReadError", "RemoteProtocolError",
+    "ConnectionError", "Timeout",
+}
+_RETRYABLE_STATUS = {408, 500, 502, 503, 504}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """是否为 429 限流错误"""
+    return _status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """是否为可重试的瞬时错误(限流、5xx、超时、连接错误)"""
+    if is_rate_limit_error(error):
+        return True
+    if _status_code(error) in _RETRYABLE_STATUS:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in _RETRYABLE_ERROR_NAMES
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """从错误响应头中读取 Retry-After(秒),不存在时返回 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        # HTTP 日期格式
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    限流与重试组合器
+
+    每次调用依次经过: 请求数令牌桶 → token 令牌桶 → 自适应并发槽位;
+    失败时对可重试错误做带抖动的指数退避,优先遵循服务端的 Retry-After。
+    """
+
+    def __init__(self, concurrency: Optional[ConcurrencyLimiter] = None,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 name: str = "rate_limiter"):
+        """
+        Args:
+            concurrency: 并发限制器(可为自适应限制器)
+            requests_per_minute: 每分钟请求数上限,None 或 0 表示不限制
+            tokens_per_minute: 每分钟 token 数上限,None 或 0 表示不限制
+            max_retries: 最大重试次数
+            base_delay: 退避基准时间(秒)
+            max_delay: 单次退避上限(秒)
+            name: 名称,用于日志
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """计算第 attempt 次重试前的等待时间"""
+        jitter = random.uniform(0, self.base_delay)
+        retry_after = parse_retry_after(error)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + jitter
+        # full jitter 指数退避
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))) + jitter
+
+    def _on_error(self, attempt: int, error: Exception) -> float:
+        """处理一次失败,返回重试前的等待时间;不可重试或次数用尽时重新抛出"""
+        if attempt >= self.max_retries or not is_retryable_error(error):
+            raise error
+        if is_rate_limit_error(error) and isinstance(self.concurrency, AdaptiveConcurrencyLimiter):
+            self.concurrency.on_rate_limited()
+        self.retries += 1
+        delay = self._backoff(attempt, error)
+        print(f"[{self.name}] 第 {attempt + 1} 次重试,等待 {delay:.1f} 秒: {error}")
+        return delay
+
+    def _on_success(self, latency: float) -> None:
+        if isinstance(self.concurrency, AdaptiveConcurrencyLimiter):
+            self.concurrency.on_success(latency)
+
+    def record_tokens(self, delta: float) -> None:
+        """按实际用量校正预估的 token 数(delta = 实际 - 预估)"""
+        if self.token_bucket and delta:
+            self.token_bucket.consume(delta)
+
+    def call(self, fn: Callable[..., T], *args, tokens: float = 0, **kwargs) -> T:
+        """
+        在限流与重试保护下执行同步调用
+
+        Args:
+            fn: 被调用函数
+            tokens: 本次调用预估消耗的 token 数
+        """
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                self.request_bucket.acquire(1)
+            if self.token_bucket and tokens:
+                self.token_bucket.acquire(tokens)
+
+            slot = self.concurrency.slot() if self.concurrency else nullcontext()
+            try:
+                with slot:
+                    start = time.monotonic()
+                    result = fn(*args, **kwargs)
+                    latency = time.monotonic() - start
+            except Exception as e:
+                delay = self._on_error(attempt, e)
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self._on_success(latency)
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[T]], *args, tokens: float = 0, **kwargs) -> T:
+        """call 的异步版本,fn 为返回协程的函数"""
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                await self.request_bucket.aacquire(1)
+            if self.token_bucket and tokens:
+                await self.token_bucket.aacquire(tokens)
+
+            slot = self.concurrency.aslot() if self.concurrency else nullcontext()
+            try:
+                async with slot:
+                    start = time.monotonic()
+                    result = await fn(*args, **kwargs)
+                    latency = time.monotonic() - start
+            except Exception as e:
+                delay = self._on_error(attempt, e)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self._on_success(latency)
+            return result
+
+    def stream(self, fn: Callable[..., Iterable[T]], *args, tokens: float = 0, **kwargs) -> Iterator[T]:
+        """
+        在限流与重试保护下执行流式调用,逐个返回流中的元素
+
+        并发槽位一直占用到流被消费完或关闭;只有建立流的请求会重试,已开始输出的流出错时直接抛出。
+        流正常结束时以整个流的耗时(而非首字节时间)更新自适应并发。
+
+        Args:
+            fn: 返回可迭代流的函数
+            tokens: 本次调用预估消耗的 token 数
+        """
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                self.request_bucket.acquire(1)
+            if self.token_bucket and tokens:
+                self.token_bucket.acquire(tokens)
+
+            if self.concurrency:
+                self.concurrency.acquire()
+            start = time.monotonic()
+            try:
+                stream = fn(*args, **kwargs)
+            except Exception as e:
+                if self.concurrency:
+                    self.concurrency.release()
+                delay = self._on_error(attempt, e)
+                attempt += 1
+                time.sleep(delay)
+                continue
+            break
+
+        try:
+            yield from stream
+            self._on_success(time.monotonic() - start)
+        finally:
+            if self.concurrency:
+                self.concurrency.release()
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    async def astream(self, fn: Callable[..., Awaitable[AsyncIterable[T]]], *args, tokens: float = 0,
+                      **kwargs) -> AsyncIterator[T]:
+        """stream 的异步版本,fn 为返回异步流的协程函数"""
+        attempt = 0
+        while True:
+            if self.request_bucket:
+                await self.request_bucket.aacquire(1)
+            if self.token_bucket and tokens:
+                await self.token_bucket.aacquire(tokens)
+
+            if self.concurrency:
+                await self.concurrency.aacquire()
+            start = time.monotonic()
+            try:
+                stream = await fn(*args, **kwargs)
+            except Exception as e:
+                if self.concurrency:
+                    self.concurrency.release()
+                delay = self._on_error(attempt, e)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            break
+
+        try:
+            async for item in stream:
+                yield item
+            self._on_success(time.monotonic() - start)
+        finally:
+            if self.concurrency:
+                self.concurrency.release()
+            close = getattr(stream, "close", None)
+            if close is not None:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+
+    def stats(self) -> Dict[str, Any]:
+        """当前限流状态"""
+        data = {"name": self.name, "retries": self.retries}
+        if self.concurrency:
+            data["concurrency_limit"] = self.concurrency.limit
+            data["in_flight"] = self.concurrency.in_flight
+        if isinstance(self.concurrency, AdaptiveConcurrencyLimiter):
+            data["rate_limited"] = self.concurrency.rate_limited_count
+        return data
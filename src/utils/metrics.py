@@ -0,0 +1,311 @@
+"""
+运行指标采集
+按节点记录耗时、LLM token 用量与搜索延迟/数据量,并支持导出为 JSONL 或 Prometheus 文本格式
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+
+@dataclass
+class NodeMetrics:
+    """单次节点执行的指标"""
+    node: str
+    paragraph_index: Optional[int] = None
+    nested: bool = False             # 是否为段落分支内的子步骤(汇总总量时不重复计算)
+    wall_time: float = 0.0
+    llm_calls: int = 0
+    llm_cache_hits: int = 0
+    llm_latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    search_calls: int = 0
+    search_cache_hits: int = 0
+    search_latency: float = 0.0
+    search_results: int = 0
+    search_bytes: int = 0
+    context_tokens: int = 0          # 放入提示词的搜索结果 token 数
+    context_dropped_tokens: int = 0  # 因预算未放入提示词的 token 数
+    dedup_dropped_results: int = 0   # 被去重过滤的搜索结果数
+    dedup_saved_tokens: int = 0      # 去重节省的 token 数
+    reflection_skipped_rounds: int = 0   # 因收益过低提前结束而跳过的反思轮数
+    reflection_saved_llm_calls: int = 0  # 跳过的反思轮对应的 LLM 调用数(估算)
+    reflection_saved_searches: int = 0   # 跳过的反思轮对应的搜索次数
+    prefetch_hits: int = 0           # 直接取用预取结果的初始搜索次数
+
+    def merge_counters(self, other: "NodeMetrics") -> None:
+        """把子步骤的计数累加到当前记录(不包括 wall_time)"""
+        for name in ("llm_calls", "llm_cache_hits", "llm_latency", "prompt_tokens", "completion_tokens",
+                     "search_calls", "search_cache_hits", "search_latency", "search_results", "search_bytes",
+                     "context_tokens", "context_dropped_tokens", "dedup_dropped_results", "dedup_saved_tokens",
+                     "reflection_skipped_rounds", "reflection_saved_llm_calls", "reflection_saved_searches",
+                     "prefetch_hits"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# 当前正在执行的节点记录;LLM 与搜索调用通过它把指标挂到所属节点上
+_current_node: ContextVar[Optional[NodeMetrics]] = ContextVar("current_node_metrics", default=None)
+
+
+def record_llm_call(latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    cache_hit: bool = False) -> None:
+    """记录一次 LLM 调用(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.llm_calls += 1
+    record.llm_latency += latency
+    record.prompt_tokens += prompt_tokens
+    record.completion_tokens += completion_tokens
+    if cache_hit:
+        record.llm_cache_hits += 1
+
+
+def record_search_call(latency: float, results: List[Dict[str, Any]], cache_hit: bool = False) -> None:
+    """记录一次搜索调用(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.search_calls += 1
+    record.search_latency += latency
+    record.search_results += len(results)
+    record.search_bytes += sum(
+        len((r.get("title") or "").encode("utf-8"))
+        + len((r.get("content") or "").encode("utf-8"))
+        for r in results
+    )
+    if cache_hit:
+        record.search_cache_hits += 1
+
+
+def record_context_tokens(used_tokens: int, dropped_tokens: int) -> None:
+    """记录提示词中搜索结果的 token 用量与被裁掉的 token 数(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.context_tokens += used_tokens
+    record.context_dropped_tokens += dropped_tokens
+
+
+def record_dedup(dropped_results: int, saved_tokens: int) -> None:
+    """记录搜索结果去重的效果(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.dedup_dropped_results += dropped_results
+    record.dedup_saved_tokens += saved_tokens
+
+
+def record_reflection_skip(rounds: int, llm_calls: int, searches: int) -> None:
+    """记录提前结束反思所跳过的轮数与节省的调用(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.reflection_skipped_rounds += rounds
+    record.reflection_saved_llm_calls += llm_calls
+    record.reflection_saved_searches += searches
+
+
+def record_prefetch_hit() -> None:
+    """记录一次取用预取结果的初始搜索(不在节点内时忽略)"""
+    record = _current_node.get()
+    if record is None:
+        return
+    record.prefetch_hits += 1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位数,空列表返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class RunMetrics:
+    """
+    单次研究运行的指标收集器
+
+    节点结束时写入记录;Agent 按节点名(及段落索引)取出记录附加到对应事件上,
+    运行结束后生成汇总。线程安全,并行模式下多个段落分支可同时写入。
+    """
+
+    def __init__(self, prompt_price_per_1k: float = 0.0, completion_price_per_1k: float = 0.0):
+        """
+        Args:
+            prompt_price_per_1k: 每千个提示 token 的价格,用于估算成本
+            completion_price_per_1k: 每千个生成 token 的价格
+        """
+        self.prompt_price_per_1k = prompt_price_per_1k
+        self.completion_price_per_1k = completion_price_per_1k
+        self.started_at = time.time()
+        self.records: List[NodeMetrics] = []
+        self._pending: Dict[tuple, Deque[NodeMetrics]] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, node: str, paragraph_index: Optional[int] = None,
+              detached: bool = False) -> Iterator[NodeMetrics]:
+        """
+        统计一个节点(或段落分支内子步骤)的执行
+
+        嵌套调用时子步骤记录标记为 nested,其计数同时累加到外层记录;
+        detached 为 True 时(后台任务)忽略外层记录,作为独立的顶层记录统计
+        """
+        parent = None if detached else _current_node.get()
+        record = NodeMetrics(node=node, paragraph_index=paragraph_index, nested=parent is not None)
+        token = _current_node.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - start
+            _current_node.reset(token)
+            if parent is not None:
+                parent.merge_counters(record)
+            with self._lock:
+                self.records.append(record)
+                # 后台记录没有对应的图事件,不进入待附加队列
+                if not record.nested and not detached:
+                    self._pending[(node, paragraph_index)].append(record)
+
+    def pop(self, node: str, paragraph_index: Optional[int] = None) -> Optional[NodeMetrics]:
+        """取出某节点最早完成且尚未附加到事件上的记录"""
+        with self._lock:
+            pending = self._pending.get((node, paragraph_index))
+            return pending.popleft() if pending else None
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.prompt_price_per_1k + completion_tokens * self.completion_price_per_1k) / 1000.0
+
+    def summary(self) -> Dict[str, Any]:
+        """按节点汇总的指标与整次运行的总量"""
+        with self._lock:
+            records = list(self.records)
+
+        nodes: Dict[str, Dict[str, Any]] = {}
+        grouped: Dict[str, List[NodeMetrics]] = defaultdict(list)
+        for record in records:
+            grouped[record.node].append(record)
+
+        for node, items in grouped.items():
+            wall_times = [r.wall_time for r in items]
+            prompt_tokens = sum(r.prompt_tokens for r in items)
+            completion_tokens = sum(r.completion_tokens for r in items)
+            nodes[node] = {
+                "count": len(items),
+                "wall_time_total": sum(wall_times),
+                "wall_time_p50": percentile(wall_times, 50),
+                "wall_time_p95": percentile(wall_times, 95),
+                "wall_time_max": max(wall_times),
+                "llm_calls": sum(r.llm_calls for r in items),
+                "llm_cache_hits": sum(r.llm_cache_hits for r in items),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "search_calls": sum(r.search_calls for r in items),
+                "search_latency_total": sum(r.search_latency for r in items),
+                "search_bytes": sum(r.search_bytes for r in items),
+                "context_tokens": sum(r.context_tokens for r in items),
+                "context_dropped_tokens": sum(r.context_dropped_tokens for r in items),
+                "dedup_dropped_results": sum(r.dedup_dropped_results for r in items),
+                "dedup_saved_tokens": sum(r.dedup_saved_tokens for r in items),
+                "reflection_skipped_rounds": sum(r.reflection_skipped_rounds for r in items),
+                "cost": self.cost(prompt_tokens, completion_tokens),
+            }
+
+        # 总量只统计顶层节点,段落分支内子步骤已累加到 research_paragraph 上
+        top_level = [r for r in records if not r.nested]
+        prompt_tokens = sum(r.prompt_tokens for r in top_level)
+        completion_tokens = sum(r.completion_tokens for r in top_level)
+        return {
+            "nodes": nodes,
+            "totals": {
+                "wall_time": time.time() - self.started_at,
+                "node_executions": len(top_level),
+                "llm_calls": sum(r.llm_calls for r in top_level),
+                "llm_cache_hits": sum(r.llm_cache_hits for r in top_level),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "search_calls": sum(r.search_calls for r in top_level),
+                "search_cache_hits": sum(r.search_cache_hits for r in top_level),
+                "search_latency": sum(r.search_latency for r in top_level),
+                "search_results": sum(r.search_results for r in top_level),
+                "search_bytes": sum(r.search_bytes for r in top_level),
+                "context_tokens": sum(r.context_tokens for r in top_level),
+                "context_dropped_tokens": sum(r.context_dropped_tokens for r in top_level),
+                "dedup_dropped_results": sum(r.dedup_dropped_results for r in top_level),
+                "dedup_saved_tokens": sum(r.dedup_saved_tokens for r in top_level),
+                "reflection_skipped_rounds": sum(r.reflection_skipped_rounds for r in top_level),
+                "reflection_saved_llm_calls": sum(r.reflection_saved_llm_calls for r in top_level),
+                "reflection_saved_searches": sum(r.reflection_saved_searches for r in top_level),
+                "prefetch_hits": sum(r.prefetch_hits for r in top_level),
+                "cost": self.cost(prompt_tokens, completion_tokens),
+            }
+        }
+
+
+def to_prometheus(summary: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> str:
+    """把汇总指标转换为 Prometheus 文本格式"""
+    base_labels = dict(labels or {})
+
+    def fmt_labels(extra: Dict[str, str]) -> str:
+        merged = {**base_labels, **extra}
+        if not merged:
+            return ""
+        parts = []
+        for key, value in merged.items():
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            parts.append(f'{key}="{escaped}"')
+        return "{" + ",".join(parts) + "}"
+
+    lines = []
+    for metric, value in summary["totals"].items():
+        name = f"deep_search_run_{metric}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name}{fmt_labels({})} {value}")
+
+    node_metrics = sorted({metric for stats in summary["nodes"].values() for metric in stats})
+    for metric in node_metrics:
+        name = f"deep_search_node_{metric}"
+        lines.append(f"# TYPE {name} gauge")
+        for node, stats in summary["nodes"].items():
+            lines.append(f"{name}{fmt_labels({'node': node})} {stats[metric]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(summary: Dict[str, Any], fmt: str, path: str, query: Optional[str] = None) -> None:
+    """
+    导出一次运行的汇总指标
+
+    Args:
+        summary: RunMetrics.summary() 的结果
+        fmt: jsonl(每次运行追加一行) 或 prometheus(覆盖写入,供 node_exporter textfile 采集)
+        path: 输出文件路径
+        query: 研究问题,写入记录便于区分
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if fmt == "jsonl":
+        line = json.dumps({"timestamp": time.time(), "query": query, **summary}, ensure_ascii=False)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    elif fmt == "prometheus":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(summary))
+    else:
+        raise ValueError(f"不支持的指标导出格式: {fmt}")
@@ -0,0 +1,71 @@
+"""
+反思收益评估
+衡量一轮反思搜索带来的新信息量(新 URL、正文 n-gram 新颖度、总结变化幅度),用于提前结束反思
+"""
+
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Set
+
+from .dedup import _shingles, canonicalize_url
+
+# 各信号在综合收益中的权重
+URL_WEIGHT = 0.3
+CONTENT_WEIGHT = 0.4
+SUMMARY_WEIGHT = 0.3
+
+
+@dataclass
+class ReflectionGain:
+    """一轮反思的边际收益,各项取值 0~1"""
+    new_url_ratio: float = 0.0       # 新 URL 占期望结果数的比例
+    content_novelty: float = 0.0     # 新结果正文中未出现过的 4-gram 比例
+    summary_change: float = 0.0      # 总结前后 4-gram 集合的 Jaccard 距离
+
+    @property
+    def score(self) -> float:
+        return (URL_WEIGHT * self.new_url_ratio
+                + CONTENT_WEIGHT * self.content_novelty
+                + SUMMARY_WEIGHT * self.summary_change)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "score": self.score}
+
+
+def _shingle_set(texts: List[str], max_chars: int) -> Set[str]:
+    shingles: Set[str] = set()
+    for text in texts:
+        shingles.update(_shingles((text or "")[:max_chars]))
+    return shingles
+
+
+def score_reflection_gain(previous_results: List[Dict[str, Any]], new_results: List[Dict[str, Any]],
+                          previous_summary: str, new_summary: str, expected_results: int = 3,
+                          max_chars: int = 20000) -> ReflectionGain:
+    """
+    计算一轮反思的收益
+
+    Args:
+        previous_results: 本轮之前段落已有的搜索结果
+        new_results: 本轮反思搜索得到的结果(可能已被去重过滤)
+        previous_summary: 本轮之前的段落总结
+        new_summary: 本轮之后的段落总结
+        expected_results: 每次搜索请求的结果数,去重丢掉的结果按无新信息计
+        max_chars: 每条结果参与比较的最大字符数
+    """
+    gain = ReflectionGain()
+
+    seen_urls = {canonicalize_url(r.get("url", "")) for r in previous_results}
+    new_urls = {canonicalize_url(r.get("url", "")) for r in new_results} - seen_urls - {""}
+    gain.new_url_ratio = min(1.0, len(new_urls) / max(1, expected_results, len(new_results)))
+
+    new_shingles = _shingle_set([r.get("content") or "" for r in new_results], max_chars)
+    if new_shingles:
+        known = _shingle_set([r.get("content") or "" for r in previous_results] + [previous_summary], max_chars)
+        gain.content_novelty = len(new_shingles - known) / len(new_shingles)
+
+    before = set(_shingles(previous_summary or ""))
+    after = set(_shingles(new_summary or ""))
+    if before or after:
+        gain.summary_change = 1.0 - len(before & after) / len(before | after)
+
+    return gain
@@ -5,10 +5,22 @@
 
 import re
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from json.decoder import JSONDecodeError
 
 
+# 代码块围栏:```json / ```markdown 连同其后的空白一起移除,其余 ``` 单独移除
+_JSON_FENCE_PATTERN = re.compile(r'```(?:json\s*)?')
+_MARKDOWN_FENCE_PATTERN = re.compile(r'```(?:markdown\s*)?')
+
+# JSON 括号扫描只关心的字符,普通字符由正则引擎在 C 层跳过
+_JSON_TOKEN_PATTERN = re.compile(r'["\\{}\[\]]')
+_BRACKET_PAIRS = {"{": "}", "[": "]"}
+# 括号后第一个非空白字符不可能开始 JSON 值的片段(如 Markdown 中的 [S1])不作为候选
+_JSON_CANDIDATE_PATTERN = re.compile(r'[{\[]\s*["{\[\]}\-0-9tfn]')
+_JSON_DECODER = json.JSONDecoder()
+
+
 def clean_json_tags(text: str) -> str:
     """
     清理文本中的JSON标签
@@ -19,12 +31,8 @@ def clean_json_tags(text: str) -> str:
     Returns:
         清理后的文本
     """
-    # 移除```json 和 ```标签
-    text = re.sub(r'```json\s*', '', text)
-    text = re.sub(r'```\s*$', '', text)
-    text = re.sub(r'```', '', text)
-    
-    return text.strip()
+    # 移除```json 和 ```标签(单次扫描)
+    return _JSON_FENCE_PATTERN.sub('', text).strip()
 
 
 def clean_markdown_tags(text: str) -> str:
@@ -37,37 +45,86 @@ def clean_markdown_tags(text: str) -> str:
     Returns:
         清理后的文本
     """
-    # 移除```markdown 和 ```标签
-    text = re.sub(r'```markdown\s*', '', text)
-    text = re.sub(r'```\s*$', '', text)
-    text = re.sub(r'```', '', text)
-    
-    return text.strip()
+    # 移除```markdown 和 ```标签(单次扫描)
+    return _MARKDOWN_FENCE_PATTERN.sub('', text).strip()
 
 
 def remove_reasoning_from_output(text: str) -> str:
     """
     移除输出中的推理过程文本
     
+    JSON 前的推理、解释等说明文字整体移除,即从第一个 { 或 [ 开始保留;
+    没有 JSON 时原样返回
+    
     Args:
         text: 原始文本
         
     Returns:
         清理后的文本
     """
-    # 移除常见的推理标识
-    patterns = [
-        r'(?:reasoning|推理|思考|分析)[:：]\s*.*?(?=\{|\[)',  # 移除推理部分
-        r'(?:explanation|解释|说明)[:：]\s*.*?(?=\{|\[)',   # 移除解释部分
-        r'^.*?(?=\{|\[)',  # 移除JSON前的所有文本
-    ]
-    
-    for pattern in patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
+    starts = [pos for pos in (text.find('{'), text.find('[')) if pos >= 0]
+    if starts:
+        text = text[min(starts):]
     
     return text.strip()
 
 
+def _find_balanced_json(text: str, opener: str) -> Optional[Any]:
+    """
+    查找第一个以 opener 开头、括号平衡且能解析的 JSON 片段
+    
+    先在第一个 opener 处用 raw_decode 直接解析(忽略其后的文本,覆盖"说明 + JSON + 说明"的常见情况);
+    失败时线性扫描:字符串内的括号与转义字符不计入层级,括号平衡时解析该片段,
+    解析失败或括号不匹配的片段整体跳过,每个字符最多扫描一次
+    
+    Returns:
+        解析后的对象,未找到时返回 None
+    """
+    first = text.find(opener)
+    if first < 0:
+        return None
+    try:
+        return _JSON_DECODER.raw_decode(text, first)[0]
+    except JSONDecodeError:
+        pass
+
+    start = None
+    stack: List[str] = []
+    in_string = False
+    skip_until = 0
+
+    for match in _JSON_TOKEN_PATTERN.finditer(text, first):
+        pos = match.start()
+        if pos < skip_until:
+            continue
+        char = match.group()
+
+        if start is None:
+            if char == opener and _JSON_CANDIDATE_PATTERN.match(text, pos):
+                start, stack, in_string = pos, [char], False
+            continue
+
+        if in_string:
+            if char == '\\':
+                skip_until = pos + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _BRACKET_PAIRS:
+            stack.append(char)
+        elif char == '}' or char == ']':
+            if _BRACKET_PAIRS[stack.pop()] != char:
+                start = None
+            elif not stack:
+                try:
+                    return json.loads(text[start:pos + 1])
+                except JSONDecodeError:
+                    start = None
+
+    return None
+
+
 def extract_clean_response(text: str) -> Dict[str, Any]:
     """
     提取并清理响应中的JSON内容
@@ -88,23 +145,11 @@ def extract_clean_response(text: str) -> Dict[str, Any]:
     except JSONDecodeError:
         pass
     
-    # 尝试查找JSON对象
-    json_pattern = r'\{.*\}'
-    match = re.search(json_pattern, cleaned_text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group())
-        except JSONDecodeError:
-            pass
-    
-    # 尝试查找JSON数组
-    array_pattern = r'\[.*\]'
-    match = re.search(array_pattern, cleaned_text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group())
-        except JSONDecodeError:
-            pass
+    # 依次查找括号平衡的JSON对象与JSON数组
+    for opener in ("{", "["):
+        result = _find_balanced_json(cleaned_text, opener)
+        if result is not None:
+            return result
     
     # 如果所有方法都失败，返回错误信息
     print(f"无法解析JSON响应: {cleaned_text[:200]}...")
@@ -177,18 +222,44 @@ def truncate_content(content: str, max_length: int = 20000) -> str:
         return truncated + "..."
 
 
+def format_search_results_with_budget(search_results: List[Dict[str, Any]], max_length: int = 20000,
+                                      token_budget: Optional[int] = None) -> Tuple[List[str], Any]:
+    """
+    格式化搜索结果用于提示词,并返回 token 预算统计
+
+    Args:
+        search_results: 搜索结果列表
+        max_length: 每个结果的最大字符数
+        token_budget: 所有结果共享的 token 预算,按相关度分配并在句子边界截断;
+                      为空或 0 时只按 max_length 截断
+
+    Returns:
+        (格式化后的内容列表, BudgetReport 或 None)
+    """
+    if not token_budget:
+        return format_search_results_for_prompt(search_results, max_length), None
+
+    from .token_budget import budget_search_results
+    return budget_search_results(search_results, token_budget, max_length=max_length)
+
+
 def format_search_results_for_prompt(search_results: List[Dict[str, Any]], 
-                                   max_length: int = 20000) -> List[str]:
+                                   max_length: int = 20000,
+                                   token_budget: Optional[int] = None) -> List[str]:
     """
     格式化搜索结果用于提示词
     
     Args:
         search_results: 搜索结果列表
         max_length: 每个结果的最大长度
+        token_budget: 所有结果共享的 token 预算(可选),见 format_search_results_with_budget
         
     Returns:
         格式化后的内容列表
     """
+    if token_budget:
+        return format_search_results_with_budget(search_results, max_length, token_budget)[0]
+
     formatted_results = []
     
     for result in search_results:
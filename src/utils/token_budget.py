@@ -0,0 +1,185 @@
+"""
+上下文 token 预算
+在多条搜索结果之间按相关度分配统一的 token 预算,并在句子边界处截断
+"""
+
+import re
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TokenCounter = Callable[[str], int]
+
+# CJK 统一表意文字、日文假名、韩文音节:大多数 BPE 词表中约 1 字 1 token
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+|[^\sA-Za-z0-9_\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+# 句子边界:中英文句末标点与换行,标点保留在前一句末尾
+_SENTENCE_PATTERN = re.compile(r"(?:[^。！？!?；;\n.]|\.(?!\s|$))*(?:[。！？!?；;\n]+|\.(?=\s|$)|$)")
+
+# 分配到的预算少于该值的结果直接丢弃,避免只剩半句话
+MIN_RESULT_TOKENS = 32
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    启发式 token 估算(未安装 tiktoken 时使用)
+
+    CJK 字符按 1 token 计,其余按单词/标点计,英文长单词按每 4 字符 1 token 计
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    others = sum(max(1, len(w) // 4) for w in _WORD_PATTERN.findall(text))
+    return cjk + others
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(encoding: str = "cl100k_base") -> TokenCounter:
+    """
+    获取 token 计数函数
+
+    优先使用 tiktoken 的本地编码;tiktoken 未安装或编码文件不可用时退化为 estimate_tokens
+    """
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding(encoding)
+    except Exception:
+        return estimate_tokens
+
+    def count(text: str) -> int:
+        return len(enc.encode(text, disallowed_special=())) if text else 0
+
+    return count
+
+
+def split_sentences(text: str) -> List[str]:
+    """按中英文句末标点与换行切分句子,保留原有标点"""
+    return [s for s in _SENTENCE_PATTERN.findall(text) if s]
+
+
+def trim_to_tokens(text: str, budget: int, counter: Optional[TokenCounter] = None) -> Tuple[str, int]:
+    """
+    在句子边界处把文本截断到 budget 个 token 以内
+
+    Returns:
+        (截断后的文本, 实际 token 数);第一句就超出预算时按比例截断该句
+    """
+    counter = counter or get_token_counter()
+    if budget <= 0 or not text:
+        return "", 0
+
+    total = counter(text)
+    if total <= budget:
+        return text, total
+
+    kept: List[str] = []
+    used = 0
+    for sentence in split_sentences(text):
+        tokens = counter(sentence)
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    if not kept:
+        # 单句超长:按字符比例截取
+        cut = max(1, int(len(text) * budget / total))
+        trimmed = text[:cut]
+        return trimmed + "...", counter(trimmed)
+
+    return "".join(kept).rstrip() + "...", used
+
+
+@dataclass
+class BudgetReport:
+    """一次预算分配的统计"""
+    total_budget: int = 0
+    input_tokens: int = 0
+    used_tokens: int = 0
+    dropped_tokens: int = 0
+    truncated_results: int = 0
+    dropped_results: int = 0
+    # 正文(全部或截断后)进入提示词的结果在输入列表中的下标
+    kept_indices: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def allocate_budget(needs: List[int], weights: List[float], total_budget: int) -> List[int]:
+    """
+    按权重分配总预算(注水法)
+
+    需求小于按权重应得份额的结果只拿走自己需要的部分,剩余预算在其他结果间重新按权重分配
+    """
+    allocation = [0] * len(needs)
+    active = [i for i, need in enumerate(needs) if need > 0]
+    remaining = total_budget
+
+    while active and remaining > 0:
+        total_weight = sum(weights[i] for i in active)
+        satisfied = [i for i in active if needs[i] <= remaining * weights[i] / total_weight]
+        if not satisfied:
+            for i in active:
+                allocation[i] = int(remaining * weights[i] / total_weight)
+            break
+        for i in satisfied:
+            allocation[i] = needs[i]
+            remaining -= needs[i]
+            active.remove(i)
+
+    return allocation
+
+
+def budget_search_results(search_results: List[Dict[str, Any]], total_budget: int,
+                          max_length: Optional[int] = None,
+                          counter: Optional[TokenCounter] = None) -> Tuple[List[str], BudgetReport]:
+    """
+    在总 token 预算内格式化搜索结果正文
+
+    Args:
+        search_results: 搜索结果列表(使用 content 与 score 字段)
+        total_budget: 所有结果共享的 token 预算
+        max_length: 单条结果的字符上限(在计数前先做粗截断,可选)
+        counter: token 计数函数,默认 get_token_counter()
+
+    Returns:
+        (按原顺序排列的正文列表, 预算统计)
+    """
+    counter = counter or get_token_counter()
+
+    contents = []
+    indices = []
+    for i, result in enumerate(search_results):
+        content = result.get("content") or ""
+        if max_length and len(content) > max_length:
+            content = content[:max_length]
+        if content:
+            contents.append((content, result.get("score") or 0.0))
+            indices.append(i)
+
+    needs = [counter(content) for content, _ in contents]
+    # 分数缺失或为 0 的结果仍保留少量权重
+    weights = [max(float(score), 0.05) for _, score in contents]
+    allocation = allocate_budget(needs, weights, total_budget)
+
+    report = BudgetReport(total_budget=total_budget, input_tokens=sum(needs))
+    formatted = []
+    for index, (content, _), need, budget in zip(indices, contents, needs, allocation):
+        if budget >= need:
+            formatted.append(content)
+            report.kept_indices.append(index)
+            report.used_tokens += need
+            continue
+        if budget < MIN_RESULT_TOKENS:
+            report.dropped_results += 1
+            continue
+        trimmed, used = trim_to_tokens(content, budget, counter)
+        formatted.append(trimmed)
+        report.kept_indices.append(index)
+        report.used_tokens += used
+        report.truncated_results += 1
+
+    report.dropped_tokens = report.input_tokens - report.used_tokens
+    return formatted, report